@@ -3,9 +3,27 @@ HSN Validator Agent package.
 
 This package provides a Google ADK-based agent for validating
 Harmonized System Nomenclature (HSN) codes.
+
+The ADK agent is built on first access to ``root_agent`` (or
+``hsn_validator_agent``), so importing the package or its validation modules
+does not import google.adk. ``agent`` is always the agent submodule.
 """
 
-from .agent import hsn_validator_agent
+import importlib
+
+# Agent names exported by the package, resolved lazily. The agent is not
+# exported as ``agent``: importing the submodule sets that attribute, so the
+# name would depend on import order.
+_AGENT_NAMES = ("hsn_validator_agent", "root_agent")
+
+
+def __getattr__(name: str):
+    if name in _AGENT_NAMES:
+        from .agent import get_agent
 
-# Export the agent as the primary interface
-agent = hsn_validator_agent
+        root_agent = get_agent()
+        globals().update(dict.fromkeys(_AGENT_NAMES, root_agent))
+        return root_agent
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
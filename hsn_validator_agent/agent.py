@@ -3,34 +3,229 @@ HSN Code Validator Agent
 
 This module implements an intelligent agent for validating Harmonized System Nomenclature (HSN) codes
 using Google's Agent Development Kit (ADK).
+
+The validation tools only need NumPy; google.adk is imported and the ``Agent``
+is built on first access to ``hsn_validator_agent`` (or ``get_agent()``), so
+scripts, tests and worker processes that only validate codes never pay for it.
 """
 
 import os
 import re
-import pandas as pd
-from typing import List, Dict, Union, Optional
-from google.adk.agents import Agent
-from google.adk.tools.tool_context import ToolContext
+import threading
+from typing import TYPE_CHECKING, List, Dict, Union, Optional
+
+if TYPE_CHECKING:
+    from google.adk.agents import Agent
+    from google.adk.tools.tool_context import ToolContext
+
+try:
+    from .audit import audit_summary
+    from .batch import validate_hsn_columns, columns_to_results, summarize_columns
+    from .cache import DEFAULT_CACHE_SIZE
+    from .compact import COMPACT_THRESHOLD, DEFAULT_PAGE_SIZE, RESULT_STATUSES, ResultStore, compact_results, page_results
+    from .diff import DEFAULT_DIFF_LIMIT, diff_report
+    from .normalize import normalization_names, normalize_code
+    from .registry import DEFAULT_DATASET, DatasetRegistry
+    from .resultdb import DEFAULT_REPORT_LIMIT, RESULT_DB_PATH, ResultDatabase, summarize_report
+    from .snapshot import MasterAuditError, MasterDataError, load_snapshot, open_snapshot, require_clean_audit
+    from . import metrics
+except ImportError:
+    from audit import audit_summary
+    from batch import validate_hsn_columns, columns_to_results, summarize_columns
+    from cache import DEFAULT_CACHE_SIZE
+    from compact import COMPACT_THRESHOLD, DEFAULT_PAGE_SIZE, RESULT_STATUSES, ResultStore, compact_results, page_results
+    from diff import DEFAULT_DIFF_LIMIT, diff_report
+    from normalize import normalization_names, normalize_code
+    from registry import DEFAULT_DATASET, DatasetRegistry
+    from resultdb import DEFAULT_REPORT_LIMIT, RESULT_DB_PATH, ResultDatabase, summarize_report
+    from snapshot import MasterAuditError, MasterDataError, load_snapshot, open_snapshot, require_clean_audit
+    import metrics
 
 # Default model to use if not specified
 DEFAULT_MODEL = "gemini-2.0-flash"
 
-# Global variable to store loaded HSN data
+# Refuse masters that fail the load-time audit (conflicting duplicates, bad codes, hierarchy gaps, empty descriptions)
+STRICT_MASTER_AUDIT = os.environ.get("HSN_STRICT_MASTER", "0").lower() in ("1", "true", "yes")
+
+# Named, versioned HSN datasets loaded in this process
+dataset_registry = DatasetRegistry(int(os.environ.get("HSN_CACHE_SIZE", DEFAULT_CACHE_SIZE)))
+
+# Global variable to store the loaded default HSN dataset
 hsn_data = None
 
+# Cache of per-code validation results for the default HSN dataset
+validation_cache = dataset_registry.cache(DEFAULT_DATASET)
+
+# Full results of compact batch responses, fetched page by page with get_validation_details
+validation_results = ResultStore()
+
+# On-disk validation results, re-validated incrementally when a master changes (HSN_RESULT_DB)
+result_db = ResultDatabase(RESULT_DB_PATH) if RESULT_DB_PATH else None
+
+# Result database revision of the registry version installed for each dataset
+_result_db_revisions = {}
+
+
+def _install_hsn_index(index, file_path: str, tool_context: "ToolContext" = None,
+                       dataset: str = DEFAULT_DATASET) -> Optional[dict]:
+    """Publishes a loaded HSN index as the next version of a dataset.
+    
+    Session state only records a handle to the new version; the data itself
+    stays in the process-wide registry. When the result database is enabled,
+    the stored results affected by the new master are re-validated and the
+    summary of the change report is returned.
+    """
+    global hsn_data
+    
+    entry = dataset_registry.install(dataset, index, file_path)
+    if dataset == DEFAULT_DATASET:
+        hsn_data = entry
+    
+    # Pin the session to the new version if tool_context is provided
+    if tool_context:
+        _pin_session(tool_context, entry)
+    
+    if result_db is None:
+        return None
+    report = result_db.advance(dataset, index)
+    _result_db_revisions[dataset] = (entry["version"], report["revision"])
+    return report
+
+
+def get_hsn_data_info(dataset: str = DEFAULT_DATASET) -> dict:
+    """Returns the version and size of a loaded HSN dataset without the data itself."""
+    info = dataset_registry.describe(dataset)
+    if info is None:
+        return {"loaded": False, "master_version": None}
+    return {
+        "loaded": True,
+        "dataset": info["name"],
+        "master_version": info["version"],
+        "count": info["count"],
+        "file_path": info["file_path"],
+        "load_time": info["load_time"]
+    }
+
+
+def get_validation_cache_stats() -> dict:
+    """Returns size and hit/miss statistics of the validation result cache."""
+    return validation_cache.stats()
+
+
+def configure_validation_cache(maxsize: int) -> dict:
+    """Sets the maximum number of cached validation results (0 disables the cache)."""
+    validation_cache.resize(maxsize)
+    return validation_cache.stats()
 
-def load_hsn_data(file_path: str, tool_context: ToolContext = None) -> dict:
-    """Loads HSN codes from the master Excel file.
+
+def _collect_dataset_metrics() -> list:
+    """Reports the size, version and audit of every loaded dataset and the state of its result cache."""
+    samples = {name: [] for name in (
+        "codes", "version", "index_bytes", "audit_problems",
+        "cache_entries", "cache_hits", "cache_misses", "cache_hit_ratio"
+    )}
+    for name in dataset_registry.names():
+        entry = dataset_registry.get(name)
+        stats = dataset_registry.cache(name).stats()
+        labels = {"dataset": name}
+        samples["codes"].append((labels, entry["count"]))
+        samples["version"].append((labels, entry["version"]))
+        samples["index_bytes"].append((labels, entry["index"].nbytes))
+        audit = entry["index"].metadata.get("audit")
+        for check, count in (audit["counts"].items() if audit else ()):
+            samples["audit_problems"].append(({"dataset": name, "check": check}, count))
+        samples["cache_entries"].append((labels, stats["size"]))
+        samples["cache_hits"].append((labels, stats["hits"]))
+        samples["cache_misses"].append((labels, stats["misses"]))
+        samples["cache_hit_ratio"].append((labels, stats["hit_ratio"]))
+
+    return [
+        ("hsn_master_codes", "Codes in the current master of each dataset", samples["codes"]),
+        ("hsn_master_version", "Current master version of each dataset", samples["version"]),
+        ("hsn_master_index_bytes", "Bytes held by the packed master index", samples["index_bytes"]),
+        ("hsn_master_audit_problems", "Problems found by the load-time master audit", samples["audit_problems"]),
+        ("hsn_cache_entries", "Validation results held in the cache", samples["cache_entries"]),
+        ("hsn_cache_hits_total", "Validation result cache hits", samples["cache_hits"], "counter"),
+        ("hsn_cache_misses_total", "Validation result cache misses", samples["cache_misses"], "counter"),
+        ("hsn_cache_hit_ratio", "Share of cache lookups answered from the cache", samples["cache_hit_ratio"])
+    ]
+
+
+metrics.register_collector(_collect_dataset_metrics)
+
+
+def _pin_session(tool_context: "ToolContext", entry) -> None:
+    """Stores the handle of a dataset version in the session state."""
+    tool_context.state["hsn_dataset"] = {"dataset": entry["name"], "version": entry["version"]}
+
+
+def _session_handle(tool_context: "ToolContext" = None) -> Optional[dict]:
+    """Returns the dataset handle pinned in the session state, if any."""
+    if not tool_context:
+        return None
+    handle = tool_context.state.get("hsn_dataset")
+    if isinstance(handle, str):
+        return {"dataset": handle, "version": None}
+    return handle if isinstance(handle, dict) and handle.get("dataset") else None
+
+
+def _selected_dataset(tool_context: "ToolContext" = None, dataset: str = None) -> str:
+    """Returns the dataset named by the request, else the session's selection, else the default."""
+    if dataset:
+        return dataset
+    handle = _session_handle(tool_context)
+    return handle["dataset"] if handle else DEFAULT_DATASET
+
+
+def _get_hsn_data(tool_context: "ToolContext" = None, dataset: str = None):
+    """Resolves the selected HSN dataset against the registry.
+    
+    A dataset named by the request resolves to its current version; otherwise
+    the session's pinned version is used while the registry retains it, then
+    the session moves to the current version.
+    
+    Returns:
+        Mapping: The dataset entry, or None if the dataset is not loaded.
+    """
+    handle = _session_handle(tool_context)
+    if dataset or handle is None:
+        return dataset_registry.get(dataset or DEFAULT_DATASET)
+    
+    entry = dataset_registry.resolve(handle["dataset"], handle.get("version"))
+    if entry is None:
+        entry = dataset_registry.get(handle["dataset"])
+        if entry is not None:
+            _pin_session(tool_context, entry)
+    return entry
+
+
+def get_hsn_index(tool_context: "ToolContext" = None, dataset: str = None):
+    """Returns the HSN index of the selected master data, or None if not loaded."""
+    data_source = _get_hsn_data(tool_context, dataset)
+    if not data_source:
+        return None
+    return data_source.get("index")
+
+
+def load_hsn_data(file_path: str, tool_context: "ToolContext" = None, dataset: str = DEFAULT_DATASET,
+                  strict: bool = False) -> dict:
+    """Loads HSN codes from the master data file.
+    
+    Excel (.xlsx), CSV, Parquet and Arrow/Feather masters are supported. The file
+    is compiled into a memory-mapped binary snapshot next to it on first load,
+    and later loads open the snapshot unless the file has changed. The master
+    rows are audited for duplicate codes, malformed codes, hierarchy gaps and
+    empty descriptions; in strict mode a master with problems is not loaded.
     
     Args:
-        file_path: Path to the Excel file containing HSN codes and descriptions.
+        file_path: Path to the master file containing HSNCode and Description columns.
         tool_context: Tool context for state management (optional).
+        dataset: Name to load the master data under, e.g. "gst" or "customs-2024" (optional).
+        strict: Refuse a master that fails the audit (also enabled by HSN_STRICT_MASTER).
         
     Returns:
-        dict: Status of the operation and loaded data information.
+        dict: Status of the operation, loaded data information and the audit summary.
     """
-    global hsn_data
-    
     try:
         # Check if file exists
         if not os.path.exists(file_path):
@@ -39,47 +234,100 @@ def load_hsn_data(file_path: str, tool_context: ToolContext = None) -> dict:
                 "error_message": f"HSN master data file not found at {file_path}"
             }
         
-        # Load Excel file
-        df = pd.read_excel(file_path)
+        # Open the compiled snapshot of the master file (rebuilt if the file changed)
+        timer = metrics.timer()
+        index = load_snapshot(file_path, strict=strict or STRICT_MASTER_AUDIT)
+        timer.lap("load")
+        
+        revalidation = _install_hsn_index(index, file_path, tool_context, dataset)
+        
+        result = {
+            "status": "success",
+            "message": f"Successfully loaded {len(index)} HSN codes from {file_path}",
+            "code_count": len(index),
+            "dataset": dataset,
+            "master_version": dataset_registry.get(dataset)["version"]
+        }
+        if "audit" in index.metadata:
+            result["audit"] = audit_summary(index.metadata["audit"])
+        if revalidation is not None:
+            result["revalidation"] = revalidation
+        return result
+        
+    except MasterAuditError as e:
+        return {
+            "status": "error",
+            "error_message": str(e),
+            "audit": e.audit
+        }
+        
+    except MasterDataError as e:
+        return {
+            "status": "error",
+            "error_message": str(e)
+        }
         
-        # Check if required columns exist
-        required_columns = ['HSNCode', 'Description']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Failed to load HSN master data: {str(e)}"
+        }
+
+
+def attach_hsn_index(index_path: str, tool_context: "ToolContext" = None, dataset: str = DEFAULT_DATASET,
+                     strict: bool = False) -> dict:
+    """Attaches to an HSN index snapshot published by a loader process.
+    
+    The snapshot is memory-mapped read-only, so every worker process that
+    attaches to the same file shares a single copy of the master data.
+    
+    Args:
+        index_path: Path to the published snapshot file.
+        tool_context: Tool context for state management (optional).
+        dataset: Name to attach the master data under (optional).
+        strict: Refuse a snapshot whose master failed the audit (also enabled by HSN_STRICT_MASTER).
         
-        if missing_columns:
+    Returns:
+        dict: Status of the operation and loaded data information.
+    """
+    try:
+        if not os.path.exists(index_path):
             return {
                 "status": "error",
-                "error_message": f"Missing required columns in HSN master data: {', '.join(missing_columns)}"
+                "error_message": f"HSN index snapshot not found at {index_path}"
             }
-            
-        # Convert HSN codes to string format (for handling numeric codes stored as numbers)
-        df['HSNCode'] = df['HSNCode'].astype(str)
-        
-        # Create a lookup dictionary for faster access
-        code_dict = dict(zip(df['HSNCode'], df['Description']))
-        
-        # Store in global variable
-        hsn_data = {
-            "data": code_dict,
-            "count": len(code_dict),
-            "file_path": file_path,
-            "load_time": pd.Timestamp.now().isoformat()
-        }
         
-        # Store in state if tool_context is provided
-        if tool_context:
-            tool_context.state["hsn_data"] = hsn_data
+        timer = metrics.timer()
+        index = open_snapshot(index_path)
+        timer.lap("load")
+        if strict or STRICT_MASTER_AUDIT:
+            require_clean_audit(index, index.metadata.get("source_path", index_path))
+        revalidation = _install_hsn_index(index, index.metadata.get("source_path", index_path), tool_context, dataset)
         
-        return {
+        result = {
             "status": "success",
-            "message": f"Successfully loaded {len(code_dict)} HSN codes from {file_path}",
-            "code_count": len(code_dict)
+            "message": f"Attached to {len(index)} HSN codes in {index_path}",
+            "code_count": len(index),
+            "dataset": dataset,
+            "master_version": dataset_registry.get(dataset)["version"]
+        }
+        if "audit" in index.metadata:
+            result["audit"] = audit_summary(index.metadata["audit"])
+        if revalidation is not None:
+            result["revalidation"] = revalidation
+        return result
+        
+    except MasterAuditError as e:
+        return {
+            "status": "error",
+            "error_message": str(e),
+            "audit": e.audit
         }
         
     except Exception as e:
         return {
             "status": "error",
-            "error_message": f"Failed to load HSN master data: {str(e)}"
+            "error_message": f"Failed to attach HSN index: {str(e)}"
         }
 
 
@@ -124,7 +372,7 @@ def validate_hsn_format(code: str) -> dict:
     }
 
 
-def validate_hsn_existence(code: str, tool_context: ToolContext = None) -> dict:
+def validate_hsn_existence(code: str, tool_context: "ToolContext" = None) -> dict:
     """Checks if an HSN code exists in the master database.
     
     Args:
@@ -134,14 +382,14 @@ def validate_hsn_existence(code: str, tool_context: ToolContext = None) -> dict:
     Returns:
         dict: Validation results with explanation.
     """
-    global hsn_data
-    
     # Get HSN data from state if available, otherwise use global variable
-    data = None
-    if tool_context and "hsn_data" in tool_context.state:
-        data = tool_context.state["hsn_data"]["data"]
-    elif hsn_data:
-        data = hsn_data["data"]
+    return _check_existence(code, _get_hsn_data(tool_context))
+
+
+def _check_existence(code: str, data_source: Optional[dict]) -> dict:
+    """Checks if an HSN code exists in the given HSN data."""
+    if data_source:
+        data = data_source["data"]
     else:
         return {
             "status": "error",
@@ -165,7 +413,30 @@ def validate_hsn_existence(code: str, tool_context: ToolContext = None) -> dict:
     }
 
 
-def validate_hsn_hierarchy(code: str, tool_context: ToolContext = None) -> dict:
+def _missing_parents(code: str, data_source: Optional[dict]) -> list:
+    """Collects missing parent codes by checking each parent level separately."""
+    # Define parent levels to check based on code length
+    parent_levels = []
+    if len(code) >= 4:
+        parent_levels.append(2)
+    if len(code) >= 6:
+        parent_levels.append(4)
+    if len(code) >= 8:
+        parent_levels.append(6)
+    
+    # Check each parent level
+    missing_parents = []
+    for level in parent_levels:
+        parent_code = code[:level]
+        parent_result = _check_existence(parent_code, data_source)
+        
+        if not parent_result.get("exists_in_database", False):
+            missing_parents.append(parent_code)
+    
+    return missing_parents
+
+
+def validate_hsn_hierarchy(code: str, tool_context: "ToolContext" = None) -> dict:
     """Validates the hierarchy of an HSN code by checking its parent levels.
     
     For an 8-digit code, checks if its 2, 4, and 6-digit parent codes exist.
@@ -179,6 +450,11 @@ def validate_hsn_hierarchy(code: str, tool_context: ToolContext = None) -> dict:
     Returns:
         dict: Validation results with explanation.
     """
+    return _check_hierarchy(code, _get_hsn_data(tool_context))
+
+
+def _check_hierarchy(code: str, data_source: Optional[dict]) -> dict:
+    """Validates the hierarchy of an HSN code against the given HSN data."""
     # Check if code has valid length and format first
     format_result = validate_hsn_format(code)
     if not format_result["format_valid"]:
@@ -196,23 +472,11 @@ def validate_hsn_hierarchy(code: str, tool_context: ToolContext = None) -> dict:
             "message": "2-digit code. No parent hierarchy to validate."
         }
     
-    # Define parent levels to check based on code length
-    parent_levels = []
-    if len(code) >= 4:
-        parent_levels.append(2)
-    if len(code) >= 6:
-        parent_levels.append(4)
-    if len(code) >= 8:
-        parent_levels.append(6)
-    
-    # Check each parent level
-    missing_parents = []
-    for level in parent_levels:
-        parent_code = code[:level]
-        parent_result = validate_hsn_existence(parent_code, tool_context)
-        
-        if not parent_result.get("exists_in_database", False):
-            missing_parents.append(parent_code)
+    # Check the code and all parent levels in one walk of the hierarchy index
+    if data_source and data_source.get("index") is not None:
+        missing_parents = data_source["index"].hierarchy.walk(code)["missing_parents"]
+    else:
+        missing_parents = _missing_parents(code, data_source)
     
     # Return results
     if missing_parents:
@@ -230,7 +494,7 @@ def validate_hsn_hierarchy(code: str, tool_context: ToolContext = None) -> dict:
     }
 
 
-def validate_hsn_code(code: str, tool_context: ToolContext = None) -> dict:
+def validate_hsn_code(code: str, tool_context: "ToolContext" = None) -> dict:
     """Performs comprehensive validation of an HSN code.
     
     Args:
@@ -240,12 +504,95 @@ def validate_hsn_code(code: str, tool_context: ToolContext = None) -> dict:
     Returns:
         dict: Comprehensive validation results.
     """
+    return _validate_hsn_code(code, _get_hsn_data(tool_context))
+
+
+def _normalize_input(code, data_source: Optional[dict]) -> tuple:
+    """Returns the stripped input text, the normalized code and the normalization flags of a code."""
     # Normalize code (remove spaces, convert to string)
-    code = str(code).strip()
+    text = str(code).strip()
+    
+    # Repair separators, float suffixes and lost leading zeros; plain even-length digits need no work
+    flags = 0
+    code = text
+    if not (text.isdigit() and len(text) % 2 == 0):
+        timer = metrics.timer()
+        code, flags = normalize_code(text, data_source["data"] if data_source else {})
+        timer.lap("normalize")
+    return text, code, flags
+
+
+def _validate_hsn_code(code, data_source: Optional[dict]) -> dict:
+    """Validates an HSN code against the given HSN data, using the result cache."""
+    text, code, flags = _normalize_input(code, data_source)
+    
+    # Results are cached per dataset for registry entries; the cache ignores other versions
+    cache = data_source.get("cache") if data_source is not None else None
+    version = data_source.get("version") if cache is not None else None
+    result = cache.get(code, version) if cache is not None else None
+    
+    if result is None:
+        result = _validate_hsn_code_uncached(code, data_source)
+        if cache is not None:
+            cache.put(code, result, version)
+    
+    metrics.record_result(result)
+    if flags:
+        result = dict(result, normalized_from=text, normalizations=normalization_names(flags))
+    return result
+
+
+def _validate_hsn_code_list(codes, data_source: Optional[dict], batch_threshold: int = 1) -> list:
+    """Validates codes one by one like _validate_hsn_code, but validates the cache misses together.
+    
+    Every code gets the result _validate_hsn_code gives it and goes through the
+    same result cache. The distinct codes missing from the cache are validated
+    in one batch engine call when there are at least batch_threshold of them.
+    """
+    cache = data_source.get("cache") if data_source is not None else None
+    version = data_source.get("version") if cache is not None else None
+    index = data_source.get("index") if data_source is not None else None
+    
+    inputs = [_normalize_input(code, data_source) for code in codes]
+    results = [cache.get(code, version) if cache is not None else None for _, code, _ in inputs]
+    missing = list(dict.fromkeys(code for (_, code, _), result in zip(inputs, results) if result is None))
+    
+    # Each distinct miss is validated once and recorded by the batch engine
+    validated = {}
+    if index is not None and missing and len(missing) >= batch_threshold:
+        validated = dict(zip(missing, columns_to_results(validate_hsn_columns(missing, index))))
+    else:
+        for code in missing:
+            validated[code] = _validate_hsn_code_uncached(code, data_source)
+            metrics.record_result(validated[code])
+    if cache is not None:
+        for code, result in validated.items():
+            cache.put(code, result, version)
+    
+    # Every code is recorded once; the first occurrence of a miss was recorded when validated
+    recorded = set(validated)
+    for position, (text, code, flags) in enumerate(inputs):
+        result = results[position]
+        if result is None:
+            result = dict(validated[code])
+        if code in recorded:
+            recorded.discard(code)
+        else:
+            metrics.record_result(result)
+        if flags:
+            result = dict(result, normalized_from=text, normalizations=normalization_names(flags))
+        results[position] = result
+    return results
+
+
+def _validate_hsn_code_uncached(code: str, data_source: Optional[dict]) -> dict:
+    """Validates a normalized HSN code without consulting the result cache."""
+    timer = metrics.timer()
     
     # Validate format
     format_result = validate_hsn_format(code)
     format_valid = format_result.get("format_valid", False)
+    timer.lap("format")
     
     # If format is invalid, return early
     if not format_valid:
@@ -259,12 +606,14 @@ def validate_hsn_code(code: str, tool_context: ToolContext = None) -> dict:
         }
     
     # Validate existence in database
-    existence_result = validate_hsn_existence(code, tool_context)
+    existence_result = _check_existence(code, data_source)
     exists_in_database = existence_result.get("exists_in_database", False)
+    timer.lap("existence")
     
     # Validate hierarchy
-    hierarchy_result = validate_hsn_hierarchy(code, tool_context)
+    hierarchy_result = _check_hierarchy(code, data_source)
     hierarchy_valid = hierarchy_result.get("hierarchy_valid", False)
+    timer.lap("hierarchy")
     
     # Combine results
     return {
@@ -282,7 +631,7 @@ def validate_hsn_code(code: str, tool_context: ToolContext = None) -> dict:
     }
 
 
-def validate_hsn_codes(codes: List[str], tool_context: ToolContext = None) -> dict:
+def validate_hsn_codes(codes: List[str], tool_context: "ToolContext" = None) -> dict:
     """Validates multiple HSN codes in batch.
     
     Args:
@@ -292,17 +641,73 @@ def validate_hsn_codes(codes: List[str], tool_context: ToolContext = None) -> di
     Returns:
         dict: Validation results for all codes with summary.
     """
-    if not codes:
+    return _validate_hsn_codes(codes, _get_hsn_data(tool_context))
+
+
+def result_db_enabled() -> bool:
+    """Returns True if batch results are stored in the result database (HSN_RESULT_DB)."""
+    return result_db is not None
+
+
+def _record_results(data_source: dict, codes, results: list) -> None:
+    """Stores batch results in the result database when they were computed against its revision."""
+    if result_db is None:
+        return
+    installed = _result_db_revisions.get(data_source["name"])
+    if installed is not None and installed[0] == data_source["version"]:
+        result_db.record(data_source["name"], installed[1], codes, results)
+
+
+def get_revalidation_report(dataset: str = DEFAULT_DATASET, limit: int = DEFAULT_REPORT_LIMIT) -> dict:
+    """Returns the change report of the latest master update of a dataset.
+    
+    Args:
+        dataset: Name of the dataset.
+        limit: Maximum number of changed codes to include.
+        
+    Returns:
+        dict: Master diff counts, re-validated and changed code counts and the changed codes.
+    """
+    if result_db is None:
+        return {
+            "status": "error",
+            "error_message": "The result database is disabled (set HSN_RESULT_DB)"
+        }
+    
+    report = result_db.report(dataset)
+    if report is None:
+        return {
+            "status": "error",
+            "error_message": f"No master of dataset '{dataset}' has been recorded"
+        }
+    return dict(summarize_report(report, limit), status="success", report_status=report["status"])
+
+
+def _validate_hsn_codes(codes, data_source: Optional[dict]) -> dict:
+    """Validates a batch of HSN codes against the given HSN data."""
+    if codes is None or len(codes) == 0:
         return {
             "status": "error",
             "error_message": "No HSN codes provided for validation"
         }
     
+    # Use the vectorized batch engine when the HSN index is available
+    if data_source and data_source.get("index") is not None:
+        columns = validate_hsn_columns(codes, data_source["index"])
+        results = columns_to_results(columns)
+        _record_results(data_source, codes, results)
+        return {
+            "status": "success",
+            "results": results,
+            "summary": summarize_columns(columns),
+            "master_version": data_source.get("version")
+        }
+    
     results = []
     valid_count = 0
     
     for code in codes:
-        result = validate_hsn_code(code, tool_context)
+        result = _validate_hsn_code(code, data_source)
         results.append(result)
         
         if result.get("valid", False):
@@ -319,52 +724,109 @@ def validate_hsn_codes(codes: List[str], tool_context: ToolContext = None) -> di
     }
 
 
-def process_hsn_validation_request(request: Dict, tool_context: ToolContext = None) -> dict:
+def _resolve_data_source(tool_context: "ToolContext", dataset_name: Optional[str]) -> tuple:
+    """Returns the selected HSN data, loading the default master if needed, or an error response."""
+    # Check if the selected HSN dataset is loaded
+    dataset = _selected_dataset(tool_context, dataset_name)
+    data_source = _get_hsn_data(tool_context, dataset_name)
+    
+    if not data_source:
+        if dataset != DEFAULT_DATASET:
+            return None, {
+                "status": "error",
+                "error_message": f"HSN dataset '{dataset}' is not loaded"
+            }
+        
+        # Try to load the default HSN data file
+        load_result = load_hsn_data("HSN_Master_Data.xlsx", tool_context)
+        if load_result["status"] == "error":
+            return None, {
+                "status": "error",
+                "error_message": "HSN database not loaded and default file not found"
+            }
+        data_source = _get_hsn_data(tool_context, dataset_name)
+    return data_source, None
+
+
+def _single_code_response(result: dict, data_source: dict) -> dict:
+    return {
+        "status": "success",
+        "results": [result],
+        "summary": {
+            "total": 1,
+            "valid": 1 if result.get("valid", False) else 0,
+            "invalid": 0 if result.get("valid", False) else 1
+        },
+        "master_version": data_source.get("version")
+    }
+
+
+def process_hsn_single_codes(codes: list, dataset: str = None, batch_threshold: int = 1) -> list:
+    """Validates several single-code requests against one dataset.
+    
+    Every code gets the response process_hsn_validation_request gives a
+    {"code": ...} request, with the same result cache and without recording
+    results in the result database; the codes missing from the cache are
+    validated together (see _validate_hsn_code_list).
+    
+    Args:
+        codes: The requested codes.
+        dataset: Name of the HSN dataset to validate against (the default dataset if omitted).
+        batch_threshold: Smallest number of cache misses validated in one batch engine call.
+        
+    Returns:
+        list: One response per code, in order.
+    """
+    data_source, error = _resolve_data_source(None, dataset)
+    if error is not None:
+        return [error] * len(codes)
+    return [
+        _single_code_response(result, data_source)
+        for result in _validate_hsn_code_list(codes, data_source, batch_threshold)
+    ]
+
+
+def process_hsn_validation_request(request: Dict, tool_context: "ToolContext" = None) -> dict:
     """Processes an HSN validation request, handling both single and batch validation.
     
+    Large batches requested by the agent are answered in compact form: summary
+    counts, invalid codes grouped by reason and valid codes as references, with
+    a result_id for fetching the full per-code results via get_validation_details.
+    
     Args:
         request: The validation request, containing either a single code or a list of codes.
+            An optional "mode" of "compact" or "full" overrides the automatic choice, and
+            an optional "dataset" names the HSN dataset to validate against.
         tool_context: Tool context for state management (optional).
         
     Returns:
         dict: Validation results.
     """
-    # Check if HSN data is loaded
-    global hsn_data
-    data_source = None
-    
-    if tool_context and "hsn_data" in tool_context.state:
-        data_source = tool_context.state["hsn_data"]
-    elif hsn_data:
-        data_source = hsn_data
-    
-    if not data_source:
-        # Try to load the default HSN data file
-        load_result = load_hsn_data("HSN_Master_Data.xlsx", tool_context)
-        if load_result["status"] == "error":
-            return {
-                "status": "error",
-                "error_message": "HSN database not loaded and default file not found"
-            }
+    data_source, error = _resolve_data_source(tool_context, request.get("dataset"))
+    if error is not None:
+        return error
     
     # Process single code validation
     if "code" in request:
         code = request["code"]
-        result = validate_hsn_code(code, tool_context)
-        return {
-            "status": "success",
-            "results": [result],
-            "summary": {
-                "total": 1,
-                "valid": 1 if result.get("valid", False) else 0,
-                "invalid": 0 if result.get("valid", False) else 1
-            }
-        }
+        return _single_code_response(_validate_hsn_code(code, data_source), data_source)
     
     # Process batch validation
     elif "codes" in request:
         codes = request["codes"]
-        return validate_hsn_codes(codes, tool_context)
+        result = _validate_hsn_codes(codes, data_source)
+        
+        # Agent calls get compact results for large batches unless full results are requested
+        mode = request.get("mode")
+        if mode is None:
+            mode = "compact" if tool_context is not None and len(codes) > COMPACT_THRESHOLD else "full"
+        if mode != "compact" or result["status"] != "success":
+            return result
+        
+        result_id = validation_results.put(result["results"], result.get("master_version"))
+        compact = compact_results(result["results"], result["summary"], result_id)
+        compact["master_version"] = result.get("master_version")
+        return compact
     
     else:
         return {
@@ -373,40 +835,399 @@ def process_hsn_validation_request(request: Dict, tool_context: ToolContext = No
         }
 
 
-# Define the HSN Validator Agent
-hsn_validator_agent = Agent(
-    name="hsn_validator_agent",
-    model=DEFAULT_MODEL,
-    description="An agent that validates Harmonized System Nomenclature (HSN) codes against a master database",
-    instruction="""
-    You are an HSN Code Validator Agent that helps users validate Harmonized System Nomenclature codes.
-    
-    You can:
-    1. Validate if an HSN code has the correct format (numeric and correct length)
-    2. Check if an HSN code exists in the master database
-    3. Verify the hierarchical validity of an HSN code
-    4. Process both single HSN codes and batches of codes
-    
-    When a user provides an HSN code or multiple codes:
-    - Use the process_hsn_validation_request tool to validate the code(s)
-    - Present the validation results in a clear, structured manner
-    - For invalid codes, explain what makes them invalid
-    - For valid codes, include their description from the master database
-    
-    If the HSN database needs to be loaded or refreshed, use the load_hsn_data tool.
-    
-    Always provide a summary for batch validations, showing the total count of valid and invalid codes.
-    """,
-    tools=[
-        load_hsn_data,
-        validate_hsn_format,
-        validate_hsn_existence,
-        validate_hsn_hierarchy,
-        validate_hsn_code,
-        validate_hsn_codes,
-        process_hsn_validation_request
+def get_validation_details(result_id: str, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE,
+                           status: str = "all", tool_context: "ToolContext" = None) -> dict:
+    """Fetches one page of the full per-code results of a compact batch validation.
+    
+    Args:
+        result_id: The result_id returned with a compact batch validation.
+        page: Page number, starting at 1.
+        page_size: Number of results per page.
+        status: Return "all", only "valid" or only "invalid" results.
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: The requested page of per-code results.
+    """
+    if status not in RESULT_STATUSES:
+        return {
+            "status": "error",
+            "error_message": f"Invalid status filter. Use one of: {', '.join(RESULT_STATUSES)}"
+        }
+    
+    entry = validation_results.get(result_id)
+    if entry is None:
+        return {
+            "status": "error",
+            "error_message": f"Validation results '{result_id}' not found or expired. Please validate the codes again."
+        }
+    
+    details = page_results(entry["results"], page, page_size, status)
+    details["result_id"] = result_id
+    details["master_version"] = entry["master_version"]
+    return details
+
+
+def list_hsn_datasets(tool_context: "ToolContext" = None) -> dict:
+    """Lists the loaded HSN master datasets and the one selected for this session.
+    
+    Args:
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: Name, version, size and source of every loaded dataset.
+    """
+    data_source = _get_hsn_data(tool_context)
+    return {
+        "status": "success",
+        "datasets": [dataset_registry.describe(name) for name in dataset_registry.names()],
+        "selected": _selected_dataset(tool_context),
+        "selected_version": data_source["version"] if data_source else None
+    }
+
+
+def select_hsn_dataset(dataset: str, tool_context: "ToolContext" = None) -> dict:
+    """Selects the HSN master dataset used for validations in this session.
+    
+    The session is pinned to the dataset's current version; selecting the
+    dataset again moves it to the latest version after a reload.
+    
+    Args:
+        dataset: Name of a loaded dataset, e.g. "gst" or "customs-2024".
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: The selected dataset and its version.
+    """
+    entry = dataset_registry.get(dataset)
+    if entry is None:
+        return {
+            "status": "error",
+            "error_message": f"HSN dataset '{dataset}' is not loaded. Loaded datasets: {', '.join(dataset_registry.names()) or 'none'}"
+        }
+    
+    if tool_context:
+        _pin_session(tool_context, entry)
+    
+    return {
+        "status": "success",
+        "message": f"Using HSN dataset '{dataset}' (version {entry['version']}, {entry['count']} codes)",
+        "dataset": dataset,
+        "master_version": entry["version"]
+    }
+
+
+def compare_hsn_masters(dataset: str = None, other_dataset: str = None, from_version: int = None,
+                        to_version: int = None, limit: int = DEFAULT_DIFF_LIMIT,
+                        tool_context: "ToolContext" = None) -> dict:
+    """Compares two HSN masters: two versions of one dataset, or two datasets.
+    
+    Without other_dataset, the version of the dataset loaded before the current
+    one is compared with the current version. Added, removed and re-described
+    codes, orphaned children (codes whose parent was removed and which now fail
+    hierarchy validation) and the changes per chapter are reported.
+    
+    Args:
+        dataset: Dataset to compare (the session's dataset if omitted).
+        other_dataset: Dataset to compare against, e.g. "gst-2024" (optional).
+        from_version: Version of the earlier master (optional).
+        to_version: Version of the later master (optional).
+        limit: Maximum number of codes listed per kind of change.
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: Change counts, example codes of each kind and the per-chapter impact.
+    """
+    name = _selected_dataset(tool_context, dataset)
+    if other_dataset:
+        old = dataset_registry.resolve(name, from_version)
+        new = dataset_registry.resolve(other_dataset, to_version)
+    else:
+        new = dataset_registry.resolve(name, to_version)
+        if from_version is None and new is not None:
+            earlier = [version for version in dataset_registry.versions(name) if version < new["version"]]
+            from_version = earlier[-1] if earlier else None
+        old = dataset_registry.resolve(name, from_version) if from_version is not None else None
+    
+    if new is None or (old is None and other_dataset):
+        missing = (other_dataset or name) if new is None else name
+        return {
+            "status": "error",
+            "error_message": f"HSN dataset '{missing}' is not loaded at the requested version"
+        }
+    if old is None and from_version is not None:
+        return {
+            "status": "error",
+            "error_message": f"Version {from_version} of HSN dataset '{name}' is not retained"
+        }
+    if old is None:
+        return {
+            "status": "error",
+            "error_message": f"No earlier version of HSN dataset '{name}' is retained; reload the master "
+                             f"or compare against another dataset"
+        }
+    
+    return dict(
+        diff_report(old["index"], new["index"], limit),
+        status="success",
+        old={"dataset": old["name"], "version": old["version"]},
+        new={"dataset": new["name"], "version": new["version"]}
+    )
+
+
+def _hierarchy_unavailable() -> dict:
+    return {
+        "status": "error",
+        "error_message": "HSN database not loaded. Please load HSN data first."
+    }
+
+
+def get_hsn_children(code: str, tool_context: "ToolContext" = None) -> dict:
+    """Lists the direct children of an HSN code (codes one level below it).
+    
+    Args:
+        code: The parent HSN code, e.g. "8517".
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: Child codes with their descriptions.
+    """
+    data_source = _get_hsn_data(tool_context)
+    if not data_source or data_source.get("index") is None:
+        return _hierarchy_unavailable()
+    
+    code = str(code).strip()
+    index = data_source["index"]
+    positions = index.hierarchy.children(code)
+    children = [
+        {"code": child, "description": index.descriptions[position]}
+        for child, position in zip(index.codes[positions].tolist(), positions.tolist())
     ]
-)
+    
+    return {
+        "status": "success",
+        "code": code,
+        "children": children,
+        "count": len(children)
+    }
+
+
+def count_hsn_leaves(code: str, tool_context: "ToolContext" = None) -> dict:
+    """Counts the leaf codes (codes without children) under an HSN code.
+    
+    Args:
+        code: The HSN code at the root of the subtree, e.g. chapter "85".
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: Leaf count and total number of codes in the subtree.
+    """
+    data_source = _get_hsn_data(tool_context)
+    if not data_source or data_source.get("index") is None:
+        return _hierarchy_unavailable()
+    
+    code = str(code).strip()
+    hierarchy = data_source["index"].hierarchy
+    
+    return {
+        "status": "success",
+        "code": code,
+        "leaf_count": hierarchy.leaf_count(code),
+        "subtree_size": hierarchy.subtree_size(code)
+    }
+
+
+def find_nearest_hsn_ancestor(code: str, tool_context: "ToolContext" = None) -> dict:
+    """Finds the deepest parent level of an HSN code that exists in the master database.
+    
+    Args:
+        code: The HSN code to look up.
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: The nearest existing ancestor and its description, if any.
+    """
+    data_source = _get_hsn_data(tool_context)
+    if not data_source or data_source.get("index") is None:
+        return _hierarchy_unavailable()
+    
+    code = str(code).strip()
+    index = data_source["index"]
+    ancestor = index.hierarchy.nearest_ancestor(code)
+    
+    if ancestor is None:
+        return {
+            "status": "error",
+            "code": code,
+            "exists_in_database": code in index,
+            "nearest_ancestor": None,
+            "error_message": "No parent level of this HSN code exists in database"
+        }
+    
+    return {
+        "status": "success",
+        "code": code,
+        "exists_in_database": code in index,
+        "nearest_ancestor": ancestor,
+        "description": index[ancestor]
+    }
+
+
+def suggest_hsn_codes(codes: List[str], limit: int = 5, tool_context: "ToolContext" = None) -> dict:
+    """Suggests the closest valid HSN codes for invalid or mistyped codes ("did you mean").
+    
+    Args:
+        codes: HSN codes to find corrections for (a single code or a list).
+        limit: Maximum number of suggestions per code.
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: Suggestions per code, each with code, description, edit distance and reason.
+    """
+    data_source = _get_hsn_data(tool_context)
+    if not data_source or data_source.get("index") is None:
+        return _hierarchy_unavailable()
+    
+    if isinstance(codes, str):
+        codes = [codes]
+    if not codes:
+        return {
+            "status": "error",
+            "error_message": "No HSN codes provided"
+        }
+    
+    index = data_source["index"]
+    suggestions = index.suggester.suggest_many(codes, max(int(limit), 1))
+    
+    return {
+        "status": "success",
+        "results": [
+            {
+                "code": code,
+                "exists_in_database": normalize_code(code, index)[0] in index,
+                "suggestions": code_suggestions
+            }
+            for code, code_suggestions in suggestions.items()
+        ],
+        "master_version": data_source.get("version")
+    }
+
+
+def search_hsn_codes(queries: List[str], limit: int = 10, tool_context: "ToolContext" = None) -> dict:
+    """Finds candidate HSN codes for product descriptions (reverse lookup), ranked by relevance.
+    
+    Args:
+        queries: Product descriptions to look up, e.g. "laptop computer" (a single query or a list).
+        limit: Maximum number of candidate codes per query.
+        tool_context: Tool context for state management (optional).
+        
+    Returns:
+        dict: Ranked matches per query, each with code, description and score.
+    """
+    data_source = _get_hsn_data(tool_context)
+    if not data_source or data_source.get("index") is None:
+        return _hierarchy_unavailable()
+    
+    if isinstance(queries, str):
+        queries = [queries]
+    queries = [str(query).strip() for query in queries if str(query).strip()]
+    if not queries:
+        return {
+            "status": "error",
+            "error_message": "No search query provided"
+        }
+    
+    return {
+        "status": "success",
+        "results": data_source["index"].search_index.search_many(queries, max(int(limit), 1)),
+        "master_version": data_source.get("version")
+    }
+
+
+# ADK agent, built on first use
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def _build_agent() -> "Agent":
+    # ToolContext must resolve in this module for ADK to read the tool annotations
+    global ToolContext
+    from google.adk.agents import Agent
+    from google.adk.tools.tool_context import ToolContext
+    
+    return Agent(
+        name="hsn_validator_agent",
+        model=DEFAULT_MODEL,
+        description="An agent that validates Harmonized System Nomenclature (HSN) codes against a master database",
+        instruction="""
+        You are an HSN Code Validator Agent that helps users validate Harmonized System Nomenclature codes.
+        
+        You can:
+        1. Validate if an HSN code has the correct format (numeric and correct length)
+        2. Check if an HSN code exists in the master database
+        3. Verify the hierarchical validity of an HSN code
+        4. Process both single HSN codes and batches of codes
+        5. Explore the HSN hierarchy: list the children of a code, count the leaf codes
+           under a chapter or heading, and find the nearest existing parent of a code
+        6. Suggest the closest valid codes for mistyped or unknown HSN codes
+        7. Find candidate HSN codes for a product description (e.g. "cotton t-shirt")
+           with the search_hsn_codes tool
+        8. Explain what changed between two master versions or datasets (added, removed and
+           re-described codes, codes orphaned by a removed parent) with compare_hsn_masters
+        
+        When a user provides an HSN code or multiple codes:
+        - Use the process_hsn_validation_request tool to validate the code(s)
+        - Large batches return a compact result (summary, invalid codes grouped by reason,
+          valid codes without descriptions); use get_validation_details with its result_id
+          when the user asks for per-code details
+        - Present the validation results in a clear, structured manner
+        - For invalid codes, explain what makes them invalid and use the suggest_hsn_codes
+          tool to offer the closest valid codes ("did you mean")
+        - For valid codes, include their description from the master database
+        
+        If the HSN database needs to be loaded or refreshed, use the load_hsn_data tool.
+        Several HSN datasets (e.g. tariff editions, customs and GST masters) can be loaded
+        side by side under different names; use list_hsn_datasets to see them and
+        select_hsn_dataset to switch the dataset used for this conversation.
+        
+        Always provide a summary for batch validations, showing the total count of valid and invalid codes.
+        """,
+        tools=[
+            load_hsn_data,
+            list_hsn_datasets,
+            select_hsn_dataset,
+            compare_hsn_masters,
+            validate_hsn_format,
+            validate_hsn_existence,
+            validate_hsn_hierarchy,
+            validate_hsn_code,
+            validate_hsn_codes,
+            process_hsn_validation_request,
+            get_validation_details,
+            get_hsn_children,
+            count_hsn_leaves,
+            find_nearest_hsn_ancestor,
+            suggest_hsn_codes,
+            search_hsn_codes
+        ]
+    )
+
+
+def get_agent() -> "Agent":
+    """Returns the HSN validator ADK agent, importing google.adk and building it on first use."""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = _build_agent()
+    return _agent
+
+
+def __getattr__(name: str):
+    # hsn_validator_agent and root_agent (the name ADK looks up) are built lazily
+    if name in ("hsn_validator_agent", "root_agent"):
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # For module-level execution
@@ -0,0 +1,434 @@
+"""
+HSN Validator API Handlers
+
+Framework-independent request handling shared by the Flask application (app.py)
+and the ASGI server (asgi.py), so both expose the same request/response contract.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from agent import (
+    attach_hsn_index,
+    compare_hsn_masters,
+    get_hsn_data_info,
+    get_hsn_index,
+    get_revalidation_report,
+    list_hsn_datasets,
+    load_hsn_data,
+    process_hsn_single_codes,
+    process_hsn_validation_request,
+    search_hsn_codes,
+    suggest_hsn_codes
+)
+from batch import validate_hsn_columns
+import metrics
+from coalesce import COALESCE_BATCH_THRESHOLD
+from columnar import COLUMNAR_FORMATS, columns_to_bytes
+from create_sample_data import create_sample_data
+from registry import DEFAULT_DATASET
+from resultdb import DEFAULT_REPORT_LIMIT
+from snapshot import SNAPSHOT_SUFFIX
+
+# Master data file loaded by the web servers
+MASTER_DATA_FILE = "HSN_Master_Data.xlsx"
+
+# Snapshot published by a loader process; workers attach to it instead of loading the Excel file
+SHARED_INDEX_PATH = os.environ.get("HSN_SHARED_INDEX")
+
+
+def _parse_datasets(spec: str) -> dict:
+    """Parses "name=path,name=path" into a dataset name to master file mapping"""
+    datasets = {}
+    for item in spec.split(','):
+        name, _, path = item.partition('=')
+        if name.strip() and path.strip():
+            datasets[name.strip()] = path.strip()
+    return datasets
+
+
+# Additional named datasets (Excel masters or published snapshots) served next to the default one
+EXTRA_DATASETS = _parse_datasets(os.environ.get("HSN_DATASETS", ""))
+
+# Serializes master data loads so concurrent requests never trigger duplicate loads
+_load_lock = threading.Lock()
+
+# Reload timings and swap events
+reload_metrics = {
+    "reloads": 0,
+    "failures": 0,
+    "in_progress": False,
+    "last_duration_seconds": None,
+    "total_duration_seconds": 0.0,
+    "last_error": None,
+    "swap_count": 0,
+    "swaps": deque(maxlen=20)
+}
+
+
+def _collect_reload_metrics() -> list:
+    """Reports master reload counts and durations next to the stage timings"""
+    last_duration = reload_metrics["last_duration_seconds"]
+    return [
+        ("hsn_master_reloads_total", "Master data loads and reloads", [({}, reload_metrics["reloads"])], "counter"),
+        ("hsn_master_reload_failures_total", "Master data loads and reloads that failed",
+         [({}, reload_metrics["failures"])], "counter"),
+        ("hsn_master_swaps_total", "New master versions swapped in by a load or reload",
+         [({}, reload_metrics["swap_count"])], "counter"),
+        ("hsn_master_reload_duration_seconds_total", "Time spent loading and reloading master data",
+         [({}, reload_metrics["total_duration_seconds"])], "counter"),
+        ("hsn_master_reload_last_duration_seconds", "Duration of the latest master data load or reload",
+         [({}, last_duration)] if last_duration is not None else []),
+        ("hsn_master_reload_in_progress", "Whether a master data reload is running",
+         [({}, 1 if reload_metrics["in_progress"] else 0)])
+    ]
+
+
+metrics.register_collector(_collect_reload_metrics)
+
+
+def load_master_data() -> dict:
+    """Loads (or attaches to) the HSN master data used by the web servers"""
+    # Attach to the shared index when one has been published
+    if SHARED_INDEX_PATH:
+        result = attach_hsn_index(SHARED_INDEX_PATH)
+        return load_extra_datasets() if result["status"] == "success" else result
+
+    # Create sample data if it doesn't exist
+    if not os.path.exists(MASTER_DATA_FILE):
+        create_sample_data(MASTER_DATA_FILE)
+
+    # Load HSN data
+    result = load_hsn_data(MASTER_DATA_FILE)
+    if result["status"] != "success":
+        return result
+
+    result = load_extra_datasets()
+    if result["status"] != "success":
+        return result
+    return {"status": "success", "message": "HSN data loaded successfully"}
+
+
+def load_extra_datasets() -> dict:
+    """Loads the additional named datasets configured in HSN_DATASETS"""
+    for name, path in EXTRA_DATASETS.items():
+        if path.endswith(SNAPSHOT_SUFFIX):
+            result = attach_hsn_index(path, dataset=name)
+        else:
+            result = load_hsn_data(path, dataset=name)
+
+        if result["status"] != "success":
+            return dict(result, dataset=name)
+    return {"status": "success", "message": f"Loaded {len(EXTRA_DATASETS)} additional HSN datasets"}
+
+
+def ensure_master_data() -> dict:
+    """Loads the master data once, even when called from concurrent requests"""
+    if get_hsn_data_info()["loaded"]:
+        return {"status": "success", "message": "HSN data already loaded"}
+
+    with _load_lock:
+        if get_hsn_data_info()["loaded"]:
+            return {"status": "success", "message": "HSN data already loaded"}
+        return _timed_load()
+
+
+def _timed_load() -> dict:
+    """Loads the master data while recording reload metrics (caller holds the load lock)"""
+    previous_version = get_hsn_data_info()["master_version"]
+    reload_metrics["in_progress"] = True
+    start = time.perf_counter()
+    try:
+        result = load_master_data()
+    except Exception as e:
+        result = {"status": "error", "error_message": f"Failed to load HSN master data: {str(e)}"}
+    finally:
+        reload_metrics["in_progress"] = False
+
+    duration = time.perf_counter() - start
+    reload_metrics["reloads"] += 1
+    reload_metrics["last_duration_seconds"] = duration
+    reload_metrics["total_duration_seconds"] += duration
+
+    if result["status"] != "success":
+        reload_metrics["failures"] += 1
+        reload_metrics["last_error"] = result.get("error_message")
+        return result
+
+    info = get_hsn_data_info()
+    reload_metrics["swap_count"] += 1
+    reload_metrics["swaps"].append({
+        "from_version": previous_version,
+        "to_version": info["master_version"],
+        "code_count": info["count"],
+        "duration_seconds": duration,
+        "swapped_at": info["load_time"]
+    })
+    return dict(result, master_version=info["master_version"])
+
+
+def reload_master_data(wait: bool = False) -> dict:
+    """Reloads the master data without interrupting validation
+
+    The new index is built in a background thread while requests keep being
+    served from the current one; it replaces the current index atomically once
+    it is complete.
+
+    Args:
+        wait: Block until the reload has finished and return its result.
+
+    Returns:
+        dict: Reload status and the master data version being served.
+    """
+    if wait:
+        with _load_lock:
+            return _timed_load()
+
+    if not _load_lock.acquire(blocking=False):
+        return {
+            "status": "success",
+            "message": "HSN data reload already in progress",
+            "master_version": get_hsn_data_info()["master_version"]
+        }
+
+    def run():
+        try:
+            _timed_load()
+        finally:
+            _load_lock.release()
+
+    threading.Thread(target=run, name="hsn-reload", daemon=True).start()
+    return {
+        "status": "success",
+        "message": "HSN data reload started",
+        "master_version": get_hsn_data_info()["master_version"]
+    }
+
+
+def get_datasets() -> dict:
+    """Returns the loaded HSN datasets and their versions"""
+    datasets = list_hsn_datasets()
+    return {"status": "success", "datasets": datasets["datasets"], "default": datasets["selected"]}
+
+
+def get_reload_metrics() -> dict:
+    """Returns reload latency and swap metrics together with the served version"""
+    metrics = dict(reload_metrics, swaps=list(reload_metrics["swaps"]))
+    metrics["master_version"] = get_hsn_data_info()["master_version"]
+    return metrics
+
+
+def get_metrics():
+    """Returns the metrics text exposition and its HTTP status (404 when metrics are disabled)"""
+    if not metrics.enabled():
+        return "# HSN metrics are disabled (HSN_METRICS=0)\n", 404
+    return metrics.render(), 200
+
+
+def revalidation_report(dataset: str = None, limit=None) -> dict:
+    """Returns the change report of the latest master update of a dataset (the default one if unset)"""
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_REPORT_LIMIT
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "limit must be an integer"}
+    return get_revalidation_report(dataset or DEFAULT_DATASET, limit)
+
+
+def master_diff(args) -> dict:
+    """Compares two master versions or datasets from /master_diff query parameters
+
+    Parameters: dataset, other_dataset, from_version, to_version and limit.
+    """
+    options = {}
+    for name in ('from_version', 'to_version', 'limit'):
+        value = args.get(name)
+        if value is None or value == '':
+            continue
+        try:
+            options[name] = int(value)
+        except (TypeError, ValueError):
+            return {"status": "error", "message": f"{name} must be an integer"}
+
+    return compare_hsn_masters(args.get('dataset') or None, args.get('other_dataset') or None, **options)
+
+
+def payload_size(data) -> int:
+    """Returns the number of codes in a validation payload"""
+    if not isinstance(data, dict):
+        return 0
+    if 'code' in data:
+        return 1
+    codes = data.get('codes')
+    if isinstance(codes, str):
+        return codes.count(',') + 1
+    return len(codes) if isinstance(codes, list) else 0
+
+
+def _payload_code(value) -> str:
+    """Returns the "code" of a single-code payload as a stripped string ("" for null)
+
+    JSON clients may send the code as a number, e.g. {"code": 85171290}.
+    """
+    return "" if value is None else str(value).strip()
+
+
+def validate_payload(data) -> dict:
+    """Validates the HSN codes in a /validate request payload
+
+    An optional "dataset" field selects the HSN dataset to validate against.
+    """
+    if not data:
+        return {"status": "error", "message": "No data provided"}
+
+    if not isinstance(data, dict):
+        return {"status": "error", "message": "Invalid request format"}
+
+    dataset = data.get('dataset')
+
+    # Process single code
+    if 'code' in data:
+        code = _payload_code(data['code'])
+        if not code:
+            return {"status": "error", "message": "HSN code is empty"}
+
+        return process_hsn_validation_request({"code": code, "dataset": dataset})
+
+    # Process multiple codes
+    elif 'codes' in data:
+        codes = data['codes']
+
+        # Handle comma-separated string
+        if isinstance(codes, str):
+            codes = [code.strip() for code in codes.split(',') if code.strip()]
+
+        if not codes:
+            return {"status": "error", "message": "No HSN codes provided"}
+
+        return process_hsn_validation_request({"codes": codes, "dataset": dataset, "mode": "full"})
+
+    return {"status": "error", "message": "Invalid request format"}
+
+
+def single_code_request(data):
+    """Returns the {"code", "dataset"} request of a single-code /validate payload
+
+    Returns None for other payloads, which validate_payload handles.
+    """
+    if not isinstance(data, dict) or 'code' not in data:
+        return None
+    code = _payload_code(data['code'])
+    if not code:
+        return None
+    return {"code": code, "dataset": data.get('dataset')}
+
+
+def validate_single_codes(requests: list) -> list:
+    """Validates coalesced single-code requests, one group per dataset
+
+    Every request gets the same response validate_payload gives it on its own,
+    through the same result cache; the distinct cache misses of a group are
+    validated together once there are COALESCE_BATCH_THRESHOLD of them.
+    """
+    responses = [None] * len(requests)
+    datasets = {}
+    for position, request in enumerate(requests):
+        datasets.setdefault(request["dataset"], []).append(position)
+
+    for dataset, positions in datasets.items():
+        codes = [requests[position]["code"] for position in positions]
+        for position, response in zip(positions, process_hsn_single_codes(codes, dataset, COALESCE_BATCH_THRESHOLD)):
+            responses[position] = response
+    return responses
+
+
+def validate_payload_columnar(data, output_format: str):
+    """Validates the HSN codes in a /validate payload and serializes the results as Arrow or Parquet
+
+    Returns:
+        tuple: The serialized results and their MIME type, or an error dict and None.
+    """
+    if output_format not in COLUMNAR_FORMATS:
+        return {"status": "error", "message": f"Unsupported output format: {output_format}"}, None
+
+    if not data:
+        return {"status": "error", "message": "No data provided"}, None
+
+    if not isinstance(data, dict) or ('code' not in data and 'codes' not in data):
+        return {"status": "error", "message": "Invalid request format"}, None
+
+    codes = _payload_codes(data)
+    if not codes:
+        return {"status": "error", "message": "No HSN codes provided"}, None
+
+    dataset = data.get('dataset')
+    index = get_hsn_index(dataset=dataset)
+    if index is None:
+        return {"status": "error", "message": f"HSN dataset '{dataset or 'default'}' is not loaded"}, None
+
+    columns = validate_hsn_columns(codes, index)
+    timer = metrics.timer()
+    body = columns_to_bytes(columns, output_format)
+    timer.lap("serialize")
+    return body, COLUMNAR_FORMATS[output_format]
+
+
+def _payload_codes(data) -> list:
+    """Returns the codes of a {"code": ...} or {"codes": [...] | "a,b"} payload"""
+    if 'code' in data:
+        code = _payload_code(data['code'])
+        return [code] if code else []
+
+    codes = data.get('codes') or []
+    if isinstance(codes, str):
+        codes = codes.split(',')
+    return [str(code).strip() for code in codes if str(code).strip()]
+
+
+def suggest_payload(data) -> dict:
+    """Suggests corrections for the HSN codes in a /suggest request payload"""
+    if not data:
+        return {"status": "error", "message": "No data provided"}
+
+    if not isinstance(data, dict) or ('code' not in data and 'codes' not in data):
+        return {"status": "error", "message": "Invalid request format"}
+
+    codes = _payload_codes(data)
+    if not codes:
+        return {"status": "error", "message": "No HSN codes provided"}
+
+    try:
+        limit = int(data.get('limit', 5))
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "limit must be an integer"}
+
+    return suggest_hsn_codes(codes, limit)
+
+
+def search_payload(data) -> dict:
+    """Looks up HSN codes for the descriptions in a /search request payload"""
+    if not data:
+        return {"status": "error", "message": "No data provided"}
+
+    if not isinstance(data, dict):
+        return {"status": "error", "message": "Invalid request format"}
+
+    if 'query' in data:
+        queries = [data['query']]
+    elif 'queries' in data:
+        queries = data['queries']
+    else:
+        return {"status": "error", "message": "Invalid request format"}
+
+    if isinstance(queries, str) or not isinstance(queries, list):
+        queries = [queries]
+    queries = [str(query).strip() for query in queries if query is not None and str(query).strip()]
+    if not queries:
+        return {"status": "error", "message": "No search query provided"}
+
+    try:
+        limit = int(data.get('limit', 10))
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "limit must be an integer"}
+
+    return search_hsn_codes(queries, limit)
@@ -4,38 +4,40 @@ HSN Validator Web Application
 This Flask application provides a web interface for the HSN Validator Agent.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import os
 import json
+import shutil
+import tempfile
 from agent import (
-    load_hsn_data,
-    validate_hsn_code,
-    validate_hsn_codes,
-    process_hsn_validation_request
+    count_hsn_leaves,
+    find_nearest_hsn_ancestor,
+    get_hsn_children,
+    get_hsn_index,
+    get_validation_cache_stats
 )
-from create_sample_data import create_sample_data
+from api import (
+    ensure_master_data,
+    get_datasets,
+    get_metrics,
+    get_reload_metrics,
+    master_diff,
+    reload_master_data,
+    revalidation_report,
+    search_payload,
+    suggest_payload,
+    validate_payload,
+    validate_payload_columnar
+)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, timer as stage_timer
+from stream import OUTPUT_FORMATS, DEFAULT_CHUNK_SIZE, detect_file_format, stream_validation
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Global data store
-hsn_data_loaded = False
-
 def ensure_data_loaded():
     """Ensure HSN data is loaded before processing requests"""
-    global hsn_data_loaded
-    
-    if not hsn_data_loaded:
-        # Create sample data if it doesn't exist
-        if not os.path.exists("HSN_Master_Data.xlsx"):
-            create_sample_data()
-        
-        # Load HSN data
-        load_hsn_data("HSN_Master_Data.xlsx")
-        hsn_data_loaded = True
-        return {"status": "success", "message": "HSN data loaded successfully"}
-    
-    return {"status": "success", "message": "HSN data already loaded"}
+    return ensure_master_data()
 
 
 @app.route('/')
@@ -47,60 +49,199 @@ def index():
 
 @app.route('/validate', methods=['POST'])
 def validate():
-    """API endpoint to validate HSN codes"""
+    """API endpoint to validate HSN codes
+    
+    Results are returned as JSON, or as an Arrow IPC stream or Parquet file
+    with ?format=arrow or ?format=parquet.
+    """
     ensure_data_loaded()
     
+    timer = stage_timer()
     data = request.get_json()
+    timer.lap("parse")
     
-    if not data:
-        return jsonify({"status": "error", "message": "No data provided"})
+    output_format = request.args.get('format', 'json')
+    if output_format != 'json':
+        body, mimetype = validate_payload_columnar(data, output_format)
+        if mimetype is None:
+            return jsonify(body)
+        return Response(body, mimetype=mimetype)
     
-    # Process single code
-    if 'code' in data:
-        code = data['code'].strip()
-        if not code:
-            return jsonify({"status": "error", "message": "HSN code is empty"})
-        
-        result = validate_hsn_code(code)
-        return jsonify({
-            "status": "success",
-            "results": [result],
-            "summary": {
-                "total": 1,
-                "valid": 1 if result.get("valid", False) else 0,
-                "invalid": 0 if result.get("valid", False) else 1
-            }
-        })
-    
-    # Process multiple codes
-    elif 'codes' in data:
-        codes = data['codes']
-        
-        # Handle comma-separated string
-        if isinstance(codes, str):
-            codes = [code.strip() for code in codes.split(',') if code.strip()]
+    result = validate_payload(data)
+    timer.reset()
+    response = jsonify(result)
+    timer.lap("serialize")
+    return response
+
+
+@app.route('/validate_file', methods=['POST'])
+def validate_file():
+    """API endpoint to validate the HSN column of an uploaded CSV/XLSX file
+    
+    Results are streamed back chunk by chunk as CSV or NDJSON.
+    """
+    load_result = ensure_data_loaded()
+    index = get_hsn_index()
+    if index is None:
+        if load_result["status"] == "success":
+            load_result = {"status": "error", "error_message": "HSN database not loaded"}
+        return jsonify(load_result)
+    
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"status": "error", "message": "No file uploaded"})
+    
+    column = request.values.get('column', 'HSNCode')
+    output_format = request.values.get('format', 'csv')
+    if output_format not in OUTPUT_FORMATS:
+        return jsonify({"status": "error", "message": f"Unsupported output format: {output_format}"})
+    
+    chunk_size = request.values.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int)
+    
+    # Spool the upload to disk so it outlives the request while results stream out
+    fd, upload_path = tempfile.mkstemp(suffix=os.path.splitext(upload.filename or "")[1])
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(upload.stream, f)
+    
+    results = stream_validation(
+        upload_path,
+        index,
+        column=column,
+        chunk_size=chunk_size,
+        file_format=detect_file_format(upload.filename),
+        output_format=output_format
+    )
+    
+    def remove_upload():
+        results.close()
+        os.remove(upload_path)
+    
+    # The upload is removed when the response closes, or here if no response streams it
+    streaming = False
+    try:
+        try:
+            # An upload without data rows yields no NDJSON output at all
+            first_piece = next(results, "")
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)})
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Failed to read the uploaded file: {str(e)}"})
         
-        if not codes:
-            return jsonify({"status": "error", "message": "No HSN codes provided"})
+        def generate():
+            yield first_piece
+            yield from results
         
-        results = validate_hsn_codes(codes)
-        return jsonify(results)
+        response = Response(generate(), mimetype=OUTPUT_FORMATS[output_format])
+        response.call_on_close(remove_upload)
+        streaming = True
+        return response
+    finally:
+        if not streaming:
+            remove_upload()
+
+
+@app.route('/suggest', methods=['POST'])
+def suggest():
+    """API endpoint to suggest the closest valid codes for invalid HSN codes"""
+    ensure_data_loaded()
     
-    return jsonify({"status": "error", "message": "Invalid request format"})
+    data = request.get_json()
+    
+    return jsonify(suggest_payload(data))
 
 
-@app.route('/reload_data', methods=['POST'])
-def reload_data():
-    """API endpoint to reload HSN data"""
-    global hsn_data_loaded
+@app.route('/search', methods=['GET', 'POST'])
+def search():
+    """API endpoint to find HSN codes for product descriptions
+    
+    Accepts ?q=<description>&limit=N, or a JSON body with "query" or "queries".
+    """
+    ensure_data_loaded()
+    
+    if request.method == 'GET':
+        data = {"query": request.args.get('q', ''), "limit": request.args.get('limit', 10)}
+    else:
+        data = request.get_json()
     
-    # Reset the data loaded flag
-    hsn_data_loaded = False
+    return jsonify(search_payload(data))
+
+
+@app.route('/children/<code>')
+def children(code):
+    """API endpoint to list the direct children of an HSN code"""
+    ensure_data_loaded()
+    return jsonify(get_hsn_children(code))
+
+
+@app.route('/leaf_count/<code>')
+def leaf_count(code):
+    """API endpoint to count the leaf codes under an HSN code"""
+    ensure_data_loaded()
+    return jsonify(count_hsn_leaves(code))
+
+
+@app.route('/nearest_ancestor/<code>')
+def nearest_ancestor(code):
+    """API endpoint to find the nearest existing parent of an HSN code"""
+    ensure_data_loaded()
+    return jsonify(find_nearest_hsn_ancestor(code))
+
+
+@app.route('/datasets')
+def datasets():
+    """API endpoint to list the loaded HSN datasets and their versions"""
+    ensure_data_loaded()
+    return jsonify(get_datasets())
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    """API endpoint to report validation result cache statistics"""
+    return jsonify(get_validation_cache_stats())
+
+
+@app.route('/master_diff')
+def master_diff_endpoint():
+    """API endpoint to compare two versions of a dataset, or two datasets
     
-    # Reload the data
-    result = ensure_data_loaded()
+    Query parameters: dataset, other_dataset, from_version, to_version, limit.
+    Without other_dataset the previous version of the dataset is compared with
+    the current one.
+    """
+    ensure_data_loaded()
+    return jsonify(master_diff(request.args))
+
+
+@app.route('/revalidation_report')
+def revalidation_report_endpoint():
+    """API endpoint to report the stored results changed by the latest master update"""
+    ensure_data_loaded()
+    return jsonify(revalidation_report(request.args.get('dataset'), request.args.get('limit')))
+
+
+@app.route('/metrics')
+def metrics():
+    """API endpoint exposing stage timings, failure counts, cache and master metrics for Prometheus"""
+    body, status = get_metrics()
+    return Response(body, status=status, content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route('/reload_data', methods=['POST'])
+def reload_data():
+    """API endpoint to reload HSN data
     
-    return jsonify(result)
+    The new master data is loaded in the background and swapped in atomically;
+    requests are served from the current data until then. Pass ?wait=true to
+    block until the reload has finished.
+    """
+    wait = request.args.get('wait', 'false').lower() in ('1', 'true', 'yes')
+    return jsonify(reload_master_data(wait=wait))
+
+
+@app.route('/reload_status')
+def reload_status():
+    """API endpoint to report reload latency and swap events"""
+    return jsonify(get_reload_metrics())
 
 
 if __name__ == '__main__':
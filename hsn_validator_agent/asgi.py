@@ -0,0 +1,222 @@
+"""
+HSN Validator ASGI Server
+
+This module serves the same /validate and /reload_data API as the Flask
+application on an asyncio event loop. Large batches and master data reloads
+run off the event loop, so it keeps answering small validation requests
+while they are in progress; with HSN_RESULT_DB set every batch runs off the
+loop, as storing its results writes to SQLite. With HSN_COALESCE_WINDOW_MS set, concurrent
+single-code requests are validated together in micro-batches (see coalesce.py).
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from agent import get_hsn_index, result_db_enabled
+from coalesce import COALESCE_MAX_BATCH, COALESCE_WINDOW_MS, MicroBatcher
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, register_collector, timer as stage_timer
+from api import (
+    ensure_master_data,
+    get_datasets,
+    get_metrics,
+    get_reload_metrics,
+    master_diff,
+    payload_size,
+    reload_master_data,
+    revalidation_report,
+    search_payload,
+    single_code_request,
+    suggest_payload,
+    validate_payload,
+    validate_payload_columnar,
+    validate_single_codes
+)
+
+# Batches with more codes than this are validated off the event loop
+OFFLOAD_THRESHOLD = int(os.environ.get("HSN_ASGI_OFFLOAD_THRESHOLD", "256"))
+
+# Thread pool for large batches and master data reloads
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("HSN_ASGI_THREADS", os.cpu_count() or 4)),
+    thread_name_prefix="hsn-validate"
+)
+
+# Coalesces concurrent single-code requests; batches are validated on the event
+# loop, so they are capped at the size validated inline
+single_code_batcher = MicroBatcher(
+    validate_single_codes,
+    window_ms=COALESCE_WINDOW_MS,
+    max_batch=min(COALESCE_MAX_BATCH, OFFLOAD_THRESHOLD)
+) if COALESCE_WINDOW_MS > 0 else None
+
+
+def _collect_coalescing_metrics() -> list:
+    if single_code_batcher is None:
+        return []
+    stats = single_code_batcher.stats()
+    return [
+        ("hsn_coalesced_requests_total", "Single-code requests validated in coalesced batches",
+         [({}, stats["requests"])], "counter"),
+        ("hsn_coalesced_batches_total", "Batches of coalesced single-code requests", [({}, stats["batches"])], "counter")
+    ]
+
+
+register_collector(_collect_coalescing_metrics)
+
+
+async def _run_in_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, func, *args)
+
+
+async def ensure_data_loaded() -> dict:
+    """Ensure HSN data is loaded without blocking the event loop"""
+    if get_hsn_index() is not None:
+        return {"status": "success", "message": "HSN data already loaded"}
+    return await _run_in_executor(ensure_master_data)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_data_loaded()
+    yield
+    executor.shutdown(wait=False)
+
+
+app = FastAPI(title="HSN Code Validator", lifespan=lifespan)
+
+
+@app.post("/validate")
+async def validate(request: Request, format: str = "json"):
+    """API endpoint to validate HSN codes
+
+    Results are returned as JSON, or as an Arrow IPC stream or Parquet file
+    with ?format=arrow or ?format=parquet.
+    """
+    await ensure_data_loaded()
+
+    timer = stage_timer()
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    timer.lap("parse")
+
+    if format != "json":
+        body, media_type = await _run_in_executor(validate_payload_columnar, data, format)
+        if media_type is None:
+            return JSONResponse(body)
+        return Response(body, media_type=media_type)
+
+    single = single_code_request(data) if single_code_batcher is not None else None
+    if single is not None:
+        result = await single_code_batcher.process(single)
+    elif payload_size(data) > OFFLOAD_THRESHOLD or result_db_enabled():
+        # Storing results in the result database is a blocking SQLite write
+        result = await _run_in_executor(validate_payload, data)
+    else:
+        result = validate_payload(data)
+    timer.reset()
+    response = JSONResponse(result)
+    timer.lap("serialize")
+    return response
+
+
+@app.post("/suggest")
+async def suggest(request: Request):
+    """API endpoint to suggest the closest valid codes for invalid HSN codes"""
+    await ensure_data_loaded()
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    if payload_size(data) > OFFLOAD_THRESHOLD:
+        return JSONResponse(await _run_in_executor(suggest_payload, data))
+    return JSONResponse(suggest_payload(data))
+
+
+@app.get("/search")
+async def search_get(q: str = "", limit: int = 10):
+    """API endpoint to find HSN codes for a product description"""
+    await ensure_data_loaded()
+    return JSONResponse(search_payload({"query": q, "limit": limit}))
+
+
+@app.post("/search")
+async def search(request: Request):
+    """API endpoint to find HSN codes for one or more product descriptions"""
+    await ensure_data_loaded()
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    queries = data.get("queries") if isinstance(data, dict) else None
+    if isinstance(queries, list) and len(queries) > OFFLOAD_THRESHOLD:
+        return JSONResponse(await _run_in_executor(search_payload, data))
+    return JSONResponse(search_payload(data))
+
+
+@app.post("/reload_data")
+async def reload_data(wait: bool = False):
+    """API endpoint to reload HSN data
+
+    The new master data is loaded in a background thread and swapped in
+    atomically; requests are served from the current data until then.
+    """
+    if wait:
+        return JSONResponse(await _run_in_executor(reload_master_data, True))
+    return JSONResponse(reload_master_data())
+
+
+@app.get("/datasets")
+async def datasets():
+    """API endpoint to list the loaded HSN datasets and their versions"""
+    await ensure_data_loaded()
+    return JSONResponse(get_datasets())
+
+
+@app.get("/reload_status")
+async def reload_status():
+    """API endpoint to report reload latency and swap events"""
+    return JSONResponse(get_reload_metrics())
+
+
+@app.get("/master_diff")
+async def master_diff_endpoint(request: Request):
+    """API endpoint to compare two versions of a dataset, or two datasets
+
+    Query parameters: dataset, other_dataset, from_version, to_version, limit.
+    """
+    await ensure_data_loaded()
+    return JSONResponse(await _run_in_executor(master_diff, request.query_params))
+
+
+@app.get("/revalidation_report")
+async def revalidation_report_endpoint(dataset: str = None, limit: int = None):
+    """API endpoint to report the stored results changed by the latest master update"""
+    await ensure_data_loaded()
+    return JSONResponse(revalidation_report(dataset, limit))
+
+
+@app.get("/metrics")
+async def metrics():
+    """API endpoint exposing stage timings, failure counts, cache and master metrics for Prometheus"""
+    body, status = get_metrics()
+    return Response(body, status_code=status, headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
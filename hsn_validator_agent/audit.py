@@ -0,0 +1,179 @@
+"""
+HSN Master Audit
+
+This module checks the rows of an HSN master before they are collapsed into
+the ``code -> description`` index, where duplicate codes would silently keep
+only their last description. A single vectorized pass over the normalized
+codes reports:
+
+    duplicate_codes        - codes listed on more than one row
+    conflicting_duplicates - duplicate codes whose rows disagree on the description
+    format_errors          - rows whose code fails the HSN format check (empty,
+                             non-digit or not 2, 4, 6 or 8 digits)
+    hierarchy_gaps         - codes whose 2, 4 or 6-digit parent is not in the master
+    empty_descriptions     - rows without a description
+    padded_codes           - rows whose 1, 3, 5 or 7-digit code was zero-padded on
+                             load (a leading zero lost by numeric storage)
+
+A master is clean when it has none of these problems; duplicates that repeat
+the same description and padded codes are reported but do not make a master
+unclean, since padding repairs codes stored as numbers (e.g. 101 for 0101).
+"""
+
+import numpy as np
+
+try:
+    from .batch import PARENT_LEVELS, VALID_LENGTHS
+    from .encoding import decode_keys, encode_codes, key_lengths, parent_keys
+    from .normalize import ZERO_PADDED, normalization_names
+except ImportError:
+    from batch import PARENT_LEVELS, VALID_LENGTHS
+    from encoding import decode_keys, encode_codes, key_lengths, parent_keys
+    from normalize import ZERO_PADDED, normalization_names
+
+# Problems reported by the audit
+AUDIT_CHECKS = (
+    "duplicate_codes", "conflicting_duplicates", "format_errors", "hierarchy_gaps", "empty_descriptions",
+    "padded_codes"
+)
+
+# Problems that make a master unclean (and refused in strict mode)
+BLOCKING_CHECKS = ("conflicting_duplicates", "format_errors", "hierarchy_gaps", "empty_descriptions")
+
+# Examples listed per problem
+DEFAULT_AUDIT_LIMIT = 20
+
+
+def _format_reason(code: str) -> str:
+    if not code:
+        return "empty"
+    if not (code.isascii() and code.isdigit()):
+        return "non_digit"
+    return "bad_length"
+
+
+def _member(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+
+def _missing_parents(master_keys: np.ndarray, code: str) -> list:
+    parents = np.array([code[:level] for level in PARENT_LEVELS if level < len(code)], dtype=str)
+    keys, _ = encode_codes(parents)
+    return parents[~_member(master_keys, keys)].tolist()
+
+
+def _duplicates(values: np.ndarray, rows: np.ndarray, descriptions: np.ndarray):
+    """Finds repeated values among some rows.
+
+    Returns:
+        tuple: The duplicated values, the values among them whose rows disagree
+        on the description, and the rows of the distinct values (first occurrence).
+    """
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    repeats = ordered[1:] == ordered[:-1]
+
+    # Adjacent rows of the same code are compared; any difference is a conflict
+    earlier = rows[order[:-1][repeats]]
+    later = rows[order[1:][repeats]]
+    differs = descriptions[earlier] != descriptions[later]
+
+    first = np.ones(len(ordered), dtype=bool)
+    first[1:] = ~repeats
+    duplicated = np.unique(ordered[1:][repeats])
+    conflicting = np.unique(ordered[1:][repeats][differs])
+    return duplicated, conflicting, rows[order[first]]
+
+
+def audit_master(codes: np.ndarray, descriptions, limit: int = DEFAULT_AUDIT_LIMIT, flags=None) -> dict:
+    """Audits the rows of an HSN master.
+
+    Args:
+        codes: Unicode array of the normalized code of every row.
+        descriptions: Description string of every row.
+        limit: Maximum number of examples listed per problem.
+        flags: Normalization flags of every row (from ``normalize_codes``); padded
+            codes are only reported when they are given.
+
+    Returns:
+        dict: Row and code counts, whether the master is ``clean``, the number
+        of occurrences of each problem and up to ``limit`` examples of each.
+    """
+    empty = np.fromiter(map(len, map(str.strip, descriptions)), dtype=np.int64, count=len(descriptions)) == 0
+    descriptions = np.asarray(descriptions, dtype=object)
+    rows = np.arange(len(codes))
+    keys, encodable = encode_codes(codes)
+    lengths = np.char.str_len(codes) if len(codes) else np.zeros(0, dtype=int)
+    format_valid = encodable & np.isin(lengths, VALID_LENGTHS)
+
+    # Duplicates, grouped by packed key for digit codes and by string for the rest
+    duplicated, conflicting, distinct_rows = _duplicates(keys[encodable], rows[encodable], descriptions)
+    other_duplicated, other_conflicting, other_rows = _duplicates(codes[~encodable], rows[~encodable], descriptions)
+    duplicate_codes = sorted(decode_keys(duplicated).tolist() + other_duplicated.tolist())
+    conflicting_codes = sorted(decode_keys(conflicting).tolist() + other_conflicting.tolist())
+
+    # Hierarchy gaps among the distinct codes that pass the format check
+    distinct = np.sort(np.concatenate([distinct_rows, other_rows]))
+    master_keys = np.sort(keys[distinct_rows])
+    checked = distinct[format_valid[distinct]]
+    checked_keys = keys[checked]
+    checked_lengths = key_lengths(checked_keys)
+    gaps = np.zeros(len(checked), dtype=bool)
+    for level in PARENT_LEVELS:
+        gaps |= (checked_lengths > level) & ~_member(master_keys, parent_keys(checked_keys, level))
+    gap_codes = codes[checked[gaps]]
+
+    format_rows = np.flatnonzero(~format_valid)
+    empty_rows = np.flatnonzero(empty)
+    flags = np.zeros(len(codes), dtype=np.uint8) if flags is None else np.asarray(flags)
+    padded_rows = np.flatnonzero(flags & ZERO_PADDED)
+
+    counts = {
+        "duplicate_codes": len(duplicate_codes),
+        "conflicting_duplicates": len(conflicting_codes),
+        "format_errors": len(format_rows),
+        "hierarchy_gaps": len(gap_codes),
+        "empty_descriptions": len(empty_rows),
+        "padded_codes": len(padded_rows)
+    }
+
+    # Distinct descriptions of the listed conflicts, in row order
+    conflict_descriptions = {}
+    if conflicting_codes:
+        for row in np.flatnonzero(np.isin(codes, conflicting_codes[:limit])).tolist():
+            conflict_descriptions.setdefault(str(codes[row]), {}).setdefault(str(descriptions[row]), None)
+
+    return {
+        "rows": len(codes),
+        "codes": len(distinct),
+        "clean": not any(counts[check] for check in BLOCKING_CHECKS),
+        "counts": counts,
+        "examples": {
+            "duplicate_codes": duplicate_codes[:limit],
+            "conflicting_duplicates": [
+                {"code": code, "descriptions": list(conflict_descriptions[code])}
+                for code in conflicting_codes[:limit]
+            ],
+            "format_errors": [
+                {"row": row + 1, "code": str(codes[row]), "reason": _format_reason(str(codes[row]))}
+                for row in format_rows[:limit].tolist()
+            ],
+            "hierarchy_gaps": [
+                {"code": code, "missing_parents": _missing_parents(master_keys, code)}
+                for code in gap_codes[:limit].tolist()
+            ],
+            "empty_descriptions": [{"row": row + 1, "code": str(codes[row])} for row in empty_rows[:limit].tolist()],
+            "padded_codes": [
+                {"row": row + 1, "code": str(codes[row]), "normalizations": normalization_names(int(flags[row]))}
+                for row in padded_rows[:limit].tolist()
+            ]
+        }
+    }
+
+
+def audit_summary(audit: dict) -> dict:
+    """Returns an audit without its examples."""
+    return {key: value for key, value in audit.items() if key != "examples"}
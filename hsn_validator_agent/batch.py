@@ -0,0 +1,221 @@
+"""
+Vectorized HSN Batch Validation
+
+This module validates whole columns of HSN codes in one pass using NumPy array
+operations. Format, existence and hierarchy results are computed as columnar
+arrays and can be materialized into the same per-code result dicts returned by
+``validate_hsn_code``.
+"""
+
+import numpy as np
+
+try:
+    from .encoding import decode_keys, encode_codes, parent_keys
+    from .index import HSNIndex
+    from .normalize import normalization_labels, normalize_codes
+    from . import metrics
+except ImportError:
+    from encoding import decode_keys, encode_codes, parent_keys
+    from index import HSNIndex
+    from normalize import normalization_labels, normalize_codes
+    import metrics
+
+# Valid HSN code lengths (2, 4, 6 or 8 digits)
+VALID_LENGTHS = [2, 4, 6, 8]
+
+# Parent levels checked for the hierarchy of a code
+PARENT_LEVELS = [2, 4, 6]
+
+
+def normalize_code_array(codes) -> np.ndarray:
+    """Converts a column of codes into a stripped unicode array.
+
+    Equivalent to applying ``str(code).strip()`` to every element.
+
+    Args:
+        codes: List, pandas Series or NumPy array of HSN codes.
+
+    Returns:
+        np.ndarray: Unicode array of normalized codes.
+    """
+    if isinstance(codes, np.ndarray):
+        values = codes
+    else:
+        # Element by element, so a mixed int/float list is not coerced to floats
+        values = np.asarray(codes, dtype=object)
+    if values.dtype.kind != "U":
+        values = values.astype(str)
+    return np.char.strip(values.ravel())
+
+
+def validate_hsn_columns(codes, index: HSNIndex) -> dict:
+    """Validates a column of HSN codes against the index in a single vectorized pass.
+
+    Duplicate codes are validated once and the results shared by every occurrence.
+
+    Args:
+        codes: List, pandas Series or NumPy array of HSN codes.
+        index: HSN index of the loaded master data.
+
+    Returns:
+        dict: Columnar validation results, one array per result field.
+    """
+    timer = metrics.timer()
+    codes = normalize_code_array(codes)
+
+    # Validate each distinct code once and expand the results back to every row;
+    # codes that pack into integer keys are deduplicated on the keys, which is
+    # much cheaper than sorting strings
+    keys, encodable = encode_codes(codes)
+    packed_keys, packed_inverse = np.unique(keys[encodable], return_inverse=True)
+    other_codes, other_inverse = np.unique(codes[~encodable], return_inverse=True)
+    unique_codes = np.concatenate([decode_keys(packed_keys), other_codes])
+    inverse = np.empty(len(codes), dtype=np.intp)
+    inverse[encodable] = packed_inverse
+    inverse[~encodable] = other_inverse + len(packed_keys)
+    if len(unique_codes) < len(codes):
+        columns = _validate_code_array(unique_codes, index, timer)
+        columns = {field: values[inverse] for field, values in columns.items()}
+    else:
+        columns = _validate_code_array(codes, index, timer)
+
+    metrics.record_columns(columns)
+    return columns
+
+
+def _validate_code_array(codes: np.ndarray, index: HSNIndex, timer) -> dict:
+    count = len(codes)
+    original = codes
+    codes, flags = normalize_codes(codes, index)
+    timer.lap("normalize")
+    lengths = np.char.str_len(codes)
+
+    # Format validation: empty, non-digit and length checks in order of precedence
+    is_empty = lengths == 0
+    is_digit = np.char.isdigit(codes)
+    length_ok = np.isin(lengths, VALID_LENGTHS)
+    format_valid = is_digit & length_ok
+
+    format_error = np.full(count, "", dtype=object)
+    bad_length = is_digit & ~length_ok
+    format_error[bad_length] = np.char.add(
+        f"HSN code length must be one of {VALID_LENGTHS}, found ",
+        lengths[bad_length].astype(str)
+    )
+    format_error[~is_digit] = "HSN code must contain only digits"
+    format_error[is_empty] = "HSN code is empty"
+    timer.lap("format")
+
+    # Existence validation on packed integer keys (see ``encoding``)
+    keys, encodable = encode_codes(codes)
+    found, positions = index.lookup_keys(keys, encodable)
+    exists = format_valid & found
+
+    description = np.full(count, "", dtype=object)
+    if exists.any():
+        description[exists] = index.descriptions.take(positions[exists])
+    timer.lap("existence")
+
+    # Hierarchy validation: look up every parent level at once
+    missing_text = np.full(count, "", dtype=object)
+    hierarchy_valid = format_valid.copy()
+    for level in PARENT_LEVELS:
+        needs_parent = format_valid & (lengths > level)
+        if not needs_parent.any():
+            continue
+        parent_found, _ = index.lookup_keys(parent_keys(keys, level), encodable)
+        missing = needs_parent & ~parent_found
+        if not missing.any():
+            continue
+        hierarchy_valid &= ~missing
+        separator = np.where(missing & (missing_text != ""), ", ", "")
+        parents = codes[missing].astype(f"U{level}").astype(object)
+        missing_text[missing] = missing_text[missing] + separator[missing] + parents
+    timer.lap("hierarchy")
+
+    error = np.full(count, None, dtype=object)
+    error[format_valid & ~exists] = "HSN code not found in database"
+    hierarchy_invalid = format_valid & ~hierarchy_valid
+    error[hierarchy_invalid] = "Missing parent codes in hierarchy: " + missing_text[hierarchy_invalid]
+    error[~format_valid] = format_error[~format_valid]
+
+    return {
+        "code": codes,
+        "valid": format_valid & exists & hierarchy_valid,
+        "format_valid": format_valid,
+        "exists_in_database": exists,
+        "hierarchy_valid": hierarchy_valid,
+        "description": description,
+        "error": error,
+        "normalized_from": np.where(flags != 0, original.astype(object), None),
+        "normalizations": normalization_labels(flags)
+    }
+
+
+def columns_to_results(columns: dict) -> list:
+    """Materializes columnar results into per-code result dicts.
+
+    The dicts are identical to those returned by ``validate_hsn_code``; codes
+    that were normalized also carry ``normalized_from`` and ``normalizations``.
+
+    Args:
+        columns: Columnar results from ``validate_hsn_columns``.
+
+    Returns:
+        list: One result dict per code.
+    """
+    results = []
+    rows = zip(
+        columns["code"].tolist(),
+        columns["valid"].tolist(),
+        columns["format_valid"].tolist(),
+        columns["exists_in_database"].tolist(),
+        columns["hierarchy_valid"].tolist(),
+        columns["description"].tolist(),
+        columns["error"].tolist()
+    )
+    for code, valid, format_valid, exists, hierarchy_valid, description, error in rows:
+        if not format_valid:
+            results.append({
+                "code": code,
+                "valid": False,
+                "format_valid": False,
+                "exists_in_database": False,
+                "hierarchy_valid": False,
+                "error": error
+            })
+            continue
+
+        results.append({
+            "code": code,
+            "valid": valid,
+            "format_valid": True,
+            "exists_in_database": exists,
+            "hierarchy_valid": hierarchy_valid,
+            "description": description,
+            "error": error
+        })
+
+    # Report normalizations only for the codes that were rewritten
+    for position in np.flatnonzero(columns["normalizations"] != "").tolist():
+        results[position]["normalized_from"] = columns["normalized_from"][position]
+        results[position]["normalizations"] = columns["normalizations"][position].split(",")
+    return results
+
+
+def summarize_columns(columns: dict) -> dict:
+    """Computes summary counts for columnar results.
+
+    Args:
+        columns: Columnar results from ``validate_hsn_columns``.
+
+    Returns:
+        dict: Total, valid and invalid counts.
+    """
+    total = len(columns["code"])
+    valid_count = int(np.count_nonzero(columns["valid"]))
+    return {
+        "total": total,
+        "valid": valid_count,
+        "invalid": total - valid_count
+    }
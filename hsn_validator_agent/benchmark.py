@@ -0,0 +1,339 @@
+"""
+Benchmark suite for the HSN Validator.
+
+Measures master data loading, single-code validation, batch validation, the
+Flask /validate endpoint and coalesced single-code requests against synthetic
+masters and skewed invoice workloads, and reports throughput, p50/p99 latency
+and peak memory as JSON so results can be compared across versions. The cold
+import time of the core validator is checked against a budget
+(``HSN_IMPORT_BUDGET_S``).
+
+Usage:
+    python benchmark.py --sizes 20000 100000 1000000 --rows 1000000 -o results.json
+    python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import agent
+from create_sample_data import generate_invoice_codes, generate_large_hsn_data
+from snapshot import write_snapshot
+
+# Largest master written to Excel for the load benchmark (openpyxl gets slow beyond this)
+EXCEL_SIZE_LIMIT = 50000
+
+# Cold import time allowed for the core validator, in seconds
+IMPORT_BUDGET_S = float(os.environ.get("HSN_IMPORT_BUDGET_S", "0.5"))
+
+# Dependencies that importing the core validator must not pull in
+HEAVY_MODULES = ["pandas", "google.adk"]
+
+# Single-code requests in flight and batching window for the coalescing benchmark
+CONCURRENT_REQUESTS = 256
+COALESCE_BENCH_WINDOW_MS = 2.0
+
+# Timed in a fresh interpreter: importing the validator, then building the ADK agent
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import agent
+imported = time.perf_counter()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+agent.get_agent()
+built = time.perf_counter()
+print(json.dumps({{"import_s": imported - start, "agent_build_s": built - imported, "heavy_modules": heavy}}))
+"""
+
+
+def _percentiles(samples: list) -> dict:
+    values = np.asarray(samples) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean())
+    }
+
+
+def _measure(func, repeat: int) -> dict:
+    """Runs func repeatedly for latencies, then once more under tracemalloc for peak memory."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dict(_percentiles(timings), peak_memory_mb=peak / 1e6, runs=repeat)
+
+
+def bench_load(entries: list, workdir: str, repeat: int) -> dict:
+    """Benchmarks loading the master from Excel (cold) and from its snapshot (warm)."""
+    import pandas as pd
+
+    excel_path = os.path.join(workdir, f"master_{len(entries)}.xlsx")
+    pd.DataFrame(entries).to_excel(excel_path, index=False)
+
+    start = time.perf_counter()
+    agent.load_hsn_data(excel_path)
+    cold = time.perf_counter() - start
+
+    warm = _measure(lambda: agent.load_hsn_data(excel_path), repeat)
+    return {"cold_excel_s": cold, "warm_snapshot": warm}
+
+
+def bench_import(repeat: int) -> dict:
+    """Measures the cold import time of the core validator against the import budget."""
+    probe = _IMPORT_PROBE.format(heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", probe],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    import_s = float(np.median([run["import_s"] for run in runs]))
+    heavy_modules = sorted({name for run in runs for name in run["heavy_modules"]})
+    return {
+        "import_s": import_s,
+        "agent_build_s": float(np.median([run["agent_build_s"] for run in runs])),
+        "budget_s": IMPORT_BUDGET_S,
+        "heavy_modules": heavy_modules,
+        "within_budget": import_s <= IMPORT_BUDGET_S and not heavy_modules
+    }
+
+
+def bench_single(workload: np.ndarray, calls: int) -> dict:
+    """Benchmarks validate_hsn_code on skewed single-code traffic."""
+    codes = workload[:calls].tolist()
+    agent.validation_cache.clear(agent.hsn_data["version"])
+
+    timings = []
+    start = time.perf_counter()
+    for code in codes:
+        call_start = time.perf_counter()
+        agent.validate_hsn_code(code)
+        timings.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    return dict(
+        _percentiles(timings),
+        calls=len(codes),
+        throughput_per_s=len(codes) / elapsed,
+        cache=agent.get_validation_cache_stats()
+    )
+
+
+def bench_batch(workload: np.ndarray, repeat: int) -> dict:
+    """Benchmarks validate_hsn_codes on a full invoice workload."""
+    codes = workload.tolist()
+    result = _measure(lambda: agent.validate_hsn_codes(codes), repeat)
+    result["rows"] = len(codes)
+    result["throughput_per_s"] = len(codes) / (result["mean_ms"] / 1000.0)
+    return result
+
+
+def bench_endpoint(workload: np.ndarray, calls: int, batch_size: int) -> dict:
+    """Benchmarks the Flask /validate endpoint for single-code and batch requests."""
+    import app as web_app
+
+    client = web_app.app.test_client()
+    codes = workload.tolist()
+
+    single = []
+    for code in codes[:calls]:
+        start = time.perf_counter()
+        client.post('/validate', json={"code": code})
+        single.append(time.perf_counter() - start)
+
+    batch = []
+    for offset in range(0, min(len(codes), batch_size * 10), batch_size):
+        start = time.perf_counter()
+        client.post('/validate', json={"codes": codes[offset:offset + batch_size]})
+        batch.append(time.perf_counter() - start)
+
+    return {
+        "single": dict(_percentiles(single), calls=len(single), throughput_per_s=len(single) / sum(single)),
+        "batch": dict(_percentiles(batch), calls=len(batch), batch_size=batch_size,
+                      throughput_per_s=batch_size * len(batch) / sum(batch))
+    }
+
+
+def bench_coalescing(workload: np.ndarray, calls: int) -> dict:
+    """Benchmarks concurrent single-code requests validated one by one and coalesced.
+
+    One by one, each request is validated in a thread pool sized like the ASGI
+    server's (``HSN_ASGI_THREADS``); coalesced, requests are batched on the
+    event loop. The result cache is cleared before each run.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    from api import validate_payload, validate_single_codes
+    from coalesce import MicroBatcher
+
+    codes = workload[:calls].tolist()
+    batcher = MicroBatcher(validate_single_codes, window_ms=COALESCE_BENCH_WINDOW_MS, max_batch=CONCURRENT_REQUESTS)
+    executor = ThreadPoolExecutor(max_workers=int(os.environ.get("HSN_ASGI_THREADS", os.cpu_count() or 4)))
+
+    async def direct(code):
+        return await asyncio.get_running_loop().run_in_executor(executor, validate_payload, {"code": code})
+
+    async def coalesced(code):
+        return await batcher.process({"code": code, "dataset": None})
+
+    async def run(handle) -> dict:
+        agent.validation_cache.clear(agent.validation_cache.version)
+        latencies = []
+
+        async def client(share):
+            for code in share:
+                start = time.perf_counter()
+                await handle(code)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(codes[i::CONCURRENT_REQUESTS]) for i in range(CONCURRENT_REQUESTS)))
+        return dict(_percentiles(latencies), throughput_per_s=len(codes) / (time.perf_counter() - start))
+
+    with executor:
+        return {
+            "concurrency": CONCURRENT_REQUESTS,
+            "window_ms": COALESCE_BENCH_WINDOW_MS,
+            "direct": asyncio.run(run(direct)),
+            "coalesced": dict(asyncio.run(run(coalesced)), mean_batch_size=batcher.stats()["mean_batch_size"])
+        }
+
+
+def run_benchmarks(sizes: list, rows: int, repeat: int, single_calls: int, batch_size: int) -> dict:
+    """Runs every benchmark for each master size and returns the report."""
+    report = {"environment": _environment(), "config": {
+        "sizes": sizes, "rows": rows, "repeat": repeat,
+        "single_calls": single_calls, "batch_size": batch_size
+    }, "results": []}
+
+    report["import"] = bench_import(repeat)
+    if not report["import"]["within_budget"]:
+        print(f"Import budget exceeded: {json.dumps(report['import'])}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            entries = generate_large_hsn_data(size)
+            master_codes = [entry["HSNCode"] for entry in entries]
+            workload = generate_invoice_codes(master_codes, num_rows=rows)
+            result = {"master_size": len(entries)}
+
+            if size <= EXCEL_SIZE_LIMIT:
+                result["load"] = bench_load(entries, workdir, repeat)
+            else:
+                snapshot_path = os.path.join(workdir, f"master_{size}.hsnidx")
+                start = time.perf_counter()
+                write_snapshot({entry["HSNCode"]: entry["Description"] for entry in entries}, snapshot_path)
+                compile_time = time.perf_counter() - start
+                agent.attach_hsn_index(snapshot_path)
+                result["load"] = {
+                    "compile_snapshot_s": compile_time,
+                    "warm_snapshot": _measure(lambda: agent.attach_hsn_index(snapshot_path), repeat)
+                }
+
+            result["index_mb"] = agent.hsn_data["index"].nbytes / 1e6
+            result["single"] = bench_single(workload, single_calls)
+            result["batch"] = bench_batch(workload, repeat)
+            result["endpoint"] = bench_endpoint(workload, single_calls, batch_size)
+            result["coalescing"] = bench_coalescing(workload, single_calls)
+            result["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+            report["results"].append(result)
+            print(f"Benchmarked master of {len(entries)} codes", file=sys.stderr)
+
+    return report
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def _flatten(value, prefix: str = "") -> dict:
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix[:-1]: value}
+    return {}
+
+
+def compare_reports(baseline: dict, current: dict) -> dict:
+    """Returns the relative change of every numeric metric shared by two reports."""
+    changes = {}
+    base_import, cur_import = _flatten(baseline.get("import", {})), _flatten(current.get("import", {}))
+    for key in base_import.keys() & cur_import.keys():
+        if base_import[key]:
+            changes[f"import.{key}"] = cur_import[key] / base_import[key] - 1.0
+
+    for base, cur in zip(baseline["results"], current["results"]):
+        base_flat, cur_flat = _flatten(base), _flatten(cur)
+        for key in base_flat.keys() & cur_flat.keys():
+            if base_flat[key]:
+                changes[f"{cur['master_size']}.{key}"] = cur_flat[key] / base_flat[key] - 1.0
+    return dict(sorted(changes.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HSN validation paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000],
+                        help="Master sizes to benchmark (20k-1M codes)")
+    parser.add_argument("--rows", type=int, default=200000, help="Invoice rows per batch workload")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    parser.add_argument("--single-calls", type=int, default=20000, help="Single-code calls to time")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Codes per endpoint batch request")
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.rows, args.repeat, args.single_calls, args.batch_size)
+
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare_reports(json.load(f), report)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+HSN Validation Result Cache
+
+This module provides a bounded LRU cache for per-code validation results.
+Invoice data is heavily skewed towards a few thousand distinct codes, so most
+single-code validations can be answered from the cache.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Default maximum number of cached results
+DEFAULT_CACHE_SIZE = 100000
+
+
+class ValidationCache:
+    """Thread-safe LRU cache of validation result dicts keyed by code.
+
+    Entries belong to one master data version; lookups and stores made for any
+    other version are ignored, so a validation that started before a reload can
+    never populate the cache of the new master.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        """Creates an empty cache.
+
+        Args:
+            maxsize: Maximum number of cached results; 0 disables caching.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, code: str, version=None):
+        """Returns a copy of the cached result for a code, or None."""
+        with self._lock:
+            result = self._entries.get(code) if version == self.version else None
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(code)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, code: str, result: dict, version=None) -> None:
+        """Stores a copy of a result, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[code] = dict(result)
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self, version=None) -> None:
+        """Removes all cached results and binds the cache to a new version (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+
+    def resize(self, maxsize: int) -> None:
+        """Changes the maximum size, evicting entries if needed."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns size and hit/miss statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
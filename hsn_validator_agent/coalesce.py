@@ -0,0 +1,107 @@
+"""
+HSN Request Coalescing
+
+ERP integrations validate one code per line item, so the ASGI server sees many
+concurrent single-code requests. A ``MicroBatcher`` collects the requests
+awaiting it on the event loop for a short window (or until a batch is full)
+and hands them to a handler as one batch, so they go through the vectorized
+batch engine together; every caller waits only for its own result.
+
+A request waits at most the window plus the time to validate its batch. The
+window is configured with ``HSN_COALESCE_WINDOW_MS`` (0 disables coalescing)
+and the batch size with ``HSN_COALESCE_MAX_BATCH``. Coalesced codes go through
+the same result cache as single requests; only the distinct cache misses are
+validated together, and below ``HSN_COALESCE_BATCH_THRESHOLD`` misses the batch
+engine costs more than validating them one by one, so they are validated
+individually.
+
+Batching happens on the event loop rather than on a worker thread: handing
+each request to another thread costs about as much as validating a code.
+"""
+
+import asyncio
+import os
+
+# Time a batch stays open for more requests, in milliseconds (0 disables coalescing)
+COALESCE_WINDOW_MS = float(os.environ.get("HSN_COALESCE_WINDOW_MS", "0"))
+
+# Requests handled per batch; a full batch is handled without waiting for the window
+COALESCE_MAX_BATCH = int(os.environ.get("HSN_COALESCE_MAX_BATCH", "256"))
+
+# Smallest number of cache misses worth the fixed cost of a batch engine call;
+# fewer misses are validated code by code
+COALESCE_BATCH_THRESHOLD = int(os.environ.get("HSN_COALESCE_BATCH_THRESHOLD", "32"))
+
+
+class MicroBatcher:
+    """Coalesces the requests awaited on an event loop into batches.
+
+    The handler runs on the event loop once per batch, so a batcher serves a
+    single event loop and its batches should be small enough to handle inline.
+    """
+
+    def __init__(self, handler, window_ms: float = COALESCE_WINDOW_MS, max_batch: int = COALESCE_MAX_BATCH):
+        """Creates a batcher.
+
+        Args:
+            handler: Callable taking a list of requests and returning their
+                results in the same order.
+            window_ms: Time a batch stays open after its first request, in milliseconds.
+            max_batch: Maximum number of requests per batch.
+        """
+        self.handler = handler
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch = max(int(max_batch), 1)
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self._pending = []
+        self._timer = None
+
+    async def process(self, request):
+        """Handles a request as part of the next batch and returns its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif len(self._pending) == 1:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._pending
+        self._pending = []
+        if not batch:
+            return
+
+        self.requests += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            results = self.handler([request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            # Callers that gave up (e.g. a closed connection) are skipped
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Returns the configuration and batch counts of the batcher."""
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending": len(self._pending)
+        }
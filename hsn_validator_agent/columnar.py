@@ -0,0 +1,121 @@
+"""
+Columnar HSN Validation Output
+
+This module converts columnar batch validation results into Apache Arrow
+tables and serializes them as Arrow IPC streams or Parquet, so downstream
+Spark/pandas jobs can read validation results without parsing JSON.
+"""
+
+import io
+
+# Columnar output formats and their MIME types
+COLUMNAR_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def result_schema():
+    """Returns the Arrow schema of validation results."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("row", pa.int64()),
+        ("code", pa.string()),
+        ("valid", pa.bool_()),
+        ("format_valid", pa.bool_()),
+        ("exists_in_database", pa.bool_()),
+        ("hierarchy_valid", pa.bool_()),
+        ("description", pa.string()),
+        ("error", pa.string()),
+        ("normalized_from", pa.string()),
+        ("normalizations", pa.string())
+    ])
+
+
+def columns_to_table(columns: dict, first_row: int = 1):
+    """Builds an Arrow table from columnar validation results.
+
+    Descriptions are null for codes with an invalid format, errors are null for
+    valid codes and the normalization columns are null for codes taken as
+    given, matching the keys omitted or set to None in the dict results.
+
+    Args:
+        columns: Columnar results from ``validate_hsn_columns``.
+        first_row: Row number of the first result.
+
+    Returns:
+        pyarrow.Table: One row per validated code.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    count = len(columns["code"])
+    format_valid = columns["format_valid"]
+    normalized = columns["normalizations"] != ""
+    return pa.Table.from_arrays([
+        pa.array(np.arange(first_row, first_row + count, dtype=np.int64)),
+        pa.array(columns["code"], type=pa.string()),
+        pa.array(columns["valid"], type=pa.bool_()),
+        pa.array(format_valid, type=pa.bool_()),
+        pa.array(columns["exists_in_database"], type=pa.bool_()),
+        pa.array(columns["hierarchy_valid"], type=pa.bool_()),
+        pa.array(columns["description"], type=pa.string(), mask=~format_valid),
+        pa.array(columns["error"], type=pa.string()),
+        pa.array(columns["normalized_from"], type=pa.string()),
+        pa.array(columns["normalizations"], type=pa.string(), mask=~normalized)
+    ], schema=result_schema())
+
+
+class ColumnarWriter:
+    """Writes validation results chunk by chunk to an Arrow IPC stream or Parquet file."""
+
+    def __init__(self, sink, output_format: str = "parquet"):
+        """Opens a writer.
+
+        Args:
+            sink: Path or binary file object to write to.
+            output_format: "arrow" or "parquet".
+        """
+        if output_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        import pyarrow as pa
+
+        if output_format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(sink, result_schema())
+        else:
+            self._writer = pa.ipc.new_stream(sink, result_schema())
+        self.rows = 0
+
+    def write(self, columns: dict) -> None:
+        """Appends a chunk of columnar results."""
+        self._writer.write_table(columns_to_table(columns, self.rows + 1))
+        self.rows += len(columns["code"])
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def columns_to_bytes(columns: dict, output_format: str = "arrow") -> bytes:
+    """Serializes columnar validation results as an Arrow IPC stream or Parquet file.
+
+    Args:
+        columns: Columnar results from ``validate_hsn_columns``.
+        output_format: "arrow" or "parquet".
+
+    Returns:
+        bytes: The serialized results.
+    """
+    buffer = io.BytesIO()
+    with ColumnarWriter(buffer, output_format) as writer:
+        writer.write(columns)
+    return buffer.getvalue()
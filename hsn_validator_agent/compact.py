@@ -0,0 +1,139 @@
+"""
+Compact HSN Validation Results
+
+This module condenses batch validation results for agent tool calls. Instead
+of one full dict per code, the model receives summary counts, the invalid
+codes grouped by failure reason and the valid codes as bare references. The
+full results are kept in a bounded in-process store and can be fetched page
+by page.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+
+# Agent batches larger than this are returned in compact form
+COMPACT_THRESHOLD = 20
+
+# Maximum number of codes listed per failure reason and for valid codes
+MAX_CODES_PER_REASON = 25
+MAX_VALID_CODES = 50
+
+# Default and maximum number of results per detail page
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Number of full result sets kept for detail lookups
+RESULT_STORE_SIZE = 32
+
+RESULT_STATUSES = ("all", "valid", "invalid")
+
+
+def _distinct(codes: list) -> list:
+    return list(dict.fromkeys(codes))
+
+
+def compact_results(results: list, summary: dict, result_id: str = None) -> dict:
+    """Condenses per-code results into summary counts and grouped codes.
+
+    Args:
+        results: Per-code result dicts from the validation tools.
+        summary: Total, valid and invalid counts.
+        result_id: Handle for fetching the full results (optional).
+
+    Returns:
+        dict: Compact result with invalid codes grouped by reason and valid code references.
+    """
+    reasons = OrderedDict()
+    valid_codes = []
+    for result in results:
+        if result.get("valid", False):
+            valid_codes.append(result["code"])
+        else:
+            reasons.setdefault(result.get("error") or "Invalid HSN code", []).append(result["code"])
+
+    invalid_by_reason = []
+    for reason, codes in sorted(reasons.items(), key=lambda item: -len(item[1])):
+        distinct = _distinct(codes)
+        invalid_by_reason.append({
+            "reason": reason,
+            "count": len(codes),
+            "codes": distinct[:MAX_CODES_PER_REASON],
+            "truncated": len(distinct) > MAX_CODES_PER_REASON
+        })
+
+    distinct_valid = _distinct(valid_codes)
+    compact = {
+        "status": "success",
+        "mode": "compact",
+        "summary": summary,
+        "invalid_by_reason": invalid_by_reason,
+        "valid_codes": {
+            "count": len(valid_codes),
+            "distinct": len(distinct_valid),
+            "codes": distinct_valid[:MAX_VALID_CODES],
+            "truncated": len(distinct_valid) > MAX_VALID_CODES
+        }
+    }
+    if result_id is not None:
+        compact["result_id"] = result_id
+    return compact
+
+
+def page_results(results: list, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE, status: str = "all") -> dict:
+    """Returns one page of full per-code results.
+
+    Args:
+        results: Per-code result dicts.
+        page: Page number, starting at 1.
+        page_size: Number of results per page.
+        status: "all", "valid" or "invalid" results only.
+
+    Returns:
+        dict: The page of results with pagination information.
+    """
+    if status == "valid":
+        results = [result for result in results if result.get("valid", False)]
+    elif status == "invalid":
+        results = [result for result in results if not result.get("valid", False)]
+
+    page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+    page = max(int(page), 1)
+    total_pages = max((len(results) + page_size - 1) // page_size, 1)
+    start = (page - 1) * page_size
+
+    return {
+        "status": "success",
+        "results": results[start:start + page_size],
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "total_results": len(results),
+        "has_more": page < total_pages
+    }
+
+
+class ResultStore:
+    """Thread-safe LRU store of full batch results keyed by result id."""
+
+    def __init__(self, maxsize: int = RESULT_STORE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, results: list, master_version=None) -> str:
+        """Stores a result set and returns its id."""
+        result_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._entries[result_id] = {"results": results, "master_version": master_version}
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str):
+        """Returns a stored result set, or None if it is unknown or was evicted."""
+        with self._lock:
+            entry = self._entries.get(result_id)
+            if entry is not None:
+                self._entries.move_to_end(result_id)
+            return entry
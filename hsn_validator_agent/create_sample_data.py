@@ -2,10 +2,12 @@
 Script to generate sample HSN data for testing the HSN Validator Agent.
 """
 
-import pandas as pd
-import random
+import argparse
 import os
 
+import numpy as np
+import pandas as pd
+
 # Sample HSN code data - organized by hierarchical sections
 # Format: 2-digit, 4-digit, 6-digit, and 8-digit codes with descriptions
 hsn_data = [
@@ -62,53 +64,100 @@ def create_sample_data(output_file="HSN_Master_Data.xlsx"):
     print(f"Sample HSN data created: {output_file}")
     print(f"Created {len(df)} HSN code entries across different hierarchical levels")
 
-if __name__ == "__main__":
-    create_sample_data()
+def generate_large_hsn_data(num_codes=20000, seed=42):
+    """
+    Generates a synthetic HSN master with a complete hierarchy.
     
-    # Optionally create a larger dataset with random variations
-    # Uncomment the following code to generate a larger dataset
+    Random 8-digit tariff items are drawn across chapters 01-97 and all of
+    their 2, 4 and 6-digit parents are added, so every code has a valid
+    hierarchy. The sample entries above are always included.
+    
+    Args:
+        num_codes: Approximate number of codes to generate
+        seed: Random seed for reproducible datasets
+        
+    Returns:
+        list: HSN entries as dicts with HSNCode and Description
     """
-    large_data = []
+    rng = np.random.default_rng(seed)
+    codes = {entry["HSNCode"]: entry["Description"] for entry in hsn_data}
+    
+    level_names = {2: "Sample chapter", 4: "Sample heading", 6: "Sample subheading", 8: "Sample tariff item"}
     
-    # Add all original data
-    large_data.extend(hsn_data)
+    # Draw tariff items in rounds until the target size (including parents) is reached
+    while len(codes) < num_codes:
+        remaining = num_codes - len(codes)
+        chapters = rng.integers(1, 98, size=remaining)
+        rest = rng.integers(0, 1000000, size=remaining)
+        items = np.char.zfill((chapters * 1000000 + rest).astype(str), 8)
+        
+        for item in np.unique(items).tolist():
+            for level in (2, 4, 6, 8):
+                code = item[:level]
+                if code not in codes:
+                    codes[code] = f"{level_names[level]} {code}"
+            if len(codes) >= num_codes:
+                break
     
-    # Generate random variations for testing
-    chapters = [str(i).zfill(2) for i in range(10, 99)]
+    return [{"HSNCode": code, "Description": description} for code, description in codes.items()]
+
+
+def create_large_sample_data(num_codes=20000, output_file="HSN_Master_Data_Large.xlsx", seed=42):
+    """
+    Creates a large synthetic HSN master data file.
     
-    for chapter in chapters[:20]:  # Limit to 20 chapters for sample
-        # Add chapter (2-digit)
-        large_data.append({
-            "HSNCode": chapter,
-            "Description": f"Sample chapter {chapter}"
-        })
+    Args:
+        num_codes: Approximate number of codes to generate
+        output_file: Path to the output Excel file
+        seed: Random seed for reproducible datasets
+    """
+    large_df = pd.DataFrame(generate_large_hsn_data(num_codes, seed))
+    large_df.to_excel(output_file, index=False)
+    print(f"Created large HSN dataset with {len(large_df)} entries: {output_file}")
+
+
+def generate_invoice_codes(master_codes, num_rows=100000, distinct=5000, invalid_ratio=0.05,
+                           zipf_exponent=1.2, seed=42):
+    """
+    Generates a skewed invoice workload of HSN codes.
+    
+    Line items follow a Zipf distribution over a subset of the master codes,
+    so a few codes account for most rows, as in real invoice data. A share of
+    rows is replaced by codes that fail format, existence or hierarchy checks.
+    
+    Args:
+        master_codes: Valid HSN codes to draw from
+        num_rows: Number of invoice line items
+        distinct: Number of distinct valid codes used
+        invalid_ratio: Fraction of rows with invalid codes
+        zipf_exponent: Skew of the code popularity distribution
+        seed: Random seed for reproducible workloads
         
-        # Add some 4-digit codes
-        for _ in range(random.randint(2, 5)):
-            heading = chapter + str(random.randint(10, 99))
-            large_data.append({
-                "HSNCode": heading,
-                "Description": f"Sample heading {heading}"
-            })
-            
-            # Add some 6-digit codes
-            for _ in range(random.randint(1, 3)):
-                subheading = heading + str(random.randint(10, 99))
-                large_data.append({
-                    "HSNCode": subheading,
-                    "Description": f"Sample subheading {subheading}"
-                })
-                
-                # Add some 8-digit codes
-                for _ in range(random.randint(1, 2)):
-                    tariff_code = subheading + str(random.randint(10, 99))
-                    large_data.append({
-                        "HSNCode": tariff_code,
-                        "Description": f"Sample tariff item {tariff_code}"
-                    })
-    
-    # Save large dataset
-    large_df = pd.DataFrame(large_data)
-    large_df.to_excel("HSN_Master_Data_Large.xlsx", index=False)
-    print(f"Created large HSN dataset with {len(large_df)} entries")
+    Returns:
+        np.ndarray: HSN code for every invoice line item
     """
+    rng = np.random.default_rng(seed)
+    master_codes = np.asarray(master_codes, dtype=str)
+    popular = rng.choice(master_codes, size=min(distinct, len(master_codes)), replace=False)
+    
+    # Zipf ranks beyond the popular set wrap around onto it
+    ranks = (rng.zipf(zipf_exponent, size=num_rows) - 1) % len(popular)
+    workload = popular[ranks].astype(object)
+    
+    invalid_rows = rng.random(num_rows) < invalid_ratio
+    invalid_pool = np.array(["", "abc", "123", "123456789", "8517.12.90", "99999999", "00000000"], dtype=object)
+    workload[invalid_rows] = rng.choice(invalid_pool, size=int(invalid_rows.sum()))
+    return workload.astype(str)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create sample HSN master data")
+    parser.add_argument("--large", type=int, metavar="NUM_CODES",
+                        help="Also create a large synthetic dataset with about NUM_CODES codes")
+    args = parser.parse_args()
+    
+    create_sample_data()
+    
+    # Optionally create a larger dataset with random variations
+    if args.large:
+        create_large_sample_data(args.large)
@@ -9,10 +9,10 @@ import os
 import json
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
-from google.genai import types
 
 # Import the agent - changed the import to reference the local module
 from agent import hsn_validator_agent
+from router import HSNRequestRouter
 
 # Ensure sample data exists
 from create_sample_data import create_sample_data
@@ -51,61 +51,47 @@ def setup_environment():
     
     return session_service, runner
 
-def run_validation(runner, query):
+def run_validation(router, query):
     """
     Runs the HSN validation with the given query.
     
+    Structured queries (code payloads or plain lists of codes) are validated
+    directly; free-form queries are answered by the agent.
+    
     Args:
-        runner: The ADK runner
+        router: The request router wrapping the ADK runner
         query: The validation query (string or dict)
     """
-    # Convert query to Content object if it's a dict or string
-    if isinstance(query, dict):
-        content = types.Content(
-            role='user',
-            parts=[types.Part(text=json.dumps(query))]
-        )
-    else:
-        content = types.Content(
-            role='user',
-            parts=[types.Part(text=query)]
-        )
+    routed = router.route(query)
     
-    # Run the agent
-    events = runner.run(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=content
-    )
-    
-    # Print agent responses
-    for event in events:
-        if event.is_final_response():
-            final_response = event.content.parts[0].text
-            print("\nAgent Response:")
-            print(f"{final_response}")
-            return final_response
+    if routed["path"] == "direct":
+        print("\nValidation Result (direct):")
+        print(json.dumps(routed["response"], indent=2))
+    else:
+        print("\nAgent Response:")
+        print(f"{routed['response']}")
+    return routed["response"]
 
-def demo_single_validation(runner):
+def demo_single_validation(router):
     """Demonstrates validation of a single HSN code."""
     print("\n=== Single HSN Code Validation ===")
     
     # Test a valid HSN code
     valid_query = {"code": "85171290"}
     print(f"\nValidating: {valid_query}")
-    run_validation(runner, valid_query)
+    run_validation(router, valid_query)
     
     # Test an invalid HSN code (incorrect format)
     invalid_format_query = {"code": "123456789"}
     print(f"\nValidating: {invalid_format_query}")
-    run_validation(runner, invalid_format_query)
+    run_validation(router, invalid_format_query)
     
     # Test a code with valid format but not in database
     non_existent_query = {"code": "12345678"}
     print(f"\nValidating: {non_existent_query}")
-    run_validation(runner, non_existent_query)
+    run_validation(router, non_existent_query)
 
-def demo_batch_validation(runner):
+def demo_batch_validation(router):
     """Demonstrates validation of multiple HSN codes in batch."""
     print("\n=== Batch HSN Code Validation ===")
     
@@ -120,23 +106,23 @@ def demo_batch_validation(runner):
     }
     
     print(f"\nValidating batch: {batch_query}")
-    run_validation(runner, batch_query)
+    run_validation(router, batch_query)
 
-def demo_text_query(runner):
+def demo_text_query(router):
     """Demonstrates using natural language to validate HSN codes."""
     print("\n=== Natural Language Query ===")
     
     # Test natural language query
     nl_query = "Please validate the HSN code 85171290 for mobile phones"
     print(f"\nQuery: {nl_query}")
-    run_validation(runner, nl_query)
+    run_validation(router, nl_query)
     
     # Test multiple codes in natural language
     multi_nl_query = "I need to check these HSN codes: 3004, 84713010, and 123456789"
     print(f"\nQuery: {multi_nl_query}")
-    run_validation(runner, multi_nl_query)
+    run_validation(router, multi_nl_query)
 
-def interactive_mode(runner):
+def interactive_mode(router):
     """
     Enters an interactive mode where the user can enter queries.
     """
@@ -149,7 +135,7 @@ def interactive_mode(runner):
         if user_input.lower() in ('exit', 'quit', 'q'):
             break
             
-        run_validation(runner, user_input)
+        run_validation(router, user_input)
 
 def main():
     """Main entry point for the demo."""
@@ -158,14 +144,18 @@ def main():
     
     # Setup
     _, runner = setup_environment()
+    router = HSNRequestRouter(runner, user_id=USER_ID, session_id=SESSION_ID)
     
     # Run demonstrations
-    demo_single_validation(runner)
-    demo_batch_validation(runner)
-    demo_text_query(runner)
+    demo_single_validation(router)
+    demo_batch_validation(router)
+    demo_text_query(router)
     
     # Interactive mode
-    interactive_mode(runner)
+    interactive_mode(router)
+    
+    print("\nRequests per path:")
+    print(json.dumps(router.stats(), indent=2))
     
     print("\nDemo completed. Thank you for using the HSN Validator Agent!")
 
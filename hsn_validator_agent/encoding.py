@@ -0,0 +1,90 @@
+"""
+HSN Code Encoding
+
+This module packs HSN codes into 32-bit integer keys. The digits of a code are
+zero-padded to eight places and the code length is stored in the low bits as
+a level tag:
+
+    key = int(code.ljust(8, "0")) << 4 | len(code)
+
+so "85", "8517" and "85171290" stay distinct. Sorting packed keys orders codes
+exactly like sorting the strings, and the parent at any level is obtained with
+integer arithmetic, so membership and hierarchy checks become ``searchsorted``
+calls over a uint32 array instead of string comparisons.
+"""
+
+import numpy as np
+
+# Longest code that can be packed
+MAX_DIGITS = 8
+
+# Low bits holding the code length
+LENGTH_BITS = 4
+LENGTH_MASK = (1 << LENGTH_BITS) - 1
+
+KEY_DTYPE = np.uint32
+
+# Place value of every digit position
+_POWERS = 10 ** np.arange(MAX_DIGITS - 1, -1, -1, dtype=np.int64)
+
+
+def encode_code(code):
+    """Packs a single code, returning None when it is not 1-8 ASCII digits."""
+    if not isinstance(code, str) or not (0 < len(code) <= MAX_DIGITS) or not code.isascii() or not code.isdigit():
+        return None
+    return int(code.ljust(MAX_DIGITS, "0")) << LENGTH_BITS | len(code)
+
+
+def encode_codes(codes):
+    """Packs an array of codes into integer keys.
+
+    Args:
+        codes: Unicode array of stripped codes.
+
+    Returns:
+        tuple: uint32 array of keys and a boolean array marking the codes that
+        could be packed (1-8 ASCII digits); keys of the other codes are 0.
+    """
+    codes = np.ascontiguousarray(codes, dtype=str)
+    count = len(codes)
+    width = codes.dtype.itemsize // 4
+    if count == 0 or width == 0:
+        return np.zeros(count, dtype=KEY_DTYPE), np.zeros(count, dtype=bool)
+
+    # One row of code points per code; unicode arrays are padded with NULs
+    chars = codes.view(np.uint32).reshape(count, width)
+    digits = chars - np.uint32(48)
+    lengths = np.count_nonzero(chars, axis=1)
+    in_code = np.arange(width) < lengths[:, None]
+    encodable = np.all((digits < 10) == in_code, axis=1) & (lengths > 0) & (lengths <= MAX_DIGITS)
+
+    keys = np.zeros(count, dtype=KEY_DTYPE)
+    for position in range(MAX_DIGITS):
+        keys *= 10
+        if position < width:
+            keys += np.where(in_code[:, position], digits[:, position], 0).astype(KEY_DTYPE)
+    keys = keys << LENGTH_BITS | lengths.astype(KEY_DTYPE)
+    return np.where(encodable, keys, 0).astype(KEY_DTYPE), encodable
+
+
+def decode_keys(keys) -> np.ndarray:
+    """Unpacks integer keys into a unicode array of codes."""
+    keys = np.asarray(keys, dtype=KEY_DTYPE)
+    values = (keys >> LENGTH_BITS).astype(np.int64)
+    lengths = (keys & LENGTH_MASK).astype(np.int64)
+
+    chars = (values[:, None] // _POWERS) % 10 + 48
+    chars[np.arange(MAX_DIGITS) >= lengths[:, None]] = 0
+    return np.ascontiguousarray(chars, dtype=np.uint32).view(f"<U{MAX_DIGITS}").reshape(len(keys))
+
+
+def key_lengths(keys) -> np.ndarray:
+    """Returns the code length stored in each key."""
+    return (np.asarray(keys, dtype=KEY_DTYPE) & LENGTH_MASK).astype(np.int64)
+
+
+def parent_keys(keys, level: int) -> np.ndarray:
+    """Returns the keys of the ``level``-digit prefixes of packed codes."""
+    scale = KEY_DTYPE(10 ** (MAX_DIGITS - level))
+    values = np.asarray(keys, dtype=KEY_DTYPE) >> LENGTH_BITS
+    return (values // scale * scale) << LENGTH_BITS | KEY_DTYPE(level)
@@ -0,0 +1,95 @@
+"""
+HSN Hierarchy Index
+
+This module answers hierarchical queries over the sorted HSN code array.
+Because codes are sorted, every code is immediately followed by all of its
+descendants, so a subtree is a contiguous range found with two binary searches.
+"""
+
+import numpy as np
+
+# Number of digits added at each level of the HSN hierarchy
+LEVEL_STEP = 2
+
+# Sorts after every digit, used as the upper bound of a prefix range
+_PREFIX_END = "\uffff"
+
+
+class HSNHierarchy:
+    """Level-aware view of a sorted HSN code array supporting subtree queries."""
+
+    def __init__(self, codes: np.ndarray):
+        """Precomputes code lengths and leaf counts for the sorted codes.
+
+        Args:
+            codes: Sorted unicode array of HSN codes.
+        """
+        self.codes = codes
+        self.lengths = np.char.str_len(codes) if len(codes) else np.zeros(0, dtype=int)
+
+        # A code is a leaf unless the next code in sorted order starts with it
+        is_leaf = np.ones(len(codes), dtype=bool)
+        if len(codes) > 1:
+            is_leaf[:-1] = ~np.char.startswith(codes[1:], codes[:-1])
+        self.leaf_counts = np.concatenate(([0], np.cumsum(is_leaf)))
+
+    def subtree_range(self, prefix: str) -> tuple:
+        """Returns the ``[start, end)`` positions of codes starting with ``prefix``."""
+        start = int(np.searchsorted(self.codes, prefix, side="left"))
+        end = int(np.searchsorted(self.codes, prefix + _PREFIX_END, side="left"))
+        return start, end
+
+    def contains_many(self, codes) -> np.ndarray:
+        """Checks several codes at once with a single binary search."""
+        keys = np.asarray(codes, dtype=str)
+        if len(self.codes) == 0 or keys.size == 0:
+            return np.zeros(keys.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self.codes, keys), len(self.codes) - 1)
+        return self.codes[positions] == keys
+
+    def ancestors(self, code: str) -> list:
+        """Returns the parent prefixes of a code, from the chapter down."""
+        return [code[:level] for level in range(LEVEL_STEP, len(code), LEVEL_STEP)]
+
+    def walk(self, code: str) -> dict:
+        """Checks a code and all of its ancestors in one lookup.
+
+        Args:
+            code: The HSN code to check.
+
+        Returns:
+            dict: Whether the code exists and which ancestors are missing.
+        """
+        ancestors = self.ancestors(code)
+        found = self.contains_many(ancestors + [code])
+        return {
+            "exists": bool(found[-1]),
+            "missing_parents": [parent for parent, ok in zip(ancestors, found[:-1]) if not ok]
+        }
+
+    def children(self, code: str) -> np.ndarray:
+        """Returns the positions of the direct children of a code (next HSN level)."""
+        start, end = self.subtree_range(code)
+        positions = np.arange(start, end)
+        return positions[self.lengths[start:end] == len(code) + LEVEL_STEP]
+
+    def leaf_count(self, code: str) -> int:
+        """Counts the leaf codes in the subtree rooted at a code."""
+        start, end = self.subtree_range(code)
+        return int(self.leaf_counts[end] - self.leaf_counts[start])
+
+    def subtree_size(self, code: str) -> int:
+        """Counts all codes in the subtree rooted at a code, including itself."""
+        start, end = self.subtree_range(code)
+        return end - start
+
+    def nearest_ancestor(self, code: str):
+        """Returns the deepest existing proper ancestor of a code, or None."""
+        ancestors = self.ancestors(code)
+        if not ancestors:
+            return None
+        found = self.contains_many(ancestors)
+        for parent, ok in zip(reversed(ancestors), reversed(found)):
+            if ok:
+                return parent
+        return None
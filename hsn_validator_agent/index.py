@@ -0,0 +1,233 @@
+"""
+HSN Code Index
+
+This module provides a sorted, array-backed index over the HSN master data,
+used by the vectorized validation paths for existence and parent lookups.
+Codes are held as packed integer keys (see ``encoding``) and descriptions are
+interned in a single UTF-8 buffer, so a master costs a few bytes per code
+instead of two Python strings and a dict slot.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+try:
+    from .encoding import KEY_DTYPE, decode_keys, encode_code, encode_codes
+    from .hierarchy import HSNHierarchy
+    from .search import HSNSearchIndex
+    from .suggest import HSNSuggester
+except ImportError:
+    from encoding import KEY_DTYPE, decode_keys, encode_code, encode_codes
+    from hierarchy import HSNHierarchy
+    from search import HSNSearchIndex
+    from suggest import HSNSuggester
+
+
+class DescriptionTable:
+    """Sequence of descriptions decoded lazily from a single UTF-8 buffer.
+
+    Each distinct description is stored once; ``ids`` maps every code position
+    to its description (None when positions map one to one).
+    """
+
+    def __init__(self, offsets: np.ndarray, blob, ids: np.ndarray = None):
+        self.offsets = offsets
+        self.blob = blob
+        self.ids = ids
+
+    @classmethod
+    def from_strings(cls, values) -> "DescriptionTable":
+        """Interns a sequence of descriptions into a table."""
+        interned = {}
+        ids = np.fromiter(
+            (interned.setdefault(str(value), len(interned)) for value in values),
+            dtype=np.uint32,
+            count=len(values)
+        )
+        encoded = [value.encode("utf-8") for value in interned]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        if encoded:
+            np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        return cls(offsets, b"".join(encoded), ids)
+
+    def _decode(self, entry: int) -> str:
+        start = int(self.offsets[entry])
+        end = int(self.offsets[entry + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def __getitem__(self, position):
+        return self._decode(int(self.ids[position]) if self.ids is not None else position)
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the descriptions at several positions, decoding each distinct one once."""
+        entries = self.ids[positions] if self.ids is not None else np.asarray(positions)
+        distinct, inverse = np.unique(entries, return_inverse=True)
+        decoded = np.empty(len(distinct), dtype=object)
+        decoded[:] = [self._decode(entry) for entry in distinct.tolist()]
+        return decoded[inverse]
+
+    def __len__(self) -> int:
+        return len(self.ids) if self.ids is not None else len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + len(self.blob) + (self.ids.nbytes if self.ids is not None else 0)
+
+
+class HSNIndex(Mapping):
+    """Read-only HSN code to description index backed by sorted arrays.
+
+    Behaves like the ``code -> description`` dict used elsewhere in the agent,
+    and additionally supports vectorized membership lookups via ``lookup``.
+    """
+
+    def __init__(self, packed: np.ndarray, descriptions, metadata: dict = None, codes: np.ndarray = None):
+        """Creates an index from pre-sorted codes.
+
+        Args:
+            packed: Sorted uint32 array of packed codes, or None when some code
+                cannot be packed and ``codes`` is used instead.
+            descriptions: ``DescriptionTable`` aligned with the codes.
+            metadata: Information about the index source (optional).
+            codes: Sorted unicode array of HSN codes, required when ``packed`` is None.
+        """
+        self.packed = packed
+        self.descriptions = descriptions
+        self.metadata = metadata or {}
+        self._codes = codes
+        self._hierarchy = None
+        self._suggester = None
+        self._search_index = None
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Sorted unicode array of HSN codes, unpacked on first use."""
+        if self._codes is None:
+            self._codes = decode_keys(self.packed)
+        return self._codes
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the codes and descriptions (excluding derived indexes)."""
+        codes = self.packed if self.packed is not None else self._codes
+        return codes.nbytes + self.descriptions.nbytes
+
+    @property
+    def hierarchy(self) -> HSNHierarchy:
+        """Hierarchy view of the index, built on first use."""
+        if self._hierarchy is None:
+            self._hierarchy = HSNHierarchy(self.codes)
+        return self._hierarchy
+
+    @property
+    def suggester(self) -> HSNSuggester:
+        """Suggestion index for near-miss codes, built on first use."""
+        if self._suggester is None:
+            self._suggester = HSNSuggester(self)
+        return self._suggester
+
+    @property
+    def search_index(self) -> HSNSearchIndex:
+        """Full-text index over the descriptions, built on first use."""
+        if self._search_index is None:
+            self._search_index = HSNSearchIndex(self)
+        return self._search_index
+
+    @classmethod
+    def from_dict(cls, code_dict: dict) -> "HSNIndex":
+        """Builds an index from a ``code -> description`` dict.
+
+        Args:
+            code_dict: Mapping of HSN code strings to descriptions.
+
+        Returns:
+            HSNIndex: The sorted index.
+        """
+        codes = np.array(list(code_dict.keys()), dtype=str)
+        keys, encodable = encode_codes(codes)
+        descriptions = list(code_dict.values())
+
+        # Packed keys sort exactly like the code strings
+        if encodable.all():
+            order = np.argsort(keys, kind="stable")
+            return cls(keys[order], DescriptionTable.from_strings([descriptions[i] for i in order.tolist()]))
+
+        order = np.argsort(codes, kind="stable")
+        return cls(None, DescriptionTable.from_strings([descriptions[i] for i in order.tolist()]), codes=codes[order])
+
+    def lookup(self, keys: np.ndarray):
+        """Looks up an array of codes in the index.
+
+        Args:
+            keys: Unicode array of HSN codes.
+
+        Returns:
+            tuple: Boolean array of matches and the matching positions in the index.
+        """
+        if self.packed is None:
+            return self._lookup_codes(keys)
+        return self.lookup_keys(*encode_codes(keys))
+
+    def lookup_keys(self, keys: np.ndarray, encodable: np.ndarray):
+        """Looks up an array of packed codes in the index.
+
+        Args:
+            keys: uint32 array of packed codes (see ``encoding.encode_codes``).
+            encodable: Boolean array marking the keys of codes that could be packed.
+
+        Returns:
+            tuple: Boolean array of matches and the matching positions in the index.
+        """
+        if self.packed is None:
+            found, positions = self._lookup_codes(decode_keys(keys))
+            return found & encodable, positions
+
+        if len(self.packed) == 0:
+            return np.zeros(keys.shape, dtype=bool), np.zeros(keys.shape, dtype=np.intp)
+
+        positions = np.minimum(np.searchsorted(self.packed, keys), len(self.packed) - 1)
+        found = encodable & (self.packed[positions] == keys)
+        return found, positions
+
+    def _lookup_codes(self, keys: np.ndarray):
+        if len(self.codes) == 0:
+            return np.zeros(keys.shape, dtype=bool), np.zeros(keys.shape, dtype=np.intp)
+
+        positions = np.searchsorted(self.codes, keys)
+        positions = np.minimum(positions, len(self.codes) - 1)
+        found = self.codes[positions] == keys
+        return found, positions
+
+    def _position(self, code):
+        if not isinstance(code, str):
+            return None
+        if self.packed is not None:
+            key = encode_code(code)
+            if key is None:
+                return None
+            position = int(np.searchsorted(self.packed, KEY_DTYPE(key)))
+            if position < len(self.packed) and self.packed[position] == key:
+                return position
+            return None
+
+        position = int(np.searchsorted(self.codes, code))
+        if position < len(self.codes) and self.codes[position] == code:
+            return position
+        return None
+
+    def __contains__(self, code) -> bool:
+        return self._position(code) is not None
+
+    def __getitem__(self, code):
+        position = self._position(code)
+        if position is None:
+            raise KeyError(code)
+        return self.descriptions[position]
+
+    def __iter__(self):
+        for code in self.codes.tolist():
+            yield code
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
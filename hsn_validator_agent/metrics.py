@@ -0,0 +1,249 @@
+"""
+HSN Validation Metrics
+
+This module records per-stage timings, failure reasons and master/cache state
+in process and renders them in the Prometheus text exposition format for the
+/metrics endpoint.
+
+Stages are timed with a ``StageTimer``: each ``lap(stage)`` records the time
+since the previous lap. When metrics are disabled (``HSN_METRICS=0``) ``timer``
+returns a shared no-op timer and the record functions return immediately, so
+instrumented code costs a function call per stage.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+# Metrics are recorded unless HSN_METRICS is set to 0/false/no
+METRICS_ENABLED = os.environ.get("HSN_METRICS", "1").lower() not in ("0", "false", "no")
+
+# Content type of the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Timed stages of a validation request
+STAGES = ("parse", "load", "normalize", "format", "existence", "hierarchy", "serialize")
+
+# Failure reasons counted for invalid codes (bounded, unlike the error messages)
+FAILURE_REASONS = ("empty", "non_digit", "bad_length", "not_found", "missing_parent")
+
+# Histogram bucket upper bounds in seconds, from per-code to master load scale
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_lock = threading.Lock()
+_enabled = METRICS_ENABLED
+
+
+class Histogram:
+    """Bucketed distribution of observed values with their sum and count."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """Returns ``(upper bound, cumulative count)`` pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+_stage_durations = {stage: Histogram() for stage in STAGES}
+_failures = dict.fromkeys(FAILURE_REASONS, 0)
+_validated = {"valid": 0, "invalid": 0}
+_collectors = []
+
+
+class StageTimer:
+    """Records the time between successive laps into the stage histograms."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Records the time since the previous lap (or creation) under a stage."""
+        now = time.perf_counter()
+        observe_stage(stage, now - self.start)
+        self.start = now
+
+    def reset(self) -> None:
+        """Restarts timing without recording, to skip work that belongs to no stage."""
+        self.start = time.perf_counter()
+
+
+class _NullTimer:
+    def lap(self, stage: str) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def enabled() -> bool:
+    """Returns True if metrics are being recorded."""
+    return _enabled
+
+
+def set_enabled(flag: bool) -> None:
+    """Turns metric recording on or off at runtime."""
+    global _enabled
+    _enabled = bool(flag)
+
+
+def timer():
+    """Returns a stage timer, or a no-op timer when metrics are disabled."""
+    return StageTimer() if _enabled else _NULL_TIMER
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Records the duration of one stage."""
+    if not _enabled:
+        return
+    with _lock:
+        _stage_durations[stage].observe(seconds)
+
+
+def failure_reason(result: dict):
+    """Returns the failure reason of a per-code result dict, or None if it is valid."""
+    if result.get("valid", False):
+        return None
+    if not result.get("format_valid", False):
+        error = result.get("error") or ""
+        if error == "HSN code is empty":
+            return "empty"
+        if error.startswith("HSN code length"):
+            return "bad_length"
+        return "non_digit"
+    if not result.get("hierarchy_valid", False):
+        return "missing_parent"
+    return "not_found"
+
+
+def record_result(result: dict) -> None:
+    """Counts one per-code validation result."""
+    if not _enabled:
+        return
+    reason = failure_reason(result)
+    with _lock:
+        if reason is None:
+            _validated["valid"] += 1
+        else:
+            _validated["invalid"] += 1
+            _failures[reason] += 1
+
+
+def record_columns(columns: dict) -> None:
+    """Counts the results of a columnar batch validation by failure reason."""
+    if not _enabled:
+        return
+    import numpy as np
+
+    format_valid = columns["format_valid"]
+    hierarchy_valid = columns["hierarchy_valid"]
+    valid = int(np.count_nonzero(columns["valid"]))
+
+    # Format failures are rare, so only those codes are inspected
+    bad_format = columns["code"][~format_valid]
+    empty = int(np.count_nonzero(np.char.str_len(bad_format) == 0))
+    digits = int(np.count_nonzero(np.char.isdigit(bad_format)))
+    counts = {
+        "empty": empty,
+        "non_digit": len(bad_format) - empty - digits,
+        "bad_length": digits,
+        "missing_parent": int(np.count_nonzero(format_valid & ~hierarchy_valid)),
+        "not_found": int(np.count_nonzero(format_valid & hierarchy_valid & ~columns["exists_in_database"]))
+    }
+
+    with _lock:
+        _validated["valid"] += valid
+        _validated["invalid"] += len(format_valid) - valid
+        for reason, count in counts.items():
+            _failures[reason] += count
+
+
+def register_collector(collector) -> None:
+    """Registers a callable returning samples to include in every scrape.
+
+    The callable returns a list of ``(name, help, samples)`` tuples, where
+    samples is a list of ``(labels dict, value)`` pairs. Samples are gauges
+    unless the tuple has a fourth element with the metric type ("counter"
+    for values that only increase; their names end in ``_total``).
+    """
+    _collectors.append(collector)
+
+
+def reset() -> None:
+    """Clears all recorded timings and counts."""
+    with _lock:
+        for stage in STAGES:
+            _stage_durations[stage] = Histogram()
+        for reason in FAILURE_REASONS:
+            _failures[reason] = 0
+        for key in _validated:
+            _validated[key] = 0
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """Renders all metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP hsn_stage_duration_seconds Time spent in each validation stage",
+        "# TYPE hsn_stage_duration_seconds histogram"
+    ]
+    with _lock:
+        for stage, histogram in _stage_durations.items():
+            for bound, count in histogram.cumulative():
+                lines.append(f'hsn_stage_duration_seconds_bucket{{stage="{stage}",le="{_number(bound)}"}} {count}')
+            lines.append(f'hsn_stage_duration_seconds_sum{{stage="{stage}"}} {_number(histogram.sum)}')
+            lines.append(f'hsn_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines.append("# HELP hsn_codes_validated_total Codes validated by outcome")
+        lines.append("# TYPE hsn_codes_validated_total counter")
+        for outcome, count in _validated.items():
+            lines.append(f'hsn_codes_validated_total{{outcome="{outcome}"}} {count}')
+
+        lines.append("# HELP hsn_validation_failures_total Invalid codes by failure reason")
+        lines.append("# TYPE hsn_validation_failures_total counter")
+        for reason, count in _failures.items():
+            lines.append(f'hsn_validation_failures_total{{reason="{reason}"}} {count}')
+
+    for collector in _collectors:
+        for name, help_text, samples, *metric_type in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type[0] if metric_type else 'gauge'}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
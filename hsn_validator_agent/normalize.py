@@ -0,0 +1,145 @@
+"""
+HSN Code Normalization
+
+This module repairs the lossless formatting differences between how HSN codes
+are written and how they are stored in the master, using NumPy string array
+operations over whole columns:
+
+    - float suffix: "85171290.0" (numeric spreadsheet cells) becomes "85171290"
+    - separators: "8517.12.90", "8517-12-90" and "8517/12/90" become "85171290"
+    - whitespace: "8517 12 90" becomes "85171290"
+    - zero padding: "101" (a numeric cell that lost its leading zero) becomes "0101"
+
+Leading and trailing whitespace is always stripped and is not reported. Master
+codes of odd length are always zero padded; input codes are only padded when
+the padded code exists in the master, so a code with a missing digit keeps its
+length error.
+"""
+
+import numpy as np
+
+# Normalization flags, combined bitwise per code
+FLOAT_SUFFIX = 1
+SEPARATORS = 2
+WHITESPACE = 4
+ZERO_PADDED = 8
+
+NORMALIZATION_NAMES = {
+    FLOAT_SUFFIX: "float_suffix_removed",
+    SEPARATORS: "separators_removed",
+    WHITESPACE: "whitespace_removed",
+    ZERO_PADDED: "zero_padded"
+}
+
+# Characters used to group the digits of a code
+SEPARATOR_CHARS = (".", "-", "/")
+WHITESPACE_CHARS = (" ", "\t", "\u00a0")
+
+# Comma-separated label for every combination of flags
+_LABELS = np.array([
+    ",".join(name for flag, name in NORMALIZATION_NAMES.items() if combination & flag)
+    for combination in range(16)
+], dtype=object)
+
+
+def normalize_codes(codes: np.ndarray, index=None):
+    """Normalizes an array of stripped code strings.
+
+    Args:
+        codes: Unicode array of stripped codes.
+        index: HSN index used to decide zero padding of input codes; when None
+            (the master itself is being normalized) odd-length codes are always padded.
+
+    Returns:
+        tuple: Unicode array of normalized codes and a uint8 array of normalization flags.
+    """
+    flags = np.zeros(len(codes), dtype=np.uint8)
+    if len(codes) == 0:
+        return codes, flags
+
+    # Float suffix of numeric cells: digits followed by exactly ".0"
+    head, dot, tail = np.char.partition(codes, ".").T
+    is_float = (dot == ".") & (tail == "0") & np.char.isdigit(head)
+    codes = np.where(is_float, head, codes)
+    flags[is_float] |= FLOAT_SUFFIX
+
+    # Separators and inner whitespace, only when the rest of the code is digits
+    for characters, flag in ((SEPARATOR_CHARS, SEPARATORS), (WHITESPACE_CHARS, WHITESPACE)):
+        stripped = codes
+        for character in characters:
+            stripped = np.char.replace(stripped, character, "")
+        changed = stripped != codes
+        if not changed.any():
+            continue
+        candidate = stripped
+        for other in WHITESPACE_CHARS + SEPARATOR_CHARS:
+            candidate = np.char.replace(candidate, other, "")
+        repaired = changed & np.char.isdigit(candidate)
+        codes = np.where(repaired, stripped, codes)
+        flags[repaired] |= flag
+
+    # Leading zero lost by numeric storage
+    lengths = np.char.str_len(codes)
+    odd = np.char.isdigit(codes) & (lengths % 2 == 1) & (lengths < 8)
+    if odd.any():
+        padded = np.char.add("0", codes[odd])
+        if index is not None:
+            found, _ = index.lookup(padded)
+            positions = np.flatnonzero(odd)[found]
+            padded = padded[found]
+        else:
+            positions = np.flatnonzero(odd)
+        codes = codes.astype(f"U{max(codes.dtype.itemsize // 4, 1) + 1}")
+        codes[positions] = padded
+        flags[positions] |= ZERO_PADDED
+
+    return codes, flags
+
+
+def normalize_code(code: str, data=None):
+    """Normalizes a single stripped code string, with the same rules as ``normalize_codes``.
+
+    Args:
+        code: Stripped code string.
+        data: ``code -> description`` mapping used to decide zero padding (optional).
+
+    Returns:
+        tuple: The normalized code and its normalization flags.
+    """
+    flags = 0
+
+    head, dot, tail = code.partition(".")
+    if dot and tail == "0" and head.isdigit():
+        code = head
+        flags |= FLOAT_SUFFIX
+
+    for characters, flag in ((SEPARATOR_CHARS, SEPARATORS), (WHITESPACE_CHARS, WHITESPACE)):
+        stripped = code
+        for character in characters:
+            stripped = stripped.replace(character, "")
+        if stripped == code:
+            continue
+        candidate = stripped
+        for other in WHITESPACE_CHARS + SEPARATOR_CHARS:
+            candidate = candidate.replace(other, "")
+        if candidate.isdigit():
+            code = stripped
+            flags |= flag
+
+    if code.isdigit() and len(code) % 2 == 1 and len(code) < 8:
+        padded = "0" + code
+        if data is None or padded in data:
+            code = padded
+            flags |= ZERO_PADDED
+
+    return code, flags
+
+
+def normalization_labels(flags: np.ndarray) -> np.ndarray:
+    """Returns the comma-separated normalization names for an array of flags ("" when none)."""
+    return _LABELS[flags]
+
+
+def normalization_names(flags: int) -> list:
+    """Returns the normalization names for one code's flags."""
+    return [name for flag, name in NORMALIZATION_NAMES.items() if flags & flag]
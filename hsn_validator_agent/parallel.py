@@ -0,0 +1,157 @@
+"""
+Parallel HSN Batch Validation
+
+This module splits very large code lists into chunks and validates them in a
+pool of worker processes. Workers attach to the memory-mapped master snapshot
+once at start-up instead of receiving a pickled copy of the master per task.
+"""
+
+import os
+import struct
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .batch import validate_hsn_columns, columns_to_results, normalize_code_array, summarize_columns
+    from .index import HSNIndex
+    from .snapshot import SNAPSHOT_SUFFIX, open_snapshot, read_snapshot_header, write_snapshot
+    from . import metrics
+except ImportError:
+    from batch import validate_hsn_columns, columns_to_results, normalize_code_array, summarize_columns
+    from index import HSNIndex
+    from snapshot import SNAPSHOT_SUFFIX, open_snapshot, read_snapshot_header, write_snapshot
+    import metrics
+
+# Default number of codes sent to a worker per task
+DEFAULT_CHUNK_SIZE = 100000
+
+# Index attached by each worker process
+_worker_index = None
+
+
+def _attach_worker(snapshot_path: str) -> None:
+    global _worker_index
+    _worker_index = open_snapshot(snapshot_path)
+
+
+def _validate_chunk(codes: np.ndarray) -> dict:
+    return validate_hsn_columns(codes, _worker_index)
+
+
+def _link_snapshot(index):
+    # Hard-links the snapshot the index was opened from, so a rebuild of that
+    # path cannot swap the file under the workers, and keeps the link only if
+    # it still holds the index (load_snapshot rebuilds the path in place when
+    # the master changes)
+    snapshot_path = index.metadata.get("snapshot_path")
+    if not snapshot_path or "source_sha256" not in index.metadata:
+        return None
+
+    link_path = os.path.join(os.path.dirname(os.path.abspath(snapshot_path)), f".hsnidx-{uuid.uuid4().hex}")
+    try:
+        os.link(snapshot_path, link_path)
+    except OSError:
+        return None
+
+    expected = {key: value for key, value in index.metadata.items() if key != "snapshot_path"}
+    try:
+        if read_snapshot_header(link_path) == expected:
+            return link_path
+    except (OSError, ValueError, struct.error):
+        pass
+    os.remove(link_path)
+    return None
+
+
+def _shared_snapshot(index):
+    """Returns a temporary snapshot path holding the index for the workers.
+
+    The snapshot the index was opened from is linked when it still matches the
+    index; otherwise the index is written to a new snapshot.
+    """
+    link_path = _link_snapshot(index)
+    if link_path is not None:
+        return link_path
+
+    fd, snapshot_path = tempfile.mkstemp(suffix=SNAPSHOT_SUFFIX)
+    os.close(fd)
+    write_snapshot(index, snapshot_path)
+    return snapshot_path
+
+
+def validate_hsn_columns_parallel(codes, index, workers: int = None,
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Validates a column of HSN codes across a pool of worker processes.
+
+    Args:
+        codes: List, pandas Series or NumPy array of HSN codes.
+        index: HSN index of the loaded master data.
+        workers: Number of worker processes (defaults to the CPU count).
+        chunk_size: Number of codes per task.
+
+    Returns:
+        dict: Columnar validation results, identical to ``validate_hsn_columns``.
+    """
+    codes = normalize_code_array(codes)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+
+    # Small batches are not worth the cost of starting a pool
+    if workers == 1 or len(codes) <= chunk_size:
+        return validate_hsn_columns(codes, index)
+
+    chunks = [codes[start:start + chunk_size] for start in range(0, len(codes), chunk_size)]
+    snapshot_path = _shared_snapshot(index)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_attach_worker,
+            initargs=(snapshot_path,)
+        ) as executor:
+            parts = list(executor.map(_validate_chunk, chunks))
+    finally:
+        os.remove(snapshot_path)
+
+    # Stage timings stay in the workers; outcomes are counted here
+    columns = {field: np.concatenate([part[field] for part in parts]) for field in parts[0]}
+    metrics.record_columns(columns)
+    return columns
+
+
+def validate_hsn_codes_parallel(codes, index, workers: int = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Validates multiple HSN codes in parallel.
+
+    Args:
+        codes: List, pandas Series or NumPy array of HSN codes.
+        index: HSN index of the loaded master data, or a dataset registry entry
+            (e.g. ``agent.dataset_registry.get(name)``) whose version is reported.
+        workers: Number of worker processes (defaults to the CPU count).
+        chunk_size: Number of codes per task.
+
+    Returns:
+        dict: Validation results for all codes with summary and the ``master_version``
+        of the registry entry (None for a bare index), as returned by ``validate_hsn_codes``.
+    """
+    if codes is None or len(codes) == 0:
+        return {
+            "status": "error",
+            "error_message": "No HSN codes provided for validation"
+        }
+
+    # Registry entries tie the results to the master version they were checked against
+    master_version = None
+    if not isinstance(index, HSNIndex):
+        master_version = index.get("version")
+        index = index["index"]
+
+    columns = validate_hsn_columns_parallel(codes, index, workers, chunk_size)
+    return {
+        "status": "success",
+        "results": columns_to_results(columns),
+        "summary": summarize_columns(columns),
+        "master_version": master_version
+    }
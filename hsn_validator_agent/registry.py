@@ -0,0 +1,157 @@
+"""
+HSN Dataset Registry
+
+This module keeps several HSN master datasets loaded side by side, e.g. the
+pre- and post-amendment tariff schedules or separate customs and GST masters.
+Each dataset is identified by name and every load installs a new immutable
+version; sessions and requests select a dataset by name, so the master data
+itself is loaded once per process and shared.
+
+Sessions refer to a dataset by handle, a dataset name and version, which is
+resolved against the registry on every tool call; the last few versions of
+each dataset stay resolvable so a reload does not change the master under a
+running conversation.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional
+
+try:
+    from .cache import DEFAULT_CACHE_SIZE, ValidationCache
+except ImportError:
+    from cache import DEFAULT_CACHE_SIZE, ValidationCache
+
+# Dataset used when a request or session does not select one
+DEFAULT_DATASET = os.environ.get("HSN_DEFAULT_DATASET", "default")
+
+# Versions kept per dataset for sessions pinned to an earlier version
+RETAINED_VERSIONS = int(os.environ.get("HSN_RETAINED_VERSIONS", "2"))
+
+
+class DatasetRegistry:
+    """Thread-safe registry of named, versioned HSN datasets."""
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE, retained_versions: int = RETAINED_VERSIONS):
+        """Creates an empty registry.
+
+        Args:
+            cache_size: Maximum number of cached validation results per dataset.
+            retained_versions: Versions of each dataset kept resolvable by handle.
+        """
+        self.cache_size = cache_size
+        self.retained_versions = max(retained_versions, 1)
+        self._datasets = {}
+        self._history = {}
+        self._versions = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def cache(self, name: str) -> ValidationCache:
+        """Returns the validation result cache of a dataset, creating it if needed."""
+        with self._lock:
+            return self._cache(name)
+
+    def _cache(self, name: str) -> ValidationCache:
+        if name not in self._caches:
+            self._caches[name] = ValidationCache(self.cache_size)
+        return self._caches[name]
+
+    def install(self, name: str, index, file_path: str):
+        """Publishes a loaded HSN index as the next version of a dataset.
+
+        The new version is built completely before it replaces the current one
+        in a single assignment, so concurrent validations see either version.
+
+        Args:
+            name: Dataset name.
+            index: HSN index of the master data.
+            file_path: Source of the master data.
+
+        Returns:
+            Mapping: The installed, read-only dataset entry.
+        """
+        with self._lock:
+            version = self._versions.get(name, 0) + 1
+            cache = self._cache(name)
+            entry = MappingProxyType({
+                "name": name,
+                "data": index,
+                "version": version,
+                "index": index,
+                "count": len(index),
+                "file_path": file_path,
+                "snapshot_path": index.metadata.get("snapshot_path"),
+                "load_time": datetime.now().isoformat(),
+                "cache": cache
+            })
+
+            # Cached results belong to the previous version
+            cache.clear(version)
+
+            self._versions[name] = version
+            self._datasets[name] = entry
+
+            # Keep the latest versions resolvable for pinned sessions
+            history = self._history.setdefault(name, OrderedDict())
+            history[version] = entry
+            while len(history) > self.retained_versions:
+                history.popitem(last=False)
+        return entry
+
+    def get(self, name: str = None):
+        """Returns the current entry of a dataset, or None if it is not loaded."""
+        return self._datasets.get(name or DEFAULT_DATASET)
+
+    def resolve(self, name: str = None, version: int = None):
+        """Resolves a dataset handle to its entry.
+
+        Args:
+            name: Dataset name (the default dataset if omitted).
+            version: Pinned version; the current version if omitted.
+
+        Returns:
+            Mapping: The dataset entry, or None if the dataset is not loaded or
+                the pinned version is no longer retained.
+        """
+        name = name or DEFAULT_DATASET
+        if version is None:
+            return self._datasets.get(name)
+        return self._history.get(name, {}).get(version)
+
+    def handle(self, name: str = None):
+        """Returns the ``{"dataset", "version"}`` handle of a dataset's current version."""
+        entry = self.get(name)
+        if entry is None:
+            return None
+        return {"dataset": entry["name"], "version": entry["version"]}
+
+    def remove(self, name: str) -> bool:
+        """Unloads a dataset; validations already holding its entry can finish."""
+        with self._lock:
+            self._history.pop(name, None)
+            return self._datasets.pop(name, None) is not None
+
+    def versions(self, name: str = None) -> list:
+        """Returns the retained versions of a dataset, oldest first."""
+        return list(self._history.get(name or DEFAULT_DATASET, {}))
+
+    def names(self) -> list:
+        """Returns the names of the loaded datasets."""
+        return sorted(self._datasets)
+
+    def describe(self, name: str = None) -> Optional[dict]:
+        """Returns the version and size of a dataset without the data itself."""
+        entry = self.get(name)
+        if entry is None:
+            return None
+        return {
+            "name": entry["name"],
+            "version": entry["version"],
+            "count": entry["count"],
+            "file_path": entry["file_path"],
+            "load_time": entry["load_time"]
+        }
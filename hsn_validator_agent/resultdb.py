@@ -0,0 +1,382 @@
+"""
+HSN Validation Result Database
+
+This module keeps validation results on disk in SQLite, keyed by dataset, input
+code and master revision, so a corpus of invoice codes validated once does not
+have to be validated again after every master update.
+
+Every distinct master of a dataset gets the next revision number. When a new
+master is installed it is diffed against the previous one and only the stored
+codes whose result could change are validated again: codes that were added,
+removed or re-described, codes under an added or removed parent, and codes
+whose normalization depends on the change. Only results that actually changed
+get a row for the new revision, so the latest row of a code is always its
+result under the latest master. Each transition produces a change report.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from .batch import PARENT_LEVELS, columns_to_results, normalize_code_array, validate_hsn_columns
+    from .diff import affected_subtrees, diff_masters
+    from .index import DescriptionTable, HSNIndex
+    from .normalize import normalize_codes
+except ImportError:
+    from batch import PARENT_LEVELS, columns_to_results, normalize_code_array, validate_hsn_columns
+    from diff import affected_subtrees, diff_masters
+    from index import DescriptionTable, HSNIndex
+    from normalize import normalize_codes
+
+# SQLite file holding stored results; the database is disabled when unset
+RESULT_DB_PATH = os.environ.get("HSN_RESULT_DB")
+
+# Result fields compared to decide whether a re-validated result changed
+COMPARED_FIELDS = ("code", "valid", "format_valid", "exists_in_database", "hierarchy_valid", "description", "error")
+
+# Changed codes included in a report returned without an explicit limit
+DEFAULT_REPORT_LIMIT = 100
+
+# Rows written per executemany call
+_WRITE_CHUNK = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS masters (
+    dataset TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    code_count INTEGER NOT NULL,
+    installed_at TEXT NOT NULL,
+    code_encoding TEXT,
+    codes BLOB,
+    ids BLOB,
+    offsets BLOB,
+    blob BLOB,
+    PRIMARY KEY (dataset, revision)
+);
+CREATE TABLE IF NOT EXISTS results (
+    dataset TEXT NOT NULL,
+    code TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    normalized TEXT NOT NULL,
+    valid INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (dataset, code, revision)
+);
+CREATE TABLE IF NOT EXISTS reports (
+    dataset TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    report TEXT NOT NULL,
+    PRIMARY KEY (dataset, revision)
+);
+"""
+
+
+def master_fingerprint(index: HSNIndex) -> str:
+    """Returns a content hash of a master's codes and descriptions."""
+    digest = hashlib.sha256()
+    codes = index.packed if index.packed is not None else index.codes
+    digest.update(str(codes.dtype).encode())
+    digest.update(codes.tobytes())
+    descriptions = index.descriptions
+    ids = descriptions.ids if descriptions.ids is not None else np.arange(len(descriptions), dtype=np.uint32)
+    digest.update(np.ascontiguousarray(ids, dtype="<u4").tobytes())
+    digest.update(np.ascontiguousarray(descriptions.offsets, dtype="<i8").tobytes())
+    digest.update(bytes(descriptions.blob))
+    return digest.hexdigest()
+
+
+def _index_columns(index: HSNIndex) -> tuple:
+    # Arrays of a master as stored in the masters table
+    descriptions = index.descriptions
+    ids = descriptions.ids if descriptions.ids is not None else np.arange(len(descriptions), dtype=np.uint32)
+    if index.packed is not None:
+        encoding, codes = "packed", np.ascontiguousarray(index.packed, dtype="<u4").tobytes()
+    else:
+        encoding, codes = index.codes.dtype.str, index.codes.tobytes()
+    return (
+        encoding,
+        codes,
+        np.ascontiguousarray(ids, dtype="<u4").tobytes(),
+        np.ascontiguousarray(descriptions.offsets, dtype="<i8").tobytes(),
+        bytes(descriptions.blob)
+    )
+
+
+def _index_from_columns(encoding: str, codes: bytes, ids: bytes, offsets: bytes, blob: bytes) -> HSNIndex:
+    descriptions = DescriptionTable(np.frombuffer(offsets, dtype="<i8"), blob, np.frombuffer(ids, dtype="<u4"))
+    if encoding == "packed":
+        return HSNIndex(np.frombuffer(codes, dtype="<u4"), descriptions)
+    return HSNIndex(None, descriptions, codes=np.frombuffer(codes, dtype=encoding))
+
+
+def _touches(codes: np.ndarray, changed: np.ndarray, parents_changed: np.ndarray) -> np.ndarray:
+    """Flags codes that are in ``changed`` or have a parent in ``parents_changed``."""
+    touched = np.isin(codes, changed)
+    lengths = np.char.str_len(codes)
+    for level in PARENT_LEVELS:
+        below = lengths > level
+        if below.any():
+            touched[below] |= np.isin(codes[below].astype(f"U{level}"), parents_changed)
+    return touched
+
+
+def _outcome(result: dict) -> dict:
+    return {"valid": result.get("valid", False), "description": result.get("description"), "error": result.get("error")}
+
+
+class ResultDatabase:
+    """SQLite store of validation results with incremental re-validation."""
+
+    def __init__(self, path: str):
+        """Opens (creating if needed) a result database.
+
+        Args:
+            path: Path of the SQLite file.
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def _latest(self, dataset: str):
+        return self._connection.execute(
+            "SELECT revision, fingerprint FROM masters WHERE dataset = ? ORDER BY revision DESC LIMIT 1",
+            (dataset,)
+        ).fetchone()
+
+    def revision(self, dataset: str):
+        """Returns the latest master revision of a dataset, or None."""
+        with self._lock:
+            latest = self._latest(dataset)
+        return latest[0] if latest else None
+
+    def _stored_index(self, dataset: str, revision: int) -> HSNIndex:
+        row = self._connection.execute(
+            "SELECT code_encoding, codes, ids, offsets, blob FROM masters WHERE dataset = ? AND revision = ?",
+            (dataset, revision)
+        ).fetchone()
+        return _index_from_columns(*row)
+
+    def advance(self, dataset: str, index: HSNIndex) -> dict:
+        """Moves a dataset to a new master and re-validates the affected stored codes.
+
+        Args:
+            dataset: Name of the dataset.
+            index: Index of the master that was just installed.
+
+        Returns:
+            dict: Change report of the transition; its status is "unchanged" when
+            the master is the dataset's latest revision already and "initial" for
+            the dataset's first master.
+        """
+        fingerprint = master_fingerprint(index)
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self._latest(dataset)
+                if latest and latest[1] == fingerprint:
+                    connection.execute("COMMIT")
+                    return {"status": "unchanged", "dataset": dataset, "revision": latest[0]}
+
+                revision = latest[0] + 1 if latest else 1
+                report = {
+                    "status": "initial" if latest is None else "updated",
+                    "dataset": dataset,
+                    "from_revision": latest[0] if latest else None,
+                    "revision": revision,
+                    "created_at": datetime.now().isoformat()
+                }
+                if latest:
+                    report.update(self._revalidate(dataset, self._stored_index(dataset, latest[0]), index, revision))
+
+                # Only the latest master is needed for the next diff
+                connection.execute(
+                    "UPDATE masters SET codes = NULL, ids = NULL, offsets = NULL, blob = NULL WHERE dataset = ?",
+                    (dataset,)
+                )
+                connection.execute(
+                    "INSERT INTO masters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (dataset, revision, fingerprint, len(index), report["created_at"]) + _index_columns(index)
+                )
+                connection.execute(
+                    "INSERT INTO reports VALUES (?, ?, ?)", (dataset, revision, json.dumps(report))
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        return summarize_report(report)
+
+    def _revalidate(self, dataset: str, old: HSNIndex, new: HSNIndex, revision: int) -> dict:
+        """Re-validates the stored codes affected by a master change (caller holds a write transaction)."""
+        diff = diff_masters(old, new)
+        added_or_removed = np.concatenate([diff["added"], diff["removed"]])
+        changed = np.concatenate([added_or_removed, diff["redescribed"]])
+
+        # Latest stored row per code (SQLite takes bare columns from the MAX row), without the result documents
+        rows = self._connection.execute(
+            "SELECT code, normalized, MAX(revision) FROM results WHERE dataset = ? GROUP BY code",
+            (dataset,)
+        ).fetchall()
+        inputs = np.array([row[0] for row in rows], dtype=str)
+        old_normalized = np.array([row[1] for row in rows], dtype=str)
+
+        affected = np.zeros(len(rows), dtype=bool)
+        if len(rows):
+            new_normalized, _ = normalize_codes(inputs, new)
+            affected = new_normalized != old_normalized
+            affected |= _touches(old_normalized, changed, added_or_removed)
+            affected |= _touches(new_normalized, changed, added_or_removed)
+
+        changes = []
+        affected_codes = inputs[affected]
+        if len(affected_codes):
+            before = self._results(dataset, affected_codes.tolist())
+            after = columns_to_results(validate_hsn_columns(affected_codes, new))
+            updated = []
+            for code, result in zip(affected_codes.tolist(), after):
+                previous = before[code]
+                if any(previous.get(field) != result.get(field) for field in COMPARED_FIELDS):
+                    updated.append((code, result))
+                    changes.append({"code": code, "before": _outcome(previous), "after": _outcome(result)})
+            self._write(dataset, revision, updated)
+
+        return {
+            "master_diff": {
+                "added": len(diff["added"]),
+                "removed": len(diff["removed"]),
+                "redescribed": len(diff["redescribed"]),
+                "affected_subtrees": affected_subtrees(added_or_removed)
+            },
+            "stored_codes": len(rows),
+            "revalidated": int(np.count_nonzero(affected)),
+            "changed": len(changes),
+            "became_valid": sum(1 for change in changes if change["after"]["valid"] and not change["before"]["valid"]),
+            "became_invalid": sum(1 for change in changes if change["before"]["valid"] and not change["after"]["valid"]),
+            "changes": changes
+        }
+
+    def _results(self, dataset: str, codes: list) -> dict:
+        """Returns the latest stored result of each code that has one."""
+        results = {}
+        for start in range(0, len(codes), 500):
+            chunk = codes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(
+                f"SELECT code, result, MAX(revision) FROM results WHERE dataset = ? AND code IN ({placeholders}) "
+                "GROUP BY code",
+                [dataset] + chunk
+            )
+            for code, result, _ in rows:
+                results[code] = json.loads(result)
+        return results
+
+    def _write(self, dataset: str, revision: int, items: list) -> None:
+        for start in range(0, len(items), _WRITE_CHUNK):
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (dataset, code, revision, result["code"], int(bool(result.get("valid"))), json.dumps(result))
+                    for code, result in items[start:start + _WRITE_CHUNK]
+                ]
+            )
+
+    def record(self, dataset: str, revision: int, codes, results: list) -> int:
+        """Stores the results of codes validated against a master revision.
+
+        Codes that already have a stored result are skipped: their latest row is
+        kept current by ``advance``. Nothing is stored if the dataset has moved
+        to another revision since the codes were validated.
+
+        Args:
+            dataset: Name of the dataset.
+            revision: Master revision the results were computed against.
+            codes: The validated input codes, aligned with ``results``.
+            results: Per-code result dicts.
+
+        Returns:
+            int: Number of newly stored codes.
+        """
+        items = dict(zip(normalize_code_array(codes).tolist(), results))
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self._latest(dataset)
+                if latest is None or latest[0] != revision:
+                    connection.execute("ROLLBACK")
+                    return 0
+
+                known = set()
+                codes = list(items)
+                for start in range(0, len(codes), 500):
+                    chunk = codes[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    known.update(row[0] for row in connection.execute(
+                        f"SELECT DISTINCT code FROM results WHERE dataset = ? AND code IN ({placeholders})",
+                        [dataset] + chunk
+                    ))
+                new_items = [(code, result) for code, result in items.items() if code not in known]
+                self._write(dataset, revision, new_items)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return len(new_items)
+
+    def lookup(self, dataset: str, codes) -> dict:
+        """Returns the stored results of codes under the dataset's latest revision.
+
+        Args:
+            dataset: Name of the dataset.
+            codes: Input codes to look up.
+
+        Returns:
+            dict: Result dict per stored code; codes without a stored result are omitted.
+        """
+        with self._lock:
+            return self._results(dataset, normalize_code_array(codes).tolist())
+
+    def report(self, dataset: str, revision: int = None):
+        """Returns the change report of a revision (the latest by default), or None."""
+        with self._lock:
+            if revision is None:
+                row = self._connection.execute(
+                    "SELECT report FROM reports WHERE dataset = ? ORDER BY revision DESC LIMIT 1", (dataset,)
+                ).fetchone()
+            else:
+                row = self._connection.execute(
+                    "SELECT report FROM reports WHERE dataset = ? AND revision = ?", (dataset, revision)
+                ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stats(self, dataset: str) -> dict:
+        """Returns the stored code count and latest revision of a dataset."""
+        with self._lock:
+            latest = self._latest(dataset)
+            stored = self._connection.execute(
+                "SELECT COUNT(DISTINCT code) FROM results WHERE dataset = ?", (dataset,)
+            ).fetchone()[0]
+        return {"dataset": dataset, "revision": latest[0] if latest else None, "stored_codes": stored}
+
+
+def summarize_report(report: dict, limit: int = 0) -> dict:
+    """Returns a report with at most ``limit`` of its changed codes."""
+    if "changes" not in report:
+        return report
+    return dict(report, changes=report["changes"][:limit])
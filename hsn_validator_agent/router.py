@@ -0,0 +1,186 @@
+"""
+HSN Request Router
+
+This module routes requests in front of the ADK runner. Structured validation
+requests (a JSON ``code``/``codes`` payload or a plain list of codes) are
+answered by calling the validation tools directly; only free-form questions
+go through the LLM agent.
+"""
+
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+try:
+    from .agent import get_hsn_data_info, load_hsn_data, process_hsn_validation_request
+except ImportError:
+    from agent import get_hsn_data_info, load_hsn_data, process_hsn_validation_request
+
+# Input made only of codes separated by commas, semicolons or whitespace
+_CODE_LIST_PATTERN = re.compile(r"^\s*\d+(?:\s*[,;\s]\s*\d+)*\s*[,;]?\s*$")
+_CODE_SEPARATOR_PATTERN = re.compile(r"[,;\s]+")
+
+
+def _codes_request(codes: list) -> dict:
+    codes = [str(code).strip() for code in codes if str(code).strip()]
+    if len(codes) == 1:
+        return {"code": codes[0]}
+    return {"codes": codes}
+
+
+def parse_structured_request(query) -> Optional[dict]:
+    """Detects a structured validation request.
+
+    Args:
+        query: User input, either a dict payload or text.
+
+    Returns:
+        dict: ``{"code": ...}`` or ``{"codes": [...]}`` request, or None for free-form input.
+    """
+    if isinstance(query, dict):
+        return query if ("code" in query or "codes" in query) else None
+
+    if isinstance(query, (list, tuple)):
+        return _codes_request(query) if query else None
+
+    text = str(query).strip()
+    if not text:
+        return None
+
+    # JSON payload or JSON list of codes
+    if text[0] in "{[":
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(payload, dict):
+            return payload if ("code" in payload or "codes" in payload) else None
+        if isinstance(payload, list) and payload and all(isinstance(code, (str, int)) for code in payload):
+            return _codes_request(payload)
+        return None
+
+    # Plain list of digit codes
+    if _CODE_LIST_PATTERN.match(text):
+        return _codes_request(_CODE_SEPARATOR_PATTERN.split(text))
+
+    return None
+
+
+class HSNRequestRouter:
+    """Sends structured requests straight to the validation tools and the rest to the LLM agent."""
+
+    def __init__(self, runner=None, user_id: str = None, session_id: str = None,
+                 master_file: str = "HSN_Master_Data.xlsx"):
+        """Creates a router.
+
+        Args:
+            runner: ADK runner used for free-form requests (optional).
+            user_id: User the runner sessions belong to.
+            session_id: Session used for runner requests.
+            master_file: HSN master data loaded before the first direct validation.
+        """
+        self.runner = runner
+        self.user_id = user_id
+        self.session_id = session_id
+        self.master_file = master_file
+        self._lock = threading.Lock()
+        self.counters = {
+            "direct": {"requests": 0, "total_seconds": 0.0},
+            "llm": {"requests": 0, "total_seconds": 0.0}
+        }
+
+    def _record(self, path: str, elapsed: float) -> None:
+        with self._lock:
+            self.counters[path]["requests"] += 1
+            self.counters[path]["total_seconds"] += elapsed
+
+    def _ensure_data_loaded(self) -> Optional[dict]:
+        if get_hsn_data_info()["loaded"]:
+            return None
+        result = load_hsn_data(self.master_file)
+        return result if result["status"] != "success" else None
+
+    def _session_state(self) -> dict:
+        """Returns the state of the runner session, or an empty dict without one."""
+        if self.runner is None or self.session_id is None:
+            return {}
+        service = self.runner.session_service
+        get_session = getattr(service, "get_session_sync", None) or service.get_session
+        session = get_session(app_name=self.runner.app_name, user_id=self.user_id, session_id=self.session_id)
+        return session.state if session is not None else {}
+
+    def validate_direct(self, request: dict) -> dict:
+        """Validates a structured request without the LLM.
+
+        The request is validated against the dataset version the runner session
+        has selected, as the agent's own tool calls would be, and always
+        returns full per-code results.
+        """
+        error = self._ensure_data_loaded()
+        if error is not None:
+            return error
+
+        handle = self._session_state().get("hsn_dataset")
+        if not handle:
+            return process_hsn_validation_request(request)
+
+        # A copy of the session handle; a move to a newer version is not written back
+        session = SimpleNamespace(state={"hsn_dataset": dict(handle) if isinstance(handle, dict) else handle})
+        return process_hsn_validation_request(dict({"mode": "full"}, **request), session)
+
+    def ask_llm(self, query) -> Optional[str]:
+        """Sends a request through the ADK runner and returns the final response text."""
+        from google.genai import types
+
+        if self.runner is None:
+            raise RuntimeError("No ADK runner configured for free-form requests")
+
+        text = json.dumps(query) if isinstance(query, dict) else str(query)
+        content = types.Content(role='user', parts=[types.Part(text=text)])
+        events = self.runner.run(
+            user_id=self.user_id,
+            session_id=self.session_id,
+            new_message=content
+        )
+        for event in events:
+            if event.is_final_response():
+                return event.content.parts[0].text
+        return None
+
+    def route(self, query) -> dict:
+        """Handles a request on the cheapest path that can answer it.
+
+        Args:
+            query: User input, either a dict payload or text.
+
+        Returns:
+            dict: The path taken ("direct" or "llm") and the response; direct
+                responses are tool results, LLM responses are text.
+        """
+        start = time.perf_counter()
+        request = parse_structured_request(query)
+
+        if request is not None:
+            response = self.validate_direct(request)
+            self._record("direct", time.perf_counter() - start)
+            return {"path": "direct", "response": response}
+
+        response = self.ask_llm(query)
+        self._record("llm", time.perf_counter() - start)
+        return {"path": "llm", "response": response}
+
+    def stats(self) -> dict:
+        """Returns request counts, share of traffic and mean latency per path."""
+        with self._lock:
+            total = sum(path["requests"] for path in self.counters.values())
+            return {
+                name: {
+                    "requests": path["requests"],
+                    "share": path["requests"] / total if total else 0.0,
+                    "mean_latency_seconds": path["total_seconds"] / path["requests"] if path["requests"] else None
+                }
+                for name, path in self.counters.items()
+            }
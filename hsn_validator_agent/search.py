@@ -0,0 +1,141 @@
+"""
+HSN Description Search
+
+This module provides reverse lookup from product descriptions to HSN codes.
+Master descriptions are tokenized into an inverted index whose postings carry
+precomputed BM25 weights, so a query only sums the postings of its terms.
+"""
+
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words that carry no meaning in tariff descriptions
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "its", "not", "of", "on", "or", "other", "than", "the", "their", "to", "with"
+])
+
+# Words whose singular and plural are the same, left unstemmed
+INVARIANT_WORDS = frozenset(["series", "species"])
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Reduces simple English plurals so "computers" matches "computer"."""
+    if token in INVARIANT_WORDS:
+        return token
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list:
+    """Splits a description into lowercase, stemmed terms without stopwords.
+
+    Args:
+        text: Product or tariff description.
+
+    Returns:
+        list: Terms in order of appearance.
+    """
+    return [
+        _stem(token)
+        for token in _TOKEN_PATTERN.findall(str(text).lower())
+        if token not in STOPWORDS
+    ]
+
+
+class HSNSearchIndex:
+    """BM25-ranked inverted index over HSN master descriptions."""
+
+    def __init__(self, index):
+        """Tokenizes every description of the HSN index and builds the postings.
+
+        Args:
+            index: HSN index of the loaded master data.
+        """
+        self.index = index
+        count = len(index.codes)
+
+        postings = defaultdict(dict)
+        lengths = np.zeros(count, dtype=np.float32)
+        for position in range(count):
+            terms = tokenize(index.descriptions[position])
+            lengths[position] = len(terms)
+            for term in terms:
+                documents = postings[term]
+                documents[position] = documents.get(position, 0) + 1
+
+        # Postings stored contiguously per term (CSR layout)
+        self.vocabulary = {}
+        offsets = [0]
+        documents, frequencies = [], []
+        for term_id, (term, term_postings) in enumerate(postings.items()):
+            self.vocabulary[term] = term_id
+            documents.extend(term_postings.keys())
+            frequencies.extend(term_postings.values())
+            offsets.append(len(documents))
+
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.documents = np.asarray(documents, dtype=np.int32)
+        frequencies = np.asarray(frequencies, dtype=np.float32)
+
+        # BM25 weight of every posting, computed once
+        average_length = float(lengths.mean()) if count and lengths.mean() > 0 else 1.0
+        document_frequency = np.diff(self.offsets).astype(np.float32)
+        idf = np.log(1.0 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+        norms = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[self.documents] / average_length)
+        self.weights = (
+            np.repeat(idf, np.diff(self.offsets)) * frequencies * (BM25_K1 + 1.0) / (frequencies + norms)
+        ).astype(np.float32)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Returns the HSN codes whose descriptions best match a query.
+
+        Args:
+            query: Product description, e.g. "laptop computer".
+            limit: Maximum number of results.
+
+        Returns:
+            list: Matches with code, description and BM25 score, best first.
+        """
+        term_ids = {self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary}
+        if not term_ids or limit <= 0:
+            return []
+
+        # Sum the weights of every posting of the query terms per document
+        slices = [slice(self.offsets[term_id], self.offsets[term_id + 1]) for term_id in term_ids]
+        documents = np.concatenate([self.documents[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+        matched, inverse = np.unique(documents, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        if len(matched) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(matched))
+        # Highest score first, shorter (more general) codes first on ties, then by code
+        codes = self.index.codes[matched[top]]
+        top = top[np.lexsort((codes, np.char.str_len(codes), -scores[top]))]
+
+        return [
+            {
+                "code": str(self.index.codes[position]),
+                "description": self.index.descriptions[position],
+                "score": round(float(score), 4)
+            }
+            for position, score in zip(matched[top].tolist(), scores[top].tolist())
+        ]
+
+    def search_many(self, queries, limit: int = 10) -> list:
+        """Runs several queries and returns their results in input order."""
+        return [{"query": query, "matches": self.search(query, limit)} for query in queries]
@@ -0,0 +1,489 @@
+"""
+HSN Master Snapshot
+
+This module compiles the HSN master file (Excel, CSV, Parquet or Arrow) into a
+compact binary snapshot that can be memory-mapped and opened in milliseconds,
+instead of parsing the source file on every process start.
+
+Snapshot layout (all sections 64-byte aligned):
+    magic (8 bytes) | header length (uint32) | JSON header
+    codes        - sorted uint32 packed codes, or a fixed-width unicode array
+                   when some code cannot be packed ("code_encoding" in the header)
+    ids          - uint32 description id of every code
+    offsets      - int64 array of description offsets (distinct descriptions + 1 entries)
+    descriptions - UTF-8 blob of the distinct descriptions
+
+The header also records the source file fingerprint and the audit of the
+master rows (see ``audit``), so loads that open an existing snapshot still
+know whether the master was clean.
+
+Usage:
+    python snapshot.py HSN_Master_Data.xlsx [-o HSN_Master_Data.xlsx.hsnidx] [--strict]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+try:
+    from .audit import audit_master
+    from .encoding import KEY_DTYPE
+    from .index import DescriptionTable, HSNIndex
+    from .normalize import normalize_codes
+except ImportError:
+    from audit import audit_master
+    from encoding import KEY_DTYPE
+    from index import DescriptionTable, HSNIndex
+    from normalize import normalize_codes
+
+# Snapshot file identification
+SNAPSHOT_MAGIC = b"HSNIDX\x00\x01"
+SNAPSHOT_VERSION = 5
+SNAPSHOT_SUFFIX = ".hsnidx"
+
+# Section alignment in bytes
+_ALIGNMENT = 64
+
+# Columns required in every master data file
+MASTER_COLUMNS = ["HSNCode", "Description"]
+
+# Master data file extensions and their formats
+MASTER_FILE_FORMATS = {
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow"
+}
+
+
+class MasterDataError(ValueError):
+    """Raised when the HSN master data file has an invalid layout."""
+
+
+class MasterAuditError(MasterDataError):
+    """Raised in strict mode when the HSN master fails its audit."""
+
+    def __init__(self, source_path: str, audit: dict):
+        problems = ", ".join(f"{count} {check}" for check, count in audit["counts"].items() if count)
+        super().__init__(f"HSN master data {source_path} failed the audit: {problems}")
+        self.audit = audit
+
+
+def require_clean_audit(index: HSNIndex, source_path: str) -> None:
+    """Raises ``MasterAuditError`` if the audit recorded for an index found problems.
+
+    Indexes without a recorded audit (e.g. built directly from a dict) pass.
+    """
+    audit = index.metadata.get("audit")
+    if audit is not None and not audit["clean"]:
+        raise MasterAuditError(source_path, audit)
+
+
+def default_snapshot_path(source_path: str) -> str:
+    """Returns the default snapshot location for a master data file."""
+    return source_path + SNAPSHOT_SUFFIX
+
+
+def master_file_format(file_path: str) -> str:
+    """Returns the master data format ("excel", "csv", "parquet" or "arrow") from the file extension."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in MASTER_FILE_FORMATS:
+        raise MasterDataError(
+            f"Unsupported HSN master data format '{extension}'. "
+            f"Use one of: {', '.join(sorted(MASTER_FILE_FORMATS))}"
+        )
+    return MASTER_FILE_FORMATS[extension]
+
+
+def _check_columns(columns) -> None:
+    missing_columns = [col for col in MASTER_COLUMNS if col not in columns]
+    if missing_columns:
+        raise MasterDataError(f"Missing required columns in HSN master data: {', '.join(missing_columns)}")
+
+
+def _read_columnar_master(file_path: str, file_format: str):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(file_path)
+        _check_columns(schema.names)
+        table = pq.read_table(file_path, columns=MASTER_COLUMNS)
+    else:
+        import pyarrow.feather as feather
+
+        table = feather.read_table(file_path)
+        _check_columns(table.column_names)
+
+    # HSN codes and descriptions are read as strings regardless of the stored type
+    codes = pc.cast(table.column("HSNCode"), pa.string())
+    descriptions = pc.fill_null(pc.cast(table.column("Description"), pa.string()), "")
+    return codes.to_pylist(), descriptions.to_pylist()
+
+
+def read_master_file(file_path: str) -> dict:
+    """Reads an HSN master file into a ``code -> description`` dict.
+
+    Later rows of a duplicated code replace earlier ones; ``read_master_rows``
+    returns every row for auditing.
+
+    Args:
+        file_path: Path to the file containing HSN codes and descriptions.
+
+    Returns:
+        dict: Mapping of HSN code strings to descriptions.
+
+    Raises:
+        MasterDataError: If the format is unsupported or required columns are missing.
+    """
+    codes, descriptions, _ = read_master_rows(file_path)
+    return dict(zip(codes.tolist(), descriptions))
+
+
+def read_master_rows(file_path: str) -> tuple:
+    """Reads the rows of an HSN master file.
+
+    Excel, CSV, Parquet and Arrow (Feather/IPC) files are supported; the
+    HSNCode column is always read as text and normalized (see ``normalize``),
+    so numeric cells such as 101 or 85171290.0 become "0101" and "85171290".
+
+    Args:
+        file_path: Path to the file containing HSN codes and descriptions.
+
+    Returns:
+        tuple: Unicode array of the normalized code, list of the description and
+        array of the normalization flags of every row.
+
+    Raises:
+        MasterDataError: If the format is unsupported or required columns are missing.
+    """
+    file_format = master_file_format(file_path)
+    if file_format in ("parquet", "arrow"):
+        codes, descriptions = _read_columnar_master(file_path, file_format)
+        return _normalized_master(codes, descriptions)
+
+    import pandas as pd
+
+    if file_format == "csv":
+        df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(file_path, dtype={"HSNCode": str})
+
+    # Check if required columns exist
+    _check_columns(df.columns)
+
+    # Convert HSN codes to string format (for handling numeric codes stored as numbers)
+    df['HSNCode'] = df['HSNCode'].astype(str)
+    df['Description'] = df['Description'].fillna("").astype(str)
+
+    return _normalized_master(df['HSNCode'], df['Description'].tolist())
+
+
+def _normalized_master(codes, descriptions) -> tuple:
+    codes = np.char.strip(np.asarray(codes, dtype=str))
+    codes, flags = normalize_codes(codes)
+    return codes, descriptions, flags
+
+
+def _file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_fingerprint(source_path: str, with_hash: bool = True) -> dict:
+    stat = os.stat(source_path)
+    fingerprint = {
+        "source_path": os.path.abspath(source_path),
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size
+    }
+    if with_hash:
+        fingerprint["source_sha256"] = _file_sha256(source_path)
+    return fingerprint
+
+
+def _align(offset: int) -> int:
+    return int(math.ceil(offset / _ALIGNMENT) * _ALIGNMENT)
+
+
+def write_snapshot(code_dict, snapshot_path: str, fingerprint: dict = None) -> str:
+    """Writes a snapshot of the master data atomically.
+
+    Args:
+        code_dict: Mapping of HSN code strings to descriptions, or an ``HSNIndex``.
+        snapshot_path: Destination path of the snapshot.
+        fingerprint: Source file fingerprint stored in the header (optional).
+
+    Returns:
+        str: Path of the written snapshot.
+    """
+    index = code_dict if isinstance(code_dict, HSNIndex) else HSNIndex.from_dict(code_dict)
+    descriptions = index.descriptions
+    if not isinstance(descriptions, DescriptionTable) or descriptions.ids is None:
+        descriptions = DescriptionTable.from_strings([descriptions[i] for i in range(len(index))])
+
+    if index.packed is not None:
+        code_array = np.ascontiguousarray(index.packed, dtype="<u4")
+        code_encoding = "packed"
+    else:
+        code_array = np.ascontiguousarray(index.codes)
+        code_encoding = "unicode"
+    ids = np.ascontiguousarray(descriptions.ids, dtype="<u4")
+    offsets = np.ascontiguousarray(descriptions.offsets, dtype="<i8")
+    blob = bytes(descriptions.blob)
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "count": len(index),
+        "code_encoding": code_encoding,
+        "code_width": code_array.dtype.itemsize // 4,
+        "description_count": len(offsets) - 1,
+        **(fingerprint or {})
+    }
+
+    # Reserve room for the header using placeholder offsets of maximum width
+    prefix = len(SNAPSHOT_MAGIC) + 4
+    for key in ("codes_offset", "ids_offset", "offsets_offset", "blob_offset", "blob_size"):
+        header[key] = 10 ** 18
+    reserved = len(json.dumps(header).encode("utf-8"))
+
+    header["codes_offset"] = _align(prefix + reserved)
+    header["ids_offset"] = _align(header["codes_offset"] + code_array.nbytes)
+    header["offsets_offset"] = _align(header["ids_offset"] + ids.nbytes)
+    header["blob_offset"] = _align(header["offsets_offset"] + offsets.nbytes)
+    header["blob_size"] = len(blob)
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".hsnidx-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for offset, payload in (
+                (header["codes_offset"], code_array.tobytes()),
+                (header["ids_offset"], ids.tobytes()),
+                (header["offsets_offset"], offsets.tobytes()),
+                (header["blob_offset"], blob)
+            ):
+                f.write(b"\x00" * (offset - f.tell()))
+                f.write(payload)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return snapshot_path
+
+
+def read_snapshot_header(snapshot_path: str) -> dict:
+    """Reads the JSON header of a snapshot without mapping its data.
+
+    Args:
+        snapshot_path: Path of the snapshot.
+
+    Returns:
+        dict: The snapshot header.
+
+    Raises:
+        ValueError: If the file is not a compatible snapshot.
+    """
+    with open(snapshot_path, "rb") as f:
+        magic = f.read(len(SNAPSHOT_MAGIC))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not an HSN snapshot: {snapshot_path}")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported HSN snapshot version: {header.get('version')}")
+    return header
+
+
+def open_snapshot(snapshot_path: str) -> HSNIndex:
+    """Opens a snapshot as a memory-mapped, read-only HSN index.
+
+    Args:
+        snapshot_path: Path of the snapshot.
+
+    Returns:
+        HSNIndex: Index whose arrays are views over the mapped file.
+    """
+    header = read_snapshot_header(snapshot_path)
+    count = header["count"]
+
+    with open(snapshot_path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if header["code_encoding"] == "packed":
+        packed = np.frombuffer(buffer, dtype="<u4", count=count, offset=header["codes_offset"]).view(KEY_DTYPE)
+        codes = None
+    else:
+        packed = None
+        codes = np.frombuffer(
+            buffer, dtype=f"<U{header['code_width']}", count=count, offset=header["codes_offset"]
+        )
+    ids = np.frombuffer(buffer, dtype="<u4", count=count, offset=header["ids_offset"])
+    offsets = np.frombuffer(
+        buffer, dtype="<i8", count=header["description_count"] + 1, offset=header["offsets_offset"]
+    )
+    blob = memoryview(buffer)[header["blob_offset"]:header["blob_offset"] + header["blob_size"]]
+
+    metadata = dict(header, snapshot_path=snapshot_path)
+    return HSNIndex(packed, DescriptionTable(offsets, blob, ids), metadata=metadata, codes=codes)
+
+
+def snapshot_is_fresh(snapshot_path: str, source_path: str) -> bool:
+    """Checks whether a snapshot was compiled from the current source file.
+
+    The source mtime and size are compared first; the content hash is only
+    computed when they differ (for example after a copy or ``touch``).
+
+    Args:
+        snapshot_path: Path of the snapshot.
+        source_path: Path of the master data file.
+
+    Returns:
+        bool: True if the snapshot matches the source file.
+    """
+    if not os.path.exists(snapshot_path):
+        return False
+
+    try:
+        header = read_snapshot_header(snapshot_path)
+    except (ValueError, OSError, struct.error):
+        return False
+
+    current = _source_fingerprint(source_path, with_hash=False)
+    if (header.get("source_mtime_ns") == current["source_mtime_ns"]
+            and header.get("source_size") == current["source_size"]):
+        return True
+
+    return header.get("source_sha256") == _file_sha256(source_path)
+
+
+def compile_snapshot(source_path: str, snapshot_path: str = None, strict: bool = False) -> str:
+    """Compiles the master data file into a binary snapshot.
+
+    The master rows are audited on the way and the audit is stored in the
+    snapshot header.
+
+    Args:
+        source_path: Path of the master data file.
+        snapshot_path: Destination path (defaults to ``<source>.hsnidx``).
+        strict: Refuse to write the snapshot of a master that fails the audit.
+
+    Returns:
+        str: Path of the written snapshot.
+
+    Raises:
+        MasterAuditError: In strict mode, if the master fails the audit.
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(source_path)
+    fingerprint = _source_fingerprint(source_path)
+    codes, descriptions, flags = read_master_rows(source_path)
+    fingerprint["audit"] = audit_master(codes, descriptions, flags=flags)
+    if strict and not fingerprint["audit"]["clean"]:
+        raise MasterAuditError(source_path, fingerprint["audit"])
+    return write_snapshot(dict(zip(codes.tolist(), descriptions)), snapshot_path, fingerprint)
+
+
+def load_snapshot(source_path: str, snapshot_path: str = None, strict: bool = False) -> HSNIndex:
+    """Opens the snapshot for a master file, rebuilding it first if stale.
+
+    Falls back to an in-memory index when the snapshot cannot be written.
+
+    Args:
+        source_path: Path of the master data file.
+        snapshot_path: Snapshot path (defaults to ``<source>.hsnidx``).
+        strict: Refuse a master that fails the audit.
+
+    Returns:
+        HSNIndex: The loaded index; its ``metadata["audit"]`` holds the audit.
+
+    Raises:
+        MasterAuditError: In strict mode, if the master fails the audit.
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(source_path)
+
+    if not snapshot_is_fresh(snapshot_path, source_path):
+        try:
+            compile_snapshot(source_path, snapshot_path, strict)
+        except OSError:
+            codes, descriptions, flags = read_master_rows(source_path)
+            index = HSNIndex.from_dict(dict(zip(codes.tolist(), descriptions)))
+            index.metadata["audit"] = audit_master(codes, descriptions, flags=flags)
+            if strict:
+                require_clean_audit(index, source_path)
+            return index
+
+    index = open_snapshot(snapshot_path)
+    if strict:
+        require_clean_audit(index, source_path)
+    return index
+
+
+def publish_snapshot(source_path: str, snapshot_path: str = None, strict: bool = False) -> str:
+    """Publishes the snapshot that worker processes attach to.
+
+    Intended to run once in a loader process (for example a gunicorn master
+    hook) so that workers only ever map the finished file read-only.
+
+    Args:
+        source_path: Path of the master data file.
+        snapshot_path: Snapshot path (defaults to ``<source>.hsnidx``).
+        strict: Refuse to publish a master that fails the audit.
+
+    Returns:
+        str: Path of the published snapshot.
+
+    Raises:
+        MasterAuditError: In strict mode, if the master fails the audit.
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(source_path)
+    if not snapshot_is_fresh(snapshot_path, source_path):
+        compile_snapshot(source_path, snapshot_path, strict)
+    elif strict:
+        audit = read_snapshot_header(snapshot_path).get("audit")
+        if audit is not None and not audit["clean"]:
+            raise MasterAuditError(source_path, audit)
+    return snapshot_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the HSN master into a binary snapshot")
+    parser.add_argument("source", help="Path to the HSN master file (Excel, CSV, Parquet or Arrow)")
+    parser.add_argument("-o", "--output", help="Snapshot path (default: <source>.hsnidx)")
+    parser.add_argument("--strict", action="store_true", help="Do not publish a master that fails the audit")
+    args = parser.parse_args()
+
+    try:
+        path = publish_snapshot(args.source, args.output, args.strict)
+    except MasterAuditError as e:
+        print(json.dumps(e.audit, indent=2))
+        raise SystemExit(str(e))
+    header = read_snapshot_header(path)
+    print(f"Published {header['count']} HSN codes in {path}")
+    audit = header.get("audit")
+    if audit is not None and not audit["clean"]:
+        problems = ", ".join(f"{count} {check}" for check, count in audit["counts"].items() if count)
+        print(f"Warning: the master failed the audit ({problems})")
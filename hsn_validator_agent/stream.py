@@ -0,0 +1,285 @@
+"""
+Streaming HSN File Validation
+
+This module validates the HSN column of large CSV/XLSX invoice files in
+fixed-size chunks, so memory use stays bounded regardless of file size.
+Results are produced incrementally as CSV or NDJSON text, or written chunk by
+chunk to an Arrow IPC stream or Parquet file.
+
+Usage:
+    python stream.py invoices.csv --column HSNCode --format ndjson -o results.ndjson
+    python stream.py invoices.csv --column HSNCode --format parquet -o results.parquet
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import zipfile
+
+import pandas as pd
+
+try:
+    from .batch import validate_hsn_columns, columns_to_results, summarize_columns
+    from .columnar import COLUMNAR_FORMATS, ColumnarWriter
+    from .snapshot import load_snapshot
+except ImportError:
+    from batch import validate_hsn_columns, columns_to_results, summarize_columns
+    from columnar import COLUMNAR_FORMATS, ColumnarWriter
+    from snapshot import load_snapshot
+
+# Default number of rows validated per chunk
+DEFAULT_CHUNK_SIZE = 50000
+
+# Output formats and their MIME types
+OUTPUT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+# Columns written to CSV output
+RESULT_FIELDS = [
+    "row", "code", "valid", "format_valid", "exists_in_database",
+    "hierarchy_valid", "description", "error", "normalized_from", "normalizations"
+]
+
+
+def detect_file_format(file_name: str) -> str:
+    """Returns "xlsx" or "csv" based on the file extension."""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        return "xlsx"
+    return "csv"
+
+
+def _iter_csv_chunks(source, column: str, chunk_size: int):
+    try:
+        reader = pd.read_csv(
+            source,
+            usecols=[column],
+            dtype=str,
+            keep_default_na=False,
+            chunksize=chunk_size
+        )
+    except pd.errors.EmptyDataError as e:
+        raise ValueError("Input file is empty") from e
+    except ValueError as e:
+        raise ValueError(f"Column '{column}' not found in input file") from e
+
+    with reader:
+        for chunk in reader:
+            yield chunk[column].to_numpy()
+
+
+def _iter_xlsx_chunks(source, column: str, chunk_size: int):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True)
+    except zipfile.BadZipFile as e:
+        raise ValueError("Input file is not a valid Excel workbook") from e
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("Input file is empty")
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found in input file")
+        position = header.index(column)
+
+        chunk = []
+        for row in rows:
+            value = row[position] if position < len(row) else None
+            chunk.append("" if value is None else value)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def iter_code_chunks(source, column: str = "HSNCode", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     file_format: str = "csv"):
+    """Reads the HSN column of an invoice file in chunks.
+
+    Args:
+        source: Path or binary file object of the invoice file.
+        column: Name of the column containing HSN codes.
+        chunk_size: Number of rows per chunk.
+        file_format: "csv" or "xlsx".
+
+    Yields:
+        Sequence of HSN codes for each chunk.
+    """
+    if file_format == "xlsx":
+        yield from _iter_xlsx_chunks(source, column, chunk_size)
+    else:
+        yield from _iter_csv_chunks(source, column, chunk_size)
+
+
+def _format_chunk(columns: dict, first_row: int, output_format: str) -> str:
+    buffer = io.StringIO()
+    if output_format == "ndjson":
+        for row, result in enumerate(columns_to_results(columns), start=first_row):
+            buffer.write(json.dumps(dict(result, row=row)))
+            buffer.write("\n")
+    else:
+        rows = range(first_row, first_row + len(columns["code"]))
+        csv.writer(buffer).writerows(zip(rows, *(columns[field].tolist() for field in RESULT_FIELDS[1:])))
+    return buffer.getvalue()
+
+
+def stream_validation(source, index, column: str = "HSNCode", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      file_format: str = "csv", output_format: str = "csv", progress=None):
+    """Validates an invoice file chunk by chunk and yields formatted results.
+
+    Args:
+        source: Path or binary file object of the invoice file.
+        index: HSN index of the loaded master data.
+        column: Name of the column containing HSN codes.
+        chunk_size: Number of rows per chunk.
+        file_format: Input format, "csv" or "xlsx".
+        output_format: Output format, "csv" or "ndjson".
+        progress: Callback called with the summary after each chunk (optional).
+
+    Yields:
+        str: Formatted results, one piece per chunk.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    # Read the first chunk before emitting anything so a missing column fails early
+    chunks = iter_code_chunks(source, column, chunk_size, file_format)
+    first_chunk = next(chunks, None)
+
+    summary = {"total": 0, "valid": 0, "invalid": 0}
+    if output_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(RESULT_FIELDS)
+        yield buffer.getvalue()
+
+    if first_chunk is None:
+        return
+
+    for codes in itertools.chain([first_chunk], chunks):
+        columns = validate_hsn_columns(codes, index)
+        first_row = summary["total"] + 1
+
+        for key, count in summarize_columns(columns).items():
+            summary[key] += count
+
+        yield _format_chunk(columns, first_row, output_format)
+
+        if progress:
+            progress(dict(summary))
+
+
+def validate_file_columnar(source, index, sink, column: str = "HSNCode", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           file_format: str = "csv", output_format: str = "parquet", progress=None) -> dict:
+    """Validates an invoice file chunk by chunk into an Arrow IPC stream or Parquet file.
+
+    Args:
+        source: Path or binary file object of the invoice file.
+        index: HSN index of the loaded master data.
+        sink: Path or binary file object the results are written to.
+        column: Name of the column containing HSN codes.
+        chunk_size: Number of rows per chunk (one Parquet row group / Arrow batch each).
+        file_format: Input format, "csv" or "xlsx".
+        output_format: Output format, "arrow" or "parquet".
+        progress: Callback called with the summary after each chunk (optional).
+
+    Returns:
+        dict: Total, valid and invalid counts.
+    """
+    chunks = iter_code_chunks(source, column, chunk_size, file_format)
+    summary = {"total": 0, "valid": 0, "invalid": 0}
+
+    with ColumnarWriter(sink, output_format) as writer:
+        for codes in chunks:
+            columns = validate_hsn_columns(codes, index)
+            writer.write(columns)
+
+            for key, count in summarize_columns(columns).items():
+                summary[key] += count
+
+            if progress:
+                progress(dict(summary))
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the HSN column of a large CSV/XLSX file")
+    parser.add_argument("input", help="Path to the CSV or XLSX invoice file")
+    parser.add_argument("-c", "--column", default="HSNCode", help="Name of the HSN code column")
+    parser.add_argument("-f", "--format", choices=sorted(set(OUTPUT_FORMATS) | set(COLUMNAR_FORMATS)),
+                        default="csv", help="Output format (arrow and parquet require --output)")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("-m", "--master", default="HSN_Master_Data.xlsx", help="HSN master data file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    args = parser.parse_args()
+
+    if args.format in COLUMNAR_FORMATS and not args.output:
+        parser.error(f"--output is required for {args.format} output")
+
+    index = load_snapshot(args.master)
+    file_format = detect_file_format(args.input)
+    file_size = os.path.getsize(args.input)
+    source = open(args.input, "rb")
+    summary = {}
+
+    def report(progress_summary: dict):
+        summary.update(progress_summary)
+        message = f"\rValidated {progress_summary['total']:,} rows ({progress_summary['invalid']:,} invalid)"
+        if file_format == "csv" and file_size:
+            message += f" - {min(source.tell() / file_size, 1.0):.1%} of input read"
+        sys.stderr.write(message)
+        sys.stderr.flush()
+
+    if args.format in COLUMNAR_FORMATS:
+        try:
+            validate_file_columnar(
+                source,
+                index,
+                args.output,
+                column=args.column,
+                chunk_size=args.chunk_size,
+                file_format=file_format,
+                output_format=args.format,
+                progress=report
+            )
+        finally:
+            source.close()
+
+        sys.stderr.write("\n")
+        print(json.dumps({"summary": summary}), file=sys.stderr)
+        return
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for piece in stream_validation(
+            source,
+            index,
+            column=args.column,
+            chunk_size=args.chunk_size,
+            file_format=file_format,
+            output_format=args.format,
+            progress=report
+        ):
+            output.write(piece)
+    finally:
+        source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    sys.stderr.write("\n")
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+HSN Code Suggestions
+
+This module suggests the closest valid HSN codes for an invalid one. Candidates
+come from a precomputed deletion-neighbourhood index (every master code with
+one digit removed), so a lookup costs a few dict probes per input digit
+instead of a scan over the whole master:
+
+    - substituted digit: input and code share a deletion at the same position
+    - missing / extra digit: input equals a deletion of the code, or vice versa
+    - transposed digits: an adjacent swap of the input is a master code
+    - two edits: input and code share a deletion at different positions
+    - sibling: codes at the same level under the deepest existing ancestor
+"""
+
+import heapq
+from collections import defaultdict
+
+import numpy as np
+
+try:
+    from .normalize import normalize_codes
+except ImportError:
+    from normalize import normalize_codes
+
+# Bits used to store the deleted position alongside the code position
+_POSITION_BITS = 5
+
+# Preference between suggestions with the same edit distance
+REASON_PRIORITY = {
+    "transposed_digits": 0,
+    "substituted_digit": 1,
+    "missing_digit": 2,
+    "extra_digit": 3,
+    "two_edits": 4,
+    "sibling": 5
+}
+
+
+def _common_prefix_length(first: str, second: str) -> int:
+    length = 0
+    for a, b in zip(first, second):
+        if a != b:
+            break
+        length += 1
+    return length
+
+
+def _edit_distance(first: str, second: str) -> int:
+    """Optimal string alignment distance (Levenshtein with adjacent transpositions)."""
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i, a in enumerate(first, start=1):
+        current = [i] + [0] * len(second)
+        for j, b in enumerate(second, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a != b)
+            )
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a == second[j - 2] and first[i - 2] == b):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class HSNSuggester:
+    """Deletion-neighbourhood index over the master codes for "did you mean" lookups."""
+
+    def __init__(self, index):
+        """Builds the deletion index for every code in the HSN index.
+
+        Args:
+            index: HSN index of the loaded master data.
+        """
+        self.index = index
+        self.codes = index.codes.tolist()
+        self.positions = {code: position for position, code in enumerate(self.codes)}
+
+        deletions = defaultdict(list)
+        for position, code in enumerate(self.codes):
+            for i in range(len(code)):
+                deletions[code[:i] + code[i + 1:]].append((position << _POSITION_BITS) | i)
+        self.deletions = dict(deletions)
+
+    def _candidates(self, code: str) -> dict:
+        candidates = {}
+
+        def add(position, distance, reason):
+            current = candidates.get(position)
+            rank = (distance, REASON_PRIORITY[reason])
+            if current is None or rank < (current[0], REASON_PRIORITY[current[1]]):
+                candidates[position] = (distance, reason)
+
+        # Input is a master code with one digit missing
+        for entry in self.deletions.get(code, ()):
+            add(entry >> _POSITION_BITS, 1, "missing_digit")
+
+        for i in range(len(code)):
+            deleted = code[:i] + code[i + 1:]
+
+            # Input has one extra digit
+            position = self.positions.get(deleted)
+            if position is not None:
+                add(position, 1, "extra_digit")
+
+            # Input and code differ by one substitution (same position) or two edits
+            for entry in self.deletions.get(deleted, ()):
+                if (entry & ((1 << _POSITION_BITS) - 1)) == i:
+                    add(entry >> _POSITION_BITS, 1, "substituted_digit")
+                else:
+                    add(entry >> _POSITION_BITS, 2, "two_edits")
+
+        # Adjacent digits swapped
+        for i in range(len(code) - 1):
+            if code[i] == code[i + 1]:
+                continue
+            swapped = code[:i] + code[i + 1] + code[i] + code[i + 2:]
+            position = self.positions.get(swapped)
+            if position is not None:
+                add(position, 1, "transposed_digits")
+
+        candidates.pop(self.positions.get(code), None)
+        return candidates
+
+    def _siblings(self, code: str, limit: int) -> list:
+        """Codes at the same level as the input under its deepest existing ancestor."""
+        if not code.isdigit():
+            return []
+
+        hierarchy = self.index.hierarchy
+        ancestor = hierarchy.nearest_ancestor(code)
+        if ancestor is None:
+            return []
+
+        start, end = hierarchy.subtree_range(ancestor)
+        level = len(code) if len(code) > len(ancestor) else len(ancestor) + 2
+        siblings = np.flatnonzero(hierarchy.lengths[start:end] == level) + start
+        if len(siblings) == 0:
+            return []
+
+        # Closest tariff numbers first
+        target = int(code[:level].ljust(level, "0"))
+        gaps = np.abs(self.index.codes[siblings].astype(np.int64) - target)
+        return siblings[np.argsort(gaps, kind="stable")[:limit]].tolist()
+
+    def _normalize(self, codes: list) -> list:
+        # The same repairs as validation (separators, float suffixes, lost leading zeros)
+        normalized, _ = normalize_codes(np.array(codes, dtype=str), self.index)
+        return normalized.tolist()
+
+    def suggest(self, code: str, limit: int = 5) -> list:
+        """Returns the closest valid codes for an HSN code.
+
+        Args:
+            code: The (invalid) HSN code; it is normalized like validation input.
+            limit: Maximum number of suggestions.
+
+        Returns:
+            list: Suggestions with code, description, edit distance and reason, best first.
+        """
+        return self._suggest(self._normalize([str(code).strip()])[0], limit)
+
+    def _suggest(self, code: str, limit: int) -> list:
+        candidates = self._candidates(code)
+
+        # Fill up with siblings when there are too few near misses
+        if len(candidates) < limit:
+            for position in self._siblings(code, limit):
+                if len(candidates) >= limit:
+                    break
+                if position not in candidates and self.codes[position] != code:
+                    candidates[position] = (_edit_distance(code, self.codes[position]), "sibling")
+
+        ranked = heapq.nsmallest(
+            limit,
+            candidates.items(),
+            key=lambda item: (
+                item[1][0],
+                -_common_prefix_length(code, self.codes[item[0]]),
+                REASON_PRIORITY[item[1][1]],
+                self.codes[item[0]]
+            )
+        )
+
+        return [
+            {
+                "code": self.codes[position],
+                "description": self.index.descriptions[position],
+                "distance": distance,
+                "reason": reason
+            }
+            for position, (distance, reason) in ranked
+        ]
+
+    def suggest_many(self, codes, limit: int = 5) -> dict:
+        """Returns suggestions for several codes, keyed by the stripped input and computing each distinct code once."""
+        inputs = list(dict.fromkeys(str(code).strip() for code in codes))
+        if not inputs:
+            return {}
+        return {
+            code: self._suggest(normalized, limit)
+            for code, normalized in zip(inputs, self._normalize(inputs))
+        }
@@ -0,0 +1,86 @@
+"""Shared fixtures for the HSN validator tests.
+
+The modules are imported the way the servers import them, from inside the
+``hsn_validator_agent`` directory, which is also where the bundled master
+data file is looked up.
+"""
+
+import csv
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+os.chdir(PACKAGE_DIR)
+
+
+def write_master(path, rows) -> str:
+    """Writes a CSV master file from ``(code, description)`` rows."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["HSNCode", "Description"])
+        writer.writerows(rows)
+    return str(path)
+
+
+CLEAN_MASTER = [
+    ("01", "Live animals"),
+    ("0101", "Live horses, asses, mules and hinnies"),
+    ("010121", "Pure-bred breeding animals"),
+    ("01012100", "Pure-bred breeding horses"),
+    ("85", "Electrical machinery and equipment"),
+    ("8517", "Telephone sets"),
+    ("851712", "Telephones for cellular networks"),
+    ("85171290", "Other telephones for cellular networks"),
+]
+
+
+@pytest.fixture
+def clean_master(tmp_path):
+    """Path of a small master file that passes the audit."""
+    return write_master(tmp_path / "master.csv", CLEAN_MASTER)
+
+
+@pytest.fixture
+def agent_module(clean_master):
+    """The agent module with the clean master loaded as the default dataset."""
+    import agent
+
+    result = agent.load_hsn_data(clean_master)
+    assert result["status"] == "success", result
+    yield agent
+    agent.validation_cache.clear(agent.validation_cache.version)
+
+
+@pytest.fixture
+def datasets():
+    """Names of datasets a test loads; they are unloaded afterwards."""
+    import agent
+
+    names = []
+    yield names
+    for name in names:
+        agent.dataset_registry.remove(name)
+
+
+@pytest.fixture
+def client(agent_module):
+    """Flask test client serving the clean master."""
+    import app
+
+    return app.app.test_client()
+
+
+@pytest.fixture
+def served_master(agent_module, clean_master, monkeypatch):
+    """Points the web servers' master data file at the clean master."""
+    import api
+
+    monkeypatch.setattr(api, "MASTER_DATA_FILE", clean_master)
+    monkeypatch.setattr(api, "SHARED_INDEX_PATH", None)
+    monkeypatch.setattr(api, "EXTRA_DATASETS", {})
+    return clean_master
@@ -0,0 +1,137 @@
+"""Load-time master audit and strict mode."""
+
+import os
+
+import numpy as np
+import pytest
+
+from audit import audit_master, audit_summary
+from conftest import CLEAN_MASTER, write_master
+from normalize import ZERO_PADDED
+from snapshot import MasterAuditError, compile_snapshot, default_snapshot_path, load_snapshot
+
+UNCLEAN_ROWS = [
+    ("01", "Live animals"),
+    ("0101", "Horses"),
+    ("0101", "Horses"),
+    ("85", "Machinery"),
+    ("8517", "Telephones"),
+    ("8517", "Phones"),
+    ("90011000", "Optical fibres"),
+    ("85A7", "Not a code"),
+    ("851", "Too short"),
+    ("851712", " "),
+    ("", "No code"),
+]
+
+
+def _audit(rows, **kwargs):
+    codes = np.array([code for code, _ in rows], dtype=str)
+    return audit_master(codes, [description for _, description in rows], **kwargs)
+
+
+def test_clean_master():
+    audit = _audit(CLEAN_MASTER)
+
+    assert audit["clean"]
+    assert (audit["rows"], audit["codes"]) == (len(CLEAN_MASTER), len(CLEAN_MASTER))
+    assert not any(audit["counts"].values())
+    assert not any(audit["examples"].values())
+
+
+def test_every_problem_is_reported():
+    flags = np.zeros(len(UNCLEAN_ROWS), dtype=np.uint8)
+    flags[1] = ZERO_PADDED
+
+    audit = _audit(UNCLEAN_ROWS, flags=flags)
+
+    assert not audit["clean"]
+    assert (audit["rows"], audit["codes"]) == (11, 9)
+    assert audit["examples"] == {
+        "duplicate_codes": ["0101", "8517"],
+        "conflicting_duplicates": [{"code": "8517", "descriptions": ["Telephones", "Phones"]}],
+        "format_errors": [
+            {"row": 8, "code": "85A7", "reason": "non_digit"},
+            {"row": 9, "code": "851", "reason": "bad_length"},
+            {"row": 11, "code": "", "reason": "empty"},
+        ],
+        "hierarchy_gaps": [{"code": "90011000", "missing_parents": ["90", "9001", "900110"]}],
+        "empty_descriptions": [{"row": 10, "code": "851712"}],
+        "padded_codes": [{"row": 2, "code": "0101", "normalizations": ["zero_padded"]}],
+    }
+    assert audit["counts"] == {check: len(examples) for check, examples in audit["examples"].items()}
+    assert "examples" not in audit_summary(audit)
+
+
+def test_repeated_rows_and_padding_keep_a_master_clean():
+    rows = CLEAN_MASTER + [("0101", "Live horses, asses, mules and hinnies")]
+    flags = np.full(len(rows), ZERO_PADDED, dtype=np.uint8)
+
+    audit = _audit(rows, flags=flags)
+
+    assert audit["clean"]
+    assert audit["counts"]["duplicate_codes"] == 1
+    assert audit["counts"]["padded_codes"] == len(rows)
+
+
+def test_examples_are_limited():
+    rows = [("90", "Optical instruments")] + [(f"9001{n:04d}", "Fibres") for n in range(30)]
+
+    audit = _audit(rows, limit=5)
+
+    assert audit["counts"]["hierarchy_gaps"] == 30
+    assert len(audit["examples"]["hierarchy_gaps"]) == 5
+
+
+@pytest.mark.parametrize("rows", [
+    # Hierarchy gap: no 4- or 6-digit parent for the 8-digit code
+    [("90", "Optical instruments"), ("90011000", "Optical fibres")],
+    # Conflicting duplicate
+    CLEAN_MASTER + [("8517", "Something else")],
+    # Empty description
+    CLEAN_MASTER + [("0102", "")],
+])
+def test_strict_mode_refuses_an_unclean_master(tmp_path, rows):
+    master = write_master(tmp_path / "master.csv", rows)
+
+    with pytest.raises(MasterAuditError) as excinfo:
+        load_snapshot(master, strict=True)
+    assert not excinfo.value.audit["clean"]
+
+    with pytest.raises(MasterAuditError):
+        compile_snapshot(master, strict=True)
+    assert not os.path.exists(default_snapshot_path(master))
+
+    # The same master loads outside strict mode, with the audit attached
+    index = load_snapshot(master)
+    assert not index.metadata["audit"]["clean"]
+
+
+def test_strict_mode_refuses_a_stale_clean_snapshot_rebuilt_unclean(clean_master):
+    load_snapshot(clean_master, strict=True)
+    write_master(clean_master, CLEAN_MASTER + [("90011000", "Optical fibres")])
+
+    with pytest.raises(MasterAuditError):
+        load_snapshot(clean_master, strict=True)
+
+
+def test_zero_padded_codes_do_not_fail_strict_mode(tmp_path):
+    rows = [(code.lstrip("0"), description) for code, description in CLEAN_MASTER]
+    master = write_master(tmp_path / "master.csv", rows)
+
+    index = load_snapshot(master, strict=True)
+    audit = index.metadata["audit"]
+    assert audit["clean"]
+    assert audit["counts"]["padded_codes"] == 4
+    assert "01012100" in index
+
+
+def test_agent_reports_strict_refusal(tmp_path):
+    import agent
+
+    master = write_master(tmp_path / "master.csv", [("90011000", "Optical fibres")])
+    result = agent.load_hsn_data(master, dataset="strict-test", strict=True)
+
+    assert result["status"] == "error"
+    assert result["audit"]["counts"]["hierarchy_gaps"] > 0
+    assert agent.dataset_registry.get("strict-test") is None
@@ -0,0 +1,61 @@
+"""Batch and single-code validation must return the same results."""
+
+import random
+
+import pytest
+
+INPUTS = [
+    "01", "0101", "010121", "01012100", "85", "8517", "851712", "85171290",
+    "8517.12.90", "8517 12 90", " 85171290 ", "85171290.0", "101", "1", "8517129",
+    "85171299", "99", "9999", "", "   ", "ABCD", "85A7", "123", "12345", "1234567890",
+    "851712901", "0", "00000000",
+]
+
+
+def random_inputs(count: int = 200, seed: int = 0) -> list:
+    """Returns the fixed inputs followed by random 2-8 digit codes."""
+    rng = random.Random(seed)
+    generated = ["".join(rng.choice("0123456789") for _ in range(rng.choice([2, 4, 6, 8])))
+                 for _ in range(count)]
+    return INPUTS + generated
+
+
+def _assert_parity(agent_module, codes):
+    batch = agent_module.validate_hsn_codes(codes)
+    assert batch["status"] == "success"
+
+    agent_module.validation_cache.clear(agent_module.validation_cache.version)
+    single = [agent_module.validate_hsn_code(code) for code in codes]
+
+    assert len(batch["results"]) == len(codes)
+    for code, batch_result, single_result in zip(codes, batch["results"], single):
+        assert batch_result == single_result, code
+
+
+def test_batch_matches_single_code_validation(agent_module):
+    _assert_parity(agent_module, random_inputs())
+
+
+@pytest.mark.parametrize("codes", [
+    [101, 8517.0],
+    [85171290, 1.5],
+    [101, "8517", 85171290],
+    [85171290.0, 101.0],
+])
+def test_mixed_type_batches_match_single_code_validation(agent_module, codes):
+    _assert_parity(agent_module, codes)
+
+
+def test_mixed_int_float_batch_is_not_coerced_to_floats(agent_module):
+    result = agent_module.validate_hsn_codes([101, 8517.0])["results"][0]
+
+    assert result["code"] == "0101"
+    assert result["normalized_from"] == "101"
+    assert result["normalizations"] == ["zero_padded"]
+
+
+def test_duplicate_codes_share_one_result(agent_module):
+    results = agent_module.validate_hsn_codes(["85171290", "9999", "85171290"])["results"]
+
+    assert results[0] == results[2]
+    assert results[0]["valid"] and not results[1]["valid"]
@@ -0,0 +1,93 @@
+"""LRU result cache and its binding to the master version."""
+
+from cache import ValidationCache
+from conftest import CLEAN_MASTER, write_master
+
+
+def _cache(maxsize=3, version=1):
+    cache = ValidationCache(maxsize)
+    cache.clear(version)
+    return cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache()
+    for code in ("01", "0101", "85"):
+        cache.put(code, {"code": code}, 1)
+    cache.get("01", 1)
+    cache.put("8517", {"code": "8517"}, 1)
+
+    assert cache.get("0101", 1) is None
+    assert cache.get("01", 1) == {"code": "01"}
+    assert cache.stats()["size"] == 3
+
+
+def test_cached_results_are_copies():
+    cache = _cache()
+    result = {"code": "85", "valid": True}
+    cache.put("85", result, 1)
+    result["valid"] = False
+    cache.get("85", 1)["valid"] = False
+
+    assert cache.get("85", 1) == {"code": "85", "valid": True}
+
+
+def test_other_versions_are_ignored():
+    cache = _cache()
+    cache.put("85", {"code": "85"}, 1)
+    cache.put("01", {"code": "01"}, 2)
+
+    assert cache.get("85", 2) is None
+    assert cache.get("01", 1) is None
+
+    cache.clear(2)
+    assert cache.get("85", 2) is None
+    assert cache.stats()["version"] == 2
+
+
+def test_resize_and_disabled_cache():
+    cache = _cache(maxsize=3)
+    for code in ("01", "0101", "85"):
+        cache.put(code, {"code": code}, 1)
+    cache.resize(1)
+    assert cache.stats()["size"] == 1
+    assert cache.get("85", 1) == {"code": "85"}
+
+    disabled = _cache(maxsize=0)
+    disabled.put("85", {"code": "85"}, 1)
+    assert disabled.get("85", 1) is None
+
+
+def test_stats_count_hits_and_misses():
+    cache = _cache()
+    cache.put("85", {"code": "85"}, 1)
+    cache.get("85", 1)
+    cache.get("01", 1)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_repeated_validations_are_answered_from_the_cache(agent_module):
+    before = agent_module.get_validation_cache_stats()
+    first = agent_module.validate_hsn_code("85171290")
+    second = agent_module.validate_hsn_code("85171290")
+    after = agent_module.get_validation_cache_stats()
+
+    assert first == second
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_reload_drops_the_cache(agent_module, clean_master):
+    agent_module.validate_hsn_code("85171290")
+    old_version = agent_module.get_validation_cache_stats()["version"]
+    assert agent_module.get_validation_cache_stats()["size"] > 0
+
+    write_master(clean_master, [(code, "Amended " + description) for code, description in CLEAN_MASTER])
+    assert agent_module.load_hsn_data(clean_master)["status"] == "success"
+
+    stats = agent_module.get_validation_cache_stats()
+    assert stats["size"] == 0
+    assert stats["version"] == old_version + 1
+    assert agent_module.validate_hsn_code("85171290")["description"].startswith("Amended")
@@ -0,0 +1,126 @@
+"""Coalesced single-code requests and single-code payloads."""
+
+import asyncio
+import json
+
+import pytest
+
+import api
+from coalesce import MicroBatcher
+from test_batch import random_inputs
+
+
+@pytest.mark.parametrize("batch_threshold", [1, 10000])
+def test_coalesced_single_codes_match_single_code_validation(agent_module, batch_threshold):
+    codes = random_inputs()
+    coalesced = agent_module.process_hsn_single_codes(codes, batch_threshold=batch_threshold)
+    agent_module.validation_cache.clear(agent_module.validation_cache.version)
+
+    for code, result in zip(codes, coalesced):
+        assert result == agent_module.process_hsn_validation_request({"code": code}), code
+
+
+def test_coalesced_requests_match_validate_payload(agent_module):
+    payloads = [{"code": code, "dataset": None} for code in ("85171290", "9999", "101", "85171290")]
+    payloads.append({"code": "0101", "dataset": "missing"})
+
+    responses = api.validate_single_codes([api.single_code_request(payload) for payload in payloads])
+
+    assert responses == [api.validate_payload(payload) for payload in payloads]
+
+
+@pytest.mark.parametrize("code", [85171290, 85171290.0, " 85171290 "])
+def test_numeric_single_codes_are_validated(agent_module, code):
+    result = api.validate_payload({"code": code})
+
+    assert result["status"] == "success"
+    assert result["results"][0]["code"] == "85171290" and result["results"][0]["valid"]
+    assert api.single_code_request({"code": code}) == {"code": str(code).strip(), "dataset": None}
+    assert api.suggest_payload({"code": code})["status"] == "success"
+
+
+@pytest.mark.parametrize("code", [None, "", "  "])
+def test_empty_single_codes_are_an_error(agent_module, code):
+    assert api.validate_payload({"code": code}) == {"status": "error", "message": "HSN code is empty"}
+    assert api.single_code_request({"code": code}) is None
+    assert api.suggest_payload({"code": code}) == {"status": "error", "message": "No HSN codes provided"}
+
+
+def test_validate_endpoint_accepts_numeric_and_null_codes(client):
+    number = client.post("/validate", data='{"code": 85171290}', content_type="application/json")
+    null = client.post("/validate", data='{"code": null}', content_type="application/json")
+
+    assert number.status_code == 200 and number.get_json()["results"][0]["valid"]
+    assert null.status_code == 200 and null.get_json()["message"] == "HSN code is empty"
+
+
+def _run_batcher(batcher, requests, stagger=0.0):
+    async def run():
+        async def submit(position, request):
+            await asyncio.sleep(position * stagger)
+            return await batcher.process(request)
+        return await asyncio.gather(*(submit(position, request) for position, request in enumerate(requests)),
+                                    return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_batcher_groups_concurrent_requests():
+    batches = []
+
+    def handler(requests):
+        batches.append(list(requests))
+        return [request * 2 for request in requests]
+
+    batcher = MicroBatcher(handler, window_ms=50, max_batch=4)
+
+    assert _run_batcher(batcher, list(range(10))) == [request * 2 for request in range(10)]
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert batcher.stats() == {"window_ms": 50.0, "max_batch": 4, "requests": 10, "batches": 3,
+                               "mean_batch_size": 10 / 3, "largest_batch": 4, "pending": 0}
+
+
+def test_batcher_closes_a_batch_after_its_window():
+    batches = []
+
+    def handler(requests):
+        batches.append(list(requests))
+        return requests
+
+    batcher = MicroBatcher(handler, window_ms=1, max_batch=100)
+
+    assert _run_batcher(batcher, ["a", "b", "c"], stagger=0.05) == ["a", "b", "c"]
+    assert batches == [["a"], ["b"], ["c"]]
+
+
+def test_batcher_passes_handler_errors_to_every_caller():
+    def handler(requests):
+        raise ValueError("handler failed")
+
+    batcher = MicroBatcher(handler, window_ms=10, max_batch=8)
+
+    results = _run_batcher(batcher, [1, 2, 3])
+
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert batcher.stats()["pending"] == 0
+    # The batcher keeps serving after a failed batch
+    batcher.handler = lambda requests: requests
+    assert _run_batcher(batcher, [4]) == [4]
+
+
+def test_asgi_coalesces_numeric_codes(agent_module, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import asgi
+
+    batcher = MicroBatcher(api.validate_single_codes, window_ms=1)
+    monkeypatch.setattr(asgi, "single_code_batcher", batcher)
+    client = TestClient(asgi.app)
+
+    number = client.post("/validate", content=json.dumps({"code": 85171290}))
+    null = client.post("/validate", content=json.dumps({"code": None}))
+
+    assert number.json() == api.validate_payload({"code": "85171290"})
+    assert null.json() == {"status": "error", "message": "HSN code is empty"}
+    assert batcher.stats()["requests"] == 1
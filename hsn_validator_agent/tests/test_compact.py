@@ -0,0 +1,107 @@
+"""Compact batch results for agent tool calls and their detail pages."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from compact import (COMPACT_THRESHOLD, MAX_CODES_PER_REASON, MAX_VALID_CODES, ResultStore, compact_results,
+                     page_results)
+
+
+def _session():
+    return SimpleNamespace(state={})
+
+
+def _results(valid, invalid, reason="Code does not exist in HSN database"):
+    return ([{"code": code, "valid": True} for code in valid]
+            + [{"code": code, "valid": False, "error": reason} for code in invalid])
+
+
+def test_invalid_codes_are_grouped_by_reason_largest_first():
+    results = _results(["01"], ["98"]) + _results([], ["9A", "9B", "9A"], "HSN code must contain only digits")
+    compact = compact_results(results, {"total": 5, "valid": 1, "invalid": 4}, "abc")
+
+    reasons = compact["invalid_by_reason"]
+    assert [group["reason"] for group in reasons] == ["HSN code must contain only digits",
+                                                      "Code does not exist in HSN database"]
+    assert reasons[0]["count"] == 3 and reasons[0]["codes"] == ["9A", "9B"]
+    assert compact["valid_codes"] == {"count": 1, "distinct": 1, "codes": ["01"], "truncated": False}
+    assert compact["result_id"] == "abc"
+
+
+def test_long_code_lists_are_truncated():
+    valid = [f"{code:08d}" for code in range(MAX_VALID_CODES + 10)]
+    invalid = [f"9{code:07d}" for code in range(MAX_CODES_PER_REASON + 5)]
+
+    compact = compact_results(_results(valid, invalid), {})
+
+    assert len(compact["valid_codes"]["codes"]) == MAX_VALID_CODES and compact["valid_codes"]["truncated"]
+    group = compact["invalid_by_reason"][0]
+    assert group["count"] == len(invalid)
+    assert len(group["codes"]) == MAX_CODES_PER_REASON and group["truncated"]
+
+
+def test_pages_cover_every_result_once():
+    results = _results([str(code) for code in range(7)], [str(code) for code in range(7, 12)])
+
+    pages = [page_results(results, page, 5) for page in (1, 2, 3)]
+
+    assert [result for page in pages for result in page["results"]] == results
+    assert [page["has_more"] for page in pages] == [True, True, False]
+    assert pages[0]["total_pages"] == 3
+    assert page_results(results, 1, 50, "invalid")["total_results"] == 5
+    assert page_results([], 1)["total_pages"] == 1
+
+
+def test_result_store_evicts_the_oldest_set():
+    store = ResultStore(maxsize=2)
+    first = store.put([1], 1)
+    second = store.put([2], 1)
+    store.get(first)
+    store.put([3], 2)
+
+    assert store.get(second) is None
+    assert store.get(first) == {"results": [1], "master_version": 1}
+
+
+def test_large_agent_batches_are_compact_and_smaller(agent_module):
+    codes = ["85171290", "9999", "0101", "ABCD"] * (COMPACT_THRESHOLD // 2)
+
+    compact = agent_module.process_hsn_validation_request({"codes": codes}, _session())
+    full = agent_module.process_hsn_validation_request({"codes": codes, "mode": "full"}, _session())
+
+    assert compact["mode"] == "compact"
+    assert compact["summary"] == full["summary"]
+    assert compact["master_version"] == full["master_version"]
+    assert len(json.dumps(compact)) < len(json.dumps(full)) / 2
+
+
+def test_small_and_non_agent_batches_are_full(agent_module):
+    small = agent_module.process_hsn_validation_request({"codes": ["85171290"] * COMPACT_THRESHOLD}, _session())
+    api_call = agent_module.process_hsn_validation_request({"codes": ["85171290"] * (COMPACT_THRESHOLD + 1)})
+
+    assert "mode" not in small and len(small["results"]) == COMPACT_THRESHOLD
+    assert "mode" not in api_call
+
+
+def test_details_return_the_full_results(agent_module):
+    codes = [f"{code:04d}" for code in range(COMPACT_THRESHOLD + 5)] + ["85171290"]
+    compact = agent_module.process_hsn_validation_request({"codes": codes}, _session())
+    full = agent_module.validate_hsn_codes(codes)["results"]
+
+    pages = [agent_module.get_validation_details(compact["result_id"], page, 10) for page in (1, 2, 3)]
+    invalid = agent_module.get_validation_details(compact["result_id"], status="invalid")
+
+    assert [result for page in pages for result in page["results"]] == full
+    assert invalid["total_results"] == compact["summary"]["invalid"]
+    assert pages[0]["master_version"] == compact["master_version"]
+
+
+@pytest.mark.parametrize("result_id, status", [("missing", "all"), (None, "broken")])
+def test_details_errors(agent_module, result_id, status):
+    if result_id is None:
+        result_id = agent_module.process_hsn_validation_request(
+            {"codes": ["85171290"] * (COMPACT_THRESHOLD + 1)}, _session())["result_id"]
+
+    assert agent_module.get_validation_details(result_id, status=status)["status"] == "error"
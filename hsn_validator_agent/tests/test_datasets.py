@@ -0,0 +1,83 @@
+"""Named HSN datasets served side by side, and malformed /validate payloads."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import api
+from conftest import CLEAN_MASTER, write_master
+
+MALFORMED_PAYLOADS = [[1, 2], ["85171290"], ["code"], "85171290", "code", 5, True]
+
+
+@pytest.fixture
+def customs(agent_module, tmp_path, datasets):
+    """A second dataset "customs" whose descriptions start with "Customs"."""
+    datasets.append("customs")
+    path = write_master(tmp_path / "customs.csv",
+                        [(code, "Customs " + text) for code, text in CLEAN_MASTER if code != "85171290"])
+    assert agent_module.load_hsn_data(path, dataset="customs")["status"] == "success"
+    return path
+
+
+def test_requests_select_a_dataset_by_name(customs):
+    default = api.validate_payload({"code": "0101"})
+    other = api.validate_payload({"code": "0101", "dataset": "customs"})
+
+    assert not default["results"][0]["description"].startswith("Customs")
+    assert other["results"][0]["description"].startswith("Customs")
+    assert not api.validate_payload({"codes": ["85171290"], "dataset": "customs"})["results"][0]["valid"]
+
+
+def test_unknown_dataset_is_an_error(agent_module):
+    result = api.validate_payload({"code": "0101", "dataset": "missing"})
+
+    assert result["status"] == "error"
+    assert "missing" in result["error_message"]
+
+
+def test_sessions_select_a_dataset(agent_module, customs):
+    session = SimpleNamespace(state={})
+
+    selected = agent_module.select_hsn_dataset("customs", session)
+    result = agent_module.validate_hsn_code("0101", session)
+
+    assert selected["status"] == "success"
+    assert session.state["hsn_dataset"] == {"dataset": "customs", "version": selected["master_version"]}
+    assert result["description"].startswith("Customs")
+    assert agent_module.list_hsn_datasets(session)["selected"] == "customs"
+    assert agent_module.select_hsn_dataset("missing", session)["status"] == "error"
+
+
+def test_datasets_are_listed(client, customs):
+    body = client.get("/datasets").get_json()
+
+    names = [dataset["name"] for dataset in body["datasets"]]
+    assert "customs" in names and body["default"] in names
+    customs_info = body["datasets"][names.index("customs")]
+    assert customs_info["count"] == len(CLEAN_MASTER) - 1
+
+
+def test_datasets_keep_separate_caches(customs):
+    api.validate_payload({"code": "0101"})
+    api.validate_payload({"code": "0101", "dataset": "customs"})
+
+    assert api.validate_payload({"code": "0101"})["results"][0]["description"] == "Live horses, asses, mules and hinnies"
+
+
+@pytest.mark.parametrize("payload", MALFORMED_PAYLOADS)
+def test_validate_payload_rejects_non_object_payloads(payload):
+    assert api.validate_payload(payload) == {"status": "error", "message": "Invalid request format"}
+
+    body, mimetype = api.validate_payload_columnar(payload, "arrow")
+    assert mimetype is None
+    assert body["message"] == "Invalid request format"
+
+
+@pytest.mark.parametrize("payload", MALFORMED_PAYLOADS)
+def test_validate_endpoint_answers_non_object_payloads(client, payload):
+    response = client.post("/validate", data=json.dumps(payload), content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.get_json()["message"] == "Invalid request format"
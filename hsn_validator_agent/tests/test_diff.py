@@ -0,0 +1,134 @@
+"""Master diffs: the vectorized diff, orphaned children and version comparison."""
+
+import random
+
+import numpy as np
+import pytest
+
+import api
+from conftest import CLEAN_MASTER, write_master
+from diff import diff_masters, diff_report, orphaned_children
+from index import HSNIndex
+
+
+def _random_master(rng, size):
+    master = {}
+    while len(master) < size:
+        code = "".join(rng.choice("0123456789") for _ in range(rng.choice([2, 4, 6, 8])))
+        master[code] = f"Description {rng.randrange(50)}"
+    return master
+
+
+def _naive_diff(old, new):
+    return {
+        "added": {code for code in new if code not in old},
+        "removed": {code for code in old if code not in new},
+        "redescribed": {code for code in new if code in old and old[code] != new[code]}
+    }
+
+
+def _mutate(rng, master):
+    new = dict(master)
+    for code in rng.sample(sorted(new), len(new) // 10):
+        del new[code]
+    for code in rng.sample(sorted(new), len(new) // 10):
+        new[code] += " (amended)"
+    new.update(_random_master(rng, len(master) // 10))
+    return new
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_diff_matches_naive_dict_diff(seed):
+    rng = random.Random(seed)
+    old = _random_master(rng, 2000)
+    new = _mutate(rng, old)
+
+    result = diff_masters(HSNIndex.from_dict(old), HSNIndex.from_dict(new))
+
+    expected = _naive_diff(old, new)
+    for kind, codes in expected.items():
+        assert sorted(result[kind].tolist()) == sorted(codes), kind
+
+
+def test_diff_with_non_numeric_codes():
+    old = {"0101": "Live horses", "ABCD": "Legacy code", "8517": "Telephones"}
+    new = {"0101": "Live horses and asses", "8517": "Telephones", "XYZ1": "New legacy code"}
+
+    result = diff_masters(HSNIndex.from_dict(old), HSNIndex.from_dict(new))
+
+    expected = _naive_diff(old, new)
+    for kind, codes in expected.items():
+        assert sorted(result[kind].tolist()) == sorted(codes), kind
+
+
+def test_diff_of_identical_and_empty_masters():
+    master = {"0101": "Live horses", "8517": "Telephones"}
+
+    same = diff_masters(HSNIndex.from_dict(master), HSNIndex.from_dict(dict(master)))
+    assert all(len(same[kind]) == 0 for kind in ("added", "removed", "redescribed"))
+
+    emptied = diff_masters(HSNIndex.from_dict(master), HSNIndex.from_dict({}))
+    assert sorted(emptied["removed"].tolist()) == sorted(master)
+
+
+@pytest.mark.parametrize("packed", [True, False])
+def test_orphaned_children(packed):
+    master = {"85": "Machinery", "8517": "Telephones", "851712": "Cellular", "85171290": "Other", "8518": "Speakers"}
+    if not packed:
+        master["ABCD"] = "Legacy code"
+    new = HSNIndex.from_dict(master)
+
+    assert (new.packed is not None) == packed
+    assert orphaned_children(new, np.array(["851712"])).tolist() == ["85171290"]
+    assert orphaned_children(new, np.array(["8517", "8518"])).tolist() == ["851712", "85171290"]
+    assert orphaned_children(new, np.array([], dtype=str)).tolist() == []
+
+
+def test_diff_report():
+    old = HSNIndex.from_dict(dict(CLEAN_MASTER))
+    new = HSNIndex.from_dict(dict(
+        [(code, text) for code, text in CLEAN_MASTER if code != "8517"] + [("0101", "Horses"), ("9001", "Fibres")]
+    ))
+
+    report = diff_report(old, new)
+
+    assert report["summary"] == {"added": 1, "removed": 1, "redescribed": 1, "orphaned": 2,
+                                 "unchanged": len(new) - 2}
+    assert report["added"] == [{"code": "9001", "description": "Fibres"}]
+    assert report["redescribed"] == [{"code": "0101", "old_description": "Live horses, asses, mules and hinnies",
+                                      "new_description": "Horses"}]
+    assert report["orphaned"] == [{"code": "851712", "removed_parents": ["8517"]},
+                                  {"code": "85171290", "removed_parents": ["8517"]}]
+    assert report["affected_subtrees"] == ["8517", "9001"]
+    assert [impact["chapter"] for impact in report["chapters"]] == ["01", "85", "90"]
+    assert not report["truncated"]
+    assert diff_report(old, new, limit=1)["truncated"]
+
+
+def test_compare_master_versions(agent_module, clean_master):
+    first = agent_module.dataset_registry.get()["version"]
+    write_master(clean_master, CLEAN_MASTER + [("851713", "Telephones for other wireless networks")])
+    second = agent_module.load_hsn_data(clean_master)["master_version"]
+
+    result = agent_module.compare_hsn_masters()
+
+    assert result["status"] == "success"
+    assert (result["old"]["version"], result["new"]["version"]) == (first, second)
+    assert [change["code"] for change in result["added"]] == ["851713"]
+    assert api.master_diff({"from_version": str(first), "limit": "1"})["added"] == result["added"]
+    assert api.master_diff({"from_version": "first"}) == {"status": "error", "message": "from_version must be an integer"}
+    assert agent_module.compare_hsn_masters(from_version=first - 100)["status"] == "error"
+
+
+def test_compare_datasets(agent_module, tmp_path, datasets):
+    datasets.append("trimmed")
+    path = write_master(tmp_path / "trimmed.csv", CLEAN_MASTER[:4])
+    assert agent_module.load_hsn_data(path, dataset="trimmed")["status"] == "success"
+
+    result = agent_module.compare_hsn_masters(other_dataset="trimmed")
+
+    assert result["status"] == "success"
+    assert result["summary"]["removed"] == 4
+    assert result["affected_subtrees"] == ["85"]
+    assert agent_module.compare_hsn_masters("trimmed")["status"] == "error"
+    assert agent_module.compare_hsn_masters(other_dataset="missing")["status"] == "error"
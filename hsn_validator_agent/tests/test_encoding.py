@@ -0,0 +1,88 @@
+"""Integer-packed HSN codes and the index built on them."""
+
+import random
+
+import numpy as np
+import pytest
+
+from encoding import decode_keys, encode_code, encode_codes, key_lengths, parent_keys
+from index import DescriptionTable, HSNIndex
+
+
+def _random_codes(count, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("0123456789") for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+
+def test_keys_round_trip_and_keep_levels_apart():
+    codes = ["85", "8517", "851700", "85170000", "0", "00", "99999999"]
+    keys, encodable = encode_codes(np.array(codes))
+
+    assert encodable.all()
+    assert decode_keys(keys).tolist() == codes
+    assert len(set(keys.tolist())) == len(codes)
+    assert key_lengths(keys).tolist() == [len(code) for code in codes]
+    assert [encode_code(code) for code in codes] == keys.tolist()
+
+
+def test_keys_sort_like_the_code_strings():
+    codes = _random_codes(5000)
+    keys, _ = encode_codes(np.array(codes))
+
+    assert decode_keys(np.sort(keys)).tolist() == sorted(codes)
+
+
+@pytest.mark.parametrize("code", ["", "123456789", "85A7", "8517.1", "８５", " 85", "-1"])
+def test_codes_that_cannot_be_packed(code):
+    keys, encodable = encode_codes(np.array([code, "85"]))
+
+    assert encodable.tolist() == [False, True]
+    assert keys[0] == 0
+    assert encode_code(code) is None
+
+
+def test_parent_keys_are_the_prefix_keys():
+    codes = [code for code in _random_codes(1000, seed=1) if len(code) == 8]
+    keys, _ = encode_codes(np.array(codes))
+
+    for level in (2, 4, 6):
+        expected, _ = encode_codes(np.array([code[:level] for code in codes]))
+        assert parent_keys(keys, level).tolist() == expected.tolist()
+
+
+def test_packed_index_matches_a_dict():
+    master = {code: f"Description {len(code)}" for code in _random_codes(3000, seed=2)}
+    index = HSNIndex.from_dict(master)
+    probes = _random_codes(2000, seed=3) + list(master)[:500] + ["", "85A7", None]
+
+    assert index.packed is not None and index.packed.dtype == np.uint32
+    assert dict(index) == master
+    for code in probes:
+        assert (code in index) == (code in master)
+    found, positions = index.lookup(np.array([code for code in probes if code is not None]))
+    assert found.tolist() == [code in master for code in probes if code is not None]
+
+
+def test_index_with_non_numeric_codes_falls_back_to_strings():
+    master = {"0101": "Live horses", "ABCD": "Legacy", "8517": "Telephones"}
+    index = HSNIndex.from_dict(master)
+
+    assert index.packed is None
+    assert dict(index) == master
+    assert "ABCD" in index and "9999" not in index
+
+
+def test_packed_index_is_smaller_than_string_codes():
+    master = {code: "Same description" for code in _random_codes(10000, seed=4)}
+    index = HSNIndex.from_dict(master)
+
+    assert index.packed.nbytes * 8 <= np.array(list(master), dtype="<U8").nbytes
+    # Repeated descriptions are stored once
+    assert len(index.descriptions.offsets) == 2
+
+
+def test_description_table_take():
+    table = DescriptionTable.from_strings(["a", "b", "a", "ü"])
+
+    assert table.take(np.array([3, 0, 2])).tolist() == ["ü", "a", "a"]
+    assert len(table) == 4
@@ -0,0 +1,74 @@
+"""Subtree queries of the hierarchy index against a naive scan."""
+
+import random
+
+import numpy as np
+import pytest
+
+from hierarchy import HSNHierarchy
+
+
+def _random_codes(seed: int) -> list:
+    rng = random.Random(seed)
+    codes = set()
+    for _ in range(300):
+        code = "".join(rng.choice("0123") for _ in range(8))
+        for level in (2, 4, 6, 8):
+            if rng.random() < 0.8:
+                codes.add(code[:level])
+    return sorted(codes)
+
+
+def _naive_children(codes, code):
+    return [other for other in codes if other.startswith(code) and len(other) == len(code) + 2]
+
+
+def _naive_leaf_count(codes, code):
+    subtree = [other for other in codes if other.startswith(code)]
+    return sum(1 for other in subtree if not any(x != other and x.startswith(other) for x in codes))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_subtree_queries_match_a_naive_scan(seed):
+    codes = _random_codes(seed)
+    hierarchy = HSNHierarchy(np.array(codes))
+
+    for code in ["0", "01", "0123", "012301", "01230123", "33", "99"] + codes[::17]:
+        children = np.array(codes)[hierarchy.children(code)].tolist() if codes else []
+        assert children == _naive_children(codes, code), code
+        assert hierarchy.subtree_size(code) == sum(1 for other in codes if other.startswith(code)), code
+        assert hierarchy.leaf_count(code) == _naive_leaf_count(codes, code), code
+
+        ancestors = [code[:level] for level in (2, 4, 6) if level < len(code) and code[:level] in codes]
+        assert hierarchy.nearest_ancestor(code) == (ancestors[-1] if ancestors else None), code
+
+
+def test_walk_reports_missing_parents():
+    hierarchy = HSNHierarchy(np.array(["85", "851712", "85171290"]))
+
+    assert hierarchy.walk("85171290") == {"exists": True, "missing_parents": ["8517"]}
+    assert hierarchy.walk("85179999") == {"exists": False, "missing_parents": ["8517", "851799"]}
+
+
+def test_empty_hierarchy():
+    hierarchy = HSNHierarchy(np.array([], dtype="<U8"))
+
+    assert hierarchy.subtree_size("85") == 0
+    assert hierarchy.leaf_count("85") == 0
+    assert hierarchy.nearest_ancestor("85171290") is None
+
+
+def test_agent_hierarchy_tools(agent_module):
+    children = agent_module.get_hsn_children("8517")
+    assert [child["code"] for child in children["children"]] == ["851712"]
+    assert children["children"][0]["description"] == "Telephones for cellular networks"
+
+    leaves = agent_module.count_hsn_leaves("01")
+    assert leaves["leaf_count"] == 1 and leaves["subtree_size"] == 4
+
+    nearest = agent_module.find_nearest_hsn_ancestor("85171299")
+    assert nearest["status"] == "success"
+    assert nearest["nearest_ancestor"] == "851712"
+    assert not nearest["exists_in_database"]
+
+    assert agent_module.find_nearest_hsn_ancestor("9901")["status"] == "error"
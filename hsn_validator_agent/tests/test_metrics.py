@@ -0,0 +1,165 @@
+"""Prometheus text exposition of the validation and reload metrics."""
+
+import re
+
+import pytest
+
+import api
+import metrics
+
+_SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+_LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_exposition(text: str) -> dict:
+    """Parses the text format into ``{name: {"type", "help", "samples": {labels: value}}}``."""
+    families = {}
+    current = None
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, _, help_text = line[7:].partition(" ")
+            assert name not in families, f"{name} declared twice"
+            current = families[name] = {"help": help_text, "type": None, "samples": {}}
+        elif line.startswith("# TYPE "):
+            name, _, metric_type = line[7:].partition(" ")
+            assert current is families[name]
+            assert metric_type in ("counter", "gauge", "histogram")
+            current["type"] = metric_type
+        else:
+            match = _SAMPLE_PATTERN.match(line)
+            assert match, line
+            name, _, labels, value = match.groups()
+            family = name if name in families else re.sub(r"_(bucket|sum|count)$", "", name)
+            assert families[family] is current, f"{name} outside its family"
+            key = (name, tuple(sorted(_LABEL_PATTERN.findall(labels or ""))))
+            current["samples"][key] = float(value)
+    return families
+
+
+@pytest.fixture
+def scrape():
+    def scrape():
+        return parse_exposition(metrics.render())
+    return scrape
+
+
+def _value(families, name, **labels):
+    family = families[re.sub(r"_(bucket|sum|count)$", "", name) if name not in families else name]
+    return family["samples"][(name, tuple(sorted(labels.items())))]
+
+
+def test_exposition_is_well_formed(agent_module, scrape):
+    agent_module.validate_hsn_codes(["85171290", "9999"])
+
+    families = scrape()
+
+    for name, family in families.items():
+        assert family["type"] is not None, name
+        if name.endswith("_total"):
+            assert family["type"] == "counter", name
+    assert families["hsn_stage_duration_seconds"]["type"] == "histogram"
+
+
+def test_histogram_buckets_are_cumulative(agent_module, scrape):
+    agent_module.validate_hsn_code("85171290")
+
+    families = scrape()
+
+    for stage in metrics.STAGES:
+        buckets = [
+            (float(dict(labels)["le"]), value)
+            for (name, labels), value in families["hsn_stage_duration_seconds"]["samples"].items()
+            if name.endswith("_bucket") and dict(labels)["stage"] == stage
+        ]
+        counts = [value for _, value in sorted(buckets)]
+        assert counts == sorted(counts), stage
+        assert buckets[-1][0] == float("inf")
+        assert counts[-1] == _value(families, "hsn_stage_duration_seconds_count", stage=stage)
+
+
+def test_validation_outcomes_are_counted(agent_module, scrape):
+    before = scrape()
+
+    agent_module.validate_hsn_codes(["85171290", "9999", "", "85A7", "123", "85171299"])
+    agent_module.validate_hsn_code("0101")
+
+    after = scrape()
+
+    def delta(name, **labels):
+        return _value(after, name, **labels) - _value(before, name, **labels)
+
+    assert delta("hsn_codes_validated_total", outcome="valid") == 2
+    assert delta("hsn_codes_validated_total", outcome="invalid") == 5
+    assert delta("hsn_validation_failures_total", reason="empty") == 1
+    assert delta("hsn_validation_failures_total", reason="non_digit") == 1
+    assert delta("hsn_validation_failures_total", reason="bad_length") == 1
+    assert delta("hsn_validation_failures_total", reason="not_found") == 1
+    assert delta("hsn_validation_failures_total", reason="missing_parent") == 1
+
+
+def test_dataset_and_cache_metrics(agent_module, scrape):
+    entry = agent_module.dataset_registry.get()
+    agent_module.validate_hsn_code("85171290")
+    agent_module.validate_hsn_code("85171290")
+
+    families = scrape()
+
+    assert _value(families, "hsn_master_codes", dataset=entry["name"]) == entry["count"]
+    assert _value(families, "hsn_master_version", dataset=entry["name"]) == entry["version"]
+    assert _value(families, "hsn_cache_hits_total", dataset=entry["name"]) >= 1
+    assert families["hsn_cache_hits_total"]["type"] == "counter"
+
+
+def test_reload_metrics_are_exported(served_master, scrape):
+    before = scrape()
+
+    assert api.reload_master_data(wait=True)["status"] == "success"
+    after = scrape()
+
+    for name in ("hsn_master_reloads_total", "hsn_master_swaps_total"):
+        assert after[name]["type"] == "counter"
+        assert _value(after, name) == _value(before, name) + 1
+    assert _value(after, "hsn_master_reload_failures_total") == _value(before, "hsn_master_reload_failures_total")
+    assert _value(after, "hsn_master_reload_last_duration_seconds") == pytest.approx(
+        api.reload_metrics["last_duration_seconds"])
+    assert _value(after, "hsn_master_reload_duration_seconds_total") >= _value(
+        after, "hsn_master_reload_last_duration_seconds")
+    assert _value(after, "hsn_master_reload_in_progress") == 0
+
+
+def test_failed_reloads_are_counted(served_master, scrape):
+    before = scrape()
+    with open(served_master, "w") as f:
+        f.write("Code,Text\n85171290,Telephones\n")
+
+    assert api.reload_master_data(wait=True)["status"] == "error"
+    after = scrape()
+
+    assert _value(after, "hsn_master_reload_failures_total") == _value(before, "hsn_master_reload_failures_total") + 1
+    assert _value(after, "hsn_master_swaps_total") == _value(before, "hsn_master_swaps_total")
+
+
+def test_label_values_are_escaped():
+    def collector():
+        return [("hsn_test_labels", "Escaping test", [({"value": 'a "quoted"\\ line\nbreak'}, 1)])]
+
+    metrics.register_collector(collector)
+    try:
+        families = parse_exposition(metrics.render())
+    finally:
+        metrics._collectors.remove(collector)
+
+    ((_, labels),) = families["hsn_test_labels"]["samples"]
+    assert labels == (("value", 'a \\"quoted\\"\\\\ line\\nbreak'),)
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "hsn_master_reloads_total" in parse_exposition(response.get_data(as_text=True))
+
+    monkeypatch.setattr(metrics, "_enabled", False)
+    assert client.get("/metrics").status_code == 404
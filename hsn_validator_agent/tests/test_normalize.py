@@ -0,0 +1,88 @@
+"""Lossless code normalization of input and master codes."""
+
+import random
+
+import numpy as np
+import pytest
+
+from index import HSNIndex
+from normalize import (FLOAT_SUFFIX, SEPARATORS, WHITESPACE, ZERO_PADDED, normalization_labels, normalization_names,
+                       normalize_code, normalize_codes)
+
+MASTER = HSNIndex.from_dict({"0101": "Live horses", "01": "Live animals", "85171290": "Telephones"})
+
+
+@pytest.mark.parametrize("code, expected, flags", [
+    ("85171290", "85171290", 0),
+    ("85171290.0", "85171290", FLOAT_SUFFIX),
+    ("8517.12.90", "85171290", SEPARATORS),
+    ("8517-12/90", "85171290", SEPARATORS),
+    ("8517 12 90", "85171290", WHITESPACE),
+    ("8517 12\t90", "85171290", WHITESPACE),
+    ("8517. 12 .90", "85171290", SEPARATORS | WHITESPACE),
+    ("101", "0101", ZERO_PADDED),
+    ("101.0", "0101", FLOAT_SUFFIX | ZERO_PADDED),
+    ("1", "01", ZERO_PADDED),
+    # Only padded when the padded code is in the master
+    ("103", "103", 0),
+    ("8517129", "8517129", 0),
+    # Not repaired when the result would not be all digits
+    ("85A7.12", "85A7.12", 0),
+    ("8517 12A", "8517 12A", 0),
+    # Any other dot is a separator
+    ("85171290.00", "8517129000", SEPARATORS),
+    ("", "", 0),
+])
+def test_input_codes(code, expected, flags):
+    normalized, normalized_flags = normalize_codes(np.array([code]), MASTER)
+
+    assert (normalized[0], int(normalized_flags[0])) == (expected, flags)
+    assert normalize_code(code, MASTER) == (expected, flags)
+
+
+def test_master_codes_are_always_padded():
+    normalized, flags = normalize_codes(np.array(["101", "8517129", "85"]))
+
+    assert normalized.tolist() == ["0101", "08517129", "85"]
+    assert flags.tolist() == [ZERO_PADDED, ZERO_PADDED, 0]
+    assert normalize_code("8517129") == ("08517129", ZERO_PADDED)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_array_and_scalar_normalization_agree(seed):
+    rng = random.Random(seed)
+    pieces = ["0", "1", "85", "17", "12", "90", ".", "-", "/", " ", "\t", ".0", "A"]
+    codes = ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 6))).strip() for _ in range(2000)]
+
+    normalized, flags = normalize_codes(np.array(codes), MASTER)
+
+    for code, array_code, array_flags in zip(codes, normalized.tolist(), flags.tolist()):
+        assert normalize_code(code, MASTER) == (array_code, array_flags), code
+
+
+def test_labels_and_names():
+    flags = np.array([0, FLOAT_SUFFIX | ZERO_PADDED, SEPARATORS], dtype=np.uint8)
+
+    assert normalization_labels(flags).tolist() == ["", "float_suffix_removed,zero_padded", "separators_removed"]
+    assert normalization_names(WHITESPACE | SEPARATORS) == ["separators_removed", "whitespace_removed"]
+
+
+def test_validation_reports_the_repairs(agent_module):
+    result = agent_module.validate_hsn_code("8517.12.90")
+
+    assert result["code"] == "85171290" and result["valid"]
+    assert result["normalized_from"] == "8517.12.90"
+    assert result["normalizations"] == ["separators_removed"]
+    assert "normalized_from" not in agent_module.validate_hsn_code(" 85171290 ")
+
+
+def test_numeric_master_cells_are_repaired(tmp_path, datasets):
+    import agent
+
+    datasets.append("numeric")
+    path = tmp_path / "numeric.csv"
+    path.write_text("HSNCode,Description\n1,Live animals\n101,Live horses\n85171290.0,Telephones\n")
+
+    assert agent.load_hsn_data(str(path), dataset="numeric")["status"] == "success"
+    index = agent.get_hsn_index(dataset="numeric")
+    assert sorted(index) == ["01", "0101", "85171290"]
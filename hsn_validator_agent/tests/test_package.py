@@ -0,0 +1,52 @@
+"""Package attributes do not depend on the order of imports."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PACKAGE_DIR
+
+ACCESS_ORDERS = [
+    "import hsn_validator_agent as package",
+    "import hsn_validator_agent.agent\nimport hsn_validator_agent as package",
+    "from hsn_validator_agent import agent\nimport hsn_validator_agent as package",
+]
+
+
+def _run(script: str) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-c", "import json, sys, types\n" + script + "\nprint(json.dumps(report))"],
+        cwd=os.path.dirname(PACKAGE_DIR), capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("imports", ACCESS_ORDERS)
+def test_agent_attribute_is_always_the_submodule(imports):
+    report = _run(imports + """
+report = {
+    "agent_is_module": isinstance(package.agent, types.ModuleType),
+    "agent_name": package.agent.__name__,
+    "adk_imported": "google.adk" in sys.modules,
+}""")
+
+    assert report == {"agent_is_module": True, "agent_name": "hsn_validator_agent.agent", "adk_imported": False}
+
+
+@pytest.mark.parametrize("imports", ACCESS_ORDERS)
+def test_root_agent_is_the_adk_agent(imports):
+    pytest.importorskip("google.adk")
+
+    report = _run(imports + """
+root_agent = package.root_agent
+report = {
+    "same_agent": root_agent is package.hsn_validator_agent is package.agent.get_agent(),
+    "agent_is_module": isinstance(package.agent, types.ModuleType),
+    "name": root_agent.name,
+}""")
+
+    assert report["same_agent"] and report["agent_is_module"]
+    assert report["name"]
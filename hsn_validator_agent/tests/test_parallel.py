@@ -0,0 +1,70 @@
+"""Parallel batch validation against the snapshot shared with the workers."""
+
+import os
+
+import pytest
+
+import parallel
+from batch import columns_to_results, validate_hsn_columns
+from conftest import CLEAN_MASTER, write_master
+from snapshot import load_snapshot
+from test_batch import random_inputs
+
+
+@pytest.fixture
+def no_temporary_snapshots(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the index was written to a temporary snapshot")
+
+    monkeypatch.setattr(parallel, "write_snapshot", fail)
+
+
+def test_parallel_results_match_batch_results(agent_module):
+    codes = random_inputs(2000)
+    entry = agent_module.dataset_registry.get()
+
+    result = parallel.validate_hsn_codes_parallel(codes, entry, workers=2, chunk_size=500)
+
+    assert result["status"] == "success"
+    assert result["results"] == agent_module.validate_hsn_codes(codes)["results"]
+    assert result["master_version"] == entry["version"]
+    assert result["summary"]["total"] == len(codes)
+
+
+def test_bare_index_reports_no_master_version(clean_master):
+    result = parallel.validate_hsn_codes_parallel(["85171290"], load_snapshot(clean_master))
+
+    assert result["master_version"] is None
+    assert result["results"][0]["valid"]
+
+
+def test_workers_reuse_a_matching_snapshot(clean_master, no_temporary_snapshots):
+    index = load_snapshot(clean_master)
+    codes = random_inputs(300)
+
+    columns = parallel.validate_hsn_columns_parallel(codes, index, workers=2, chunk_size=100)
+
+    assert columns_to_results(columns) == columns_to_results(validate_hsn_columns(codes, index))
+    assert sorted(os.listdir(os.path.dirname(clean_master))) == ["master.csv", "master.csv.hsnidx"]
+
+
+def test_workers_do_not_attach_a_snapshot_rebuilt_from_another_master(clean_master):
+    old_index = load_snapshot(clean_master)
+    write_master(clean_master, [(code, "Amended") for code, _ in CLEAN_MASTER if code != "85171290"])
+    load_snapshot(clean_master)
+
+    codes = ["85171290", "0101"] * 100
+    columns = parallel.validate_hsn_columns_parallel(codes, old_index, workers=2, chunk_size=50)
+
+    results = columns_to_results(columns)
+    assert results[0]["valid"] and results[0]["description"] == "Other telephones for cellular networks"
+    assert results[1]["description"] == "Live horses, asses, mules and hinnies"
+    assert sorted(os.listdir(os.path.dirname(clean_master))) == ["master.csv", "master.csv.hsnidx"]
+
+
+def test_in_memory_index_is_written_for_the_workers(tmp_path):
+    index = parallel.HSNIndex.from_dict(dict(CLEAN_MASTER))
+
+    columns = parallel.validate_hsn_columns_parallel(["85171290", "9999"] * 50, index, workers=2, chunk_size=25)
+
+    assert columns["valid"].tolist() == [True, False] * 50
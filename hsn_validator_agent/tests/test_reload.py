@@ -0,0 +1,111 @@
+"""Hot reload of the master data while requests are being served."""
+
+import threading
+import time
+
+import api
+from conftest import CLEAN_MASTER, write_master
+
+
+def _amended_master(path, label):
+    write_master(path, [(code, f"{label} {description}") for code, description in CLEAN_MASTER])
+
+
+def _label(description):
+    word = description.split()[0]
+    return word if word.startswith("Label") else None
+
+
+def _wait_for_reload(timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while api.reload_metrics["in_progress"] or api._load_lock.locked():
+        assert time.monotonic() < deadline, "reload did not finish"
+        time.sleep(0.01)
+
+
+def test_reload_serves_the_new_version(agent_module, served_master):
+    old_version = api.get_hsn_data_info()["master_version"]
+    _amended_master(served_master, "Amended")
+
+    result = api.reload_master_data(wait=True)
+
+    assert result["status"] == "success"
+    assert result["master_version"] == old_version + 1
+    response = api.validate_payload({"code": "85171290"})
+    assert response["master_version"] == old_version + 1
+    assert response["results"][0]["description"].startswith("Amended")
+    assert api.get_reload_metrics()["swaps"][-1]["from_version"] == old_version
+
+
+def test_background_reload(agent_module, served_master):
+    old_version = api.get_hsn_data_info()["master_version"]
+
+    started = api.reload_master_data()
+    _wait_for_reload()
+
+    assert started["status"] == "success"
+    assert started["master_version"] == old_version
+    assert api.get_hsn_data_info()["master_version"] == old_version + 1
+
+
+def test_failed_reload_keeps_serving_the_current_master(agent_module, served_master):
+    old_version = api.get_hsn_data_info()["master_version"]
+    failures = api.reload_metrics["failures"]
+    with open(served_master, "w") as f:
+        f.write("Code,Text\n85171290,Telephones\n")
+
+    result = api.reload_master_data(wait=True)
+
+    assert result["status"] == "error"
+    assert api.reload_metrics["failures"] == failures + 1
+    assert api.reload_metrics["last_error"] == result["error_message"]
+    response = api.validate_payload({"code": "85171290"})
+    assert response["master_version"] == old_version
+    assert response["results"][0]["valid"]
+
+
+def test_requests_during_reloads_see_one_consistent_master(agent_module, served_master):
+    stop = threading.Event()
+    observed = []
+    errors = []
+
+    def validate():
+        while not stop.is_set():
+            response = api.validate_payload({"codes": ["85171290", "0101"]})
+            if response["status"] != "success":
+                errors.append(response)
+                continue
+            labels = {_label(result["description"]) for result in response["results"]}
+            observed.append((response["master_version"], labels))
+
+    worker = threading.Thread(target=validate)
+    worker.start()
+    try:
+        labels = {}
+        for reload in range(6):
+            label = f"Label{reload}"
+            _amended_master(served_master, label)
+            result = api.reload_master_data(wait=True)
+            labels[result["master_version"]] = label
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not errors
+    assert observed
+    for version, seen in observed:
+        # Every response comes from exactly one master version
+        assert len(seen) == 1
+        if version in labels:
+            assert seen == {labels[version]}
+
+
+def test_sessions_keep_their_version_while_it_is_retained(agent_module, served_master):
+    old_entry = agent_module.dataset_registry.get()
+    _amended_master(served_master, "Amended")
+    api.reload_master_data(wait=True)
+
+    pinned = agent_module.dataset_registry.resolve(old_entry["name"], old_entry["version"])
+
+    assert pinned is old_entry
+    assert pinned["index"]["85171290"] == "Other telephones for cellular networks"
@@ -0,0 +1,134 @@
+"""Stored validation results and their incremental re-validation."""
+
+import pytest
+
+import api
+from conftest import CLEAN_MASTER, write_master
+from resultdb import ResultDatabase
+
+STORED_CODES = ["85171290", "85171299", "0101", "101", "90011000", "01012100"]
+
+# 010121 is removed (its child loses its parent), 85171299 is added and 0101 re-described
+UPDATED_MASTER = [
+    (code, "Horses" if code == "0101" else text) for code, text in CLEAN_MASTER if code != "010121"
+] + [("85171299", "Other telephones")]
+
+
+@pytest.fixture
+def result_db(agent_module, tmp_path, monkeypatch, datasets):
+    """A result database enabled for the test; the tests load their masters as dataset "stored"."""
+    database = ResultDatabase(str(tmp_path / "results.db"))
+    monkeypatch.setattr(agent_module, "result_db", database)
+    monkeypatch.setattr(agent_module, "_result_db_revisions", {})
+    datasets.append("stored")
+    yield database
+    database.close()
+
+
+def _load(agent_module, path):
+    result = agent_module.load_hsn_data(path, dataset="stored")
+    assert result["status"] == "success", result
+    return result["revalidation"]
+
+
+def _validate(codes):
+    return api.validate_payload({"codes": codes, "dataset": "stored"})["results"]
+
+
+def test_batches_are_stored_once(agent_module, result_db, clean_master):
+    report = _load(agent_module, clean_master)
+    assert (report["status"], report["from_revision"], report["revision"]) == ("initial", None, 1)
+
+    results = _validate(STORED_CODES)
+    _validate(STORED_CODES + [" 85171290 "])
+
+    assert result_db.stats("stored") == {"dataset": "stored", "revision": 1, "stored_codes": len(STORED_CODES)}
+    assert result_db.lookup("stored", STORED_CODES) == dict(zip(STORED_CODES, results))
+
+
+def test_master_update_revalidates_only_affected_codes(agent_module, result_db, clean_master, tmp_path):
+    assert _load(agent_module, clean_master)["status"] == "initial"
+    _validate(STORED_CODES)
+
+    report = _load(agent_module, write_master(tmp_path / "updated.csv", UPDATED_MASTER))
+
+    assert report["status"] == "updated"
+    assert (report["from_revision"], report["revision"]) == (1, 2)
+    assert report["master_diff"]["added"] == 1
+    assert report["master_diff"]["removed"] == 1
+    assert report["master_diff"]["redescribed"] == 1
+    assert report["stored_codes"] == len(STORED_CODES)
+    # 85171290 and 90011000 are outside the changed subtrees
+    assert report["revalidated"] == 4
+    assert (report["changed"], report["became_valid"], report["became_invalid"]) == (4, 1, 1)
+
+    # Stored results are those of the new master
+    assert result_db.lookup("stored", STORED_CODES) == dict(zip(STORED_CODES, _validate(STORED_CODES)))
+
+
+def test_revalidation_report_lists_the_changed_codes(agent_module, result_db, clean_master, tmp_path):
+    _load(agent_module, clean_master)
+    _validate(STORED_CODES)
+    _load(agent_module, write_master(tmp_path / "updated.csv", UPDATED_MASTER))
+
+    report = api.revalidation_report("stored")
+
+    assert report["status"] == "success" and report["revision"] == 2
+    changes = {change["code"]: change for change in report["changes"]}
+    assert set(changes) == {"85171299", "0101", "101", "01012100"}
+    assert not changes["85171299"]["before"]["valid"] and changes["85171299"]["after"]["valid"]
+    assert changes["01012100"]["before"]["valid"] and not changes["01012100"]["after"]["valid"]
+    assert changes["101"]["after"]["description"] == "Horses"
+    assert len(api.revalidation_report("stored", 1)["changes"]) == 1
+
+
+def test_unchanged_master_keeps_its_revision(agent_module, result_db, clean_master, tmp_path):
+    _load(agent_module, clean_master)
+    _validate(STORED_CODES)
+
+    report = _load(agent_module, write_master(tmp_path / "copy.csv", CLEAN_MASTER))
+
+    assert report == {"status": "unchanged", "dataset": "stored", "revision": 1}
+    assert result_db.stats("stored")["stored_codes"] == len(STORED_CODES)
+
+
+def test_results_of_a_superseded_revision_are_not_stored(agent_module, result_db, clean_master, tmp_path):
+    _load(agent_module, clean_master)
+    results = _validate(STORED_CODES)
+    _load(agent_module, write_master(tmp_path / "updated.csv", UPDATED_MASTER))
+
+    assert result_db.record("stored", 1, ["99"], results[:1]) == 0
+    assert result_db.lookup("stored", ["99"]) == {}
+
+
+def test_report_when_the_database_is_disabled(agent_module):
+    assert agent_module.result_db is None
+    assert api.revalidation_report()["status"] == "error"
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_asgi_stores_results_off_the_event_loop(agent_module, tmp_path, monkeypatch, enabled):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import asgi
+
+    if enabled:
+        database = ResultDatabase(str(tmp_path / "results.db"))
+        monkeypatch.setattr(agent_module, "result_db", database)
+    offloaded = []
+    run_in_executor = asgi._run_in_executor
+
+    async def record_offload(func, *args):
+        offloaded.append(func)
+        return await run_in_executor(func, *args)
+
+    monkeypatch.setattr(asgi, "_run_in_executor", record_offload)
+
+    response = TestClient(asgi.app).post("/validate", json={"codes": ["85171290", "0101"]})
+
+    assert response.status_code == 200
+    assert offloaded == ([api.validate_payload] if enabled else [])
+    if enabled:
+        database.close()
@@ -0,0 +1,105 @@
+"""Structured requests are validated directly, without the LLM."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import CLEAN_MASTER, write_master
+from router import HSNRequestRouter, parse_structured_request
+
+
+class FakeSessionService:
+    def __init__(self, state):
+        self.state = state
+
+    def get_session(self, app_name, user_id, session_id):
+        return SimpleNamespace(state=self.state)
+
+
+def _router(state=None):
+    def run(**kwargs):
+        raise AssertionError("structured request sent to the LLM")
+
+    runner = SimpleNamespace(app_name="hsn", session_service=FakeSessionService(state or {}), run=run)
+    return HSNRequestRouter(runner, user_id="user", session_id="session")
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"code": "85171290"}, {"code": "85171290"}),
+    ({"codes": ["0101", "85"]}, {"codes": ["0101", "85"]}),
+    (["0101", 85], {"codes": ["0101", "85"]}),
+    ("85171290", {"code": "85171290"}),
+    ("0101, 85; 8517 851712", {"codes": ["0101", "85", "8517", "851712"]}),
+    ('{"code": "0101"}', {"code": "0101"}),
+    ('["0101", "85"]', {"codes": ["0101", "85"]}),
+    ("Is 85171290 valid for mobile phones?", None),
+    ("what is the code for laptops", None),
+    ('{"question": "laptops"}', None),
+    ("{not json", None),
+    ("", None),
+    ({"query": "laptops"}, None),
+])
+def test_parse_structured_request(query, expected):
+    assert parse_structured_request(query) == expected
+
+
+def test_structured_requests_skip_the_llm(agent_module):
+    router = _router()
+
+    single = router.route("85171290")
+    batch = router.route(["85171290", "9999"])
+
+    assert single["path"] == "direct"
+    assert single["response"]["results"][0]["valid"]
+    assert [result["valid"] for result in batch["response"]["results"]] == [True, False]
+    stats = router.stats()
+    assert stats["direct"]["requests"] == 2 and stats["llm"]["requests"] == 0
+    assert stats["direct"]["share"] == 1.0
+
+
+def test_free_form_requests_go_to_the_llm(agent_module, monkeypatch):
+    router = _router()
+    asked = []
+    monkeypatch.setattr(router, "ask_llm", lambda query: asked.append(query) or "answer")
+
+    result = router.route("Which code covers laptops?")
+
+    assert result == {"path": "llm", "response": "answer"}
+    assert asked == ["Which code covers laptops?"]
+    assert router.stats()["llm"]["requests"] == 1
+
+
+def test_direct_requests_use_the_session_dataset(agent_module, tmp_path, datasets):
+    datasets.append("customs")
+    customs = write_master(tmp_path / "customs.csv", [(code, "Customs " + text) for code, text in CLEAN_MASTER])
+    agent_module.load_hsn_data(customs, dataset="customs")
+    router = _router({"hsn_dataset": {"dataset": "customs", "version": None}})
+
+    response = router.route({"code": "85171290"})["response"]
+
+    assert response["results"][0]["description"].startswith("Customs")
+    assert response["master_version"] == agent_module.dataset_registry.get("customs")["version"]
+
+
+def test_direct_requests_use_the_pinned_session_version(agent_module, tmp_path, datasets):
+    datasets.append("customs")
+    customs = write_master(tmp_path / "customs.csv", [(code, "First " + text) for code, text in CLEAN_MASTER])
+    first = agent_module.load_hsn_data(customs, dataset="customs")["master_version"]
+    write_master(customs, [(code, "Second " + text) for code, text in CLEAN_MASTER])
+    agent_module.load_hsn_data(customs, dataset="customs")
+    state = {"hsn_dataset": {"dataset": "customs", "version": first}}
+    router = _router(state)
+
+    response = router.route(["85171290", "0101"])["response"]
+
+    assert response["master_version"] == first
+    assert all(result["description"].startswith("First") for result in response["results"])
+    assert state == {"hsn_dataset": {"dataset": "customs", "version": first}}
+
+
+def test_direct_requests_without_a_runner_use_the_default_dataset(agent_module):
+    router = HSNRequestRouter()
+
+    response = router.route("85171290")["response"]
+
+    assert response["master_version"] == agent_module.dataset_registry.get()["version"]
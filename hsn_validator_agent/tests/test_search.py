@@ -0,0 +1,120 @@
+"""BM25 description search and the /search payload."""
+
+import json
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import api
+from index import HSNIndex
+from search import BM25_B, BM25_K1, HSNSearchIndex, tokenize
+
+MASTER = {
+    "8471": "Automatic data processing machines",
+    "847130": "Portable automatic data processing machines, laptops and notebooks",
+    "85": "Electrical machinery and equipment",
+    "8507": "Electric accumulators and batteries",
+    "850760": "Lithium-ion batteries",
+    "7010": "Glass bottles and jars",
+    "9001": "Optical fibres and lenses",
+}
+
+
+@pytest.fixture
+def search_index():
+    return HSNSearchIndex(HSNIndex.from_dict(MASTER))
+
+
+def test_tokenize_drops_stopwords_and_stems_plurals():
+    assert tokenize("Batteries for the Computers") == ["battery", "computer"]
+    assert tokenize("Glass of a series of species") == ["glass", "series", "species"]
+    assert tokenize("Lithium-ion cells, 12V") == ["lithium", "ion", "cell", "12v"]
+
+
+def _naive_bm25(master, query):
+    documents = {code: tokenize(description) for code, description in master.items()}
+    average_length = sum(len(terms) for terms in documents.values()) / len(documents)
+    scores = {}
+    for code, terms in documents.items():
+        counts = Counter(terms)
+        score = 0.0
+        for term in set(tokenize(query)):
+            if term not in counts:
+                continue
+            frequency = sum(1 for other in documents.values() if term in other)
+            idf = math.log(1.0 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * len(terms) / average_length)
+            score += idf * counts[term] * (BM25_K1 + 1.0) / (counts[term] + norm)
+        if score:
+            scores[code] = score
+    return scores
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_scores_match_a_naive_bm25(seed):
+    rng = random.Random(seed)
+    words = ["steel", "copper", "wire", "tube", "sheet", "alloy", "cast", "plate", "rod", "bar"]
+    master = {
+        str(10 + position): " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        for position in range(60)
+    }
+    search_index = HSNSearchIndex(HSNIndex.from_dict(master))
+
+    for query in ["steel wire", "copper", "alloy cast plate rod", "tube tube sheet"]:
+        expected = _naive_bm25(master, query)
+        matches = search_index.search(query, limit=len(master))
+
+        assert {match["code"] for match in matches} == set(expected)
+        for match in matches:
+            assert match["score"] == pytest.approx(expected[match["code"]], abs=1e-3)
+        scores = [match["score"] for match in matches]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_documents_matching_more_terms_rank_first(search_index):
+    matches = search_index.search("lithium batteries")
+
+    assert [match["code"] for match in matches] == ["850760", "8507"]
+
+
+def test_shorter_codes_rank_first_on_ties():
+    search_index = HSNSearchIndex(HSNIndex.from_dict({"0101": "Live horses", "02": "Live horses", "85": "Phones"}))
+
+    assert [match["code"] for match in search_index.search("horses")] == ["02", "0101"]
+
+
+def test_limit_and_unknown_terms(search_index):
+    assert len(search_index.search("machines", limit=1)) == 1
+    assert search_index.search("submarine") == []
+    assert search_index.search("the of and") == []
+    assert search_index.search("machines", limit=0) == []
+
+
+def test_search_many_keeps_query_order(search_index):
+    results = search_index.search_many(["glass", "optical lenses"])
+
+    assert [result["query"] for result in results] == ["glass", "optical lenses"]
+    assert results[1]["matches"][0]["code"] == "9001"
+
+
+@pytest.mark.parametrize("payload", [["laptop"], ["query"], "query", 5])
+def test_search_payload_rejects_non_object_payloads(payload):
+    assert api.search_payload(payload) == {"status": "error", "message": "Invalid request format"}
+
+
+def test_search_payload(agent_module):
+    result = api.search_payload({"queries": ["cellular telephones", "", None], "limit": "2"})
+
+    assert result["status"] == "success"
+    assert len(result["results"]) == 1
+    assert result["results"][0]["matches"][0]["code"] == "851712"
+    assert api.search_payload({"query": "horses", "limit": "x"})["message"] == "limit must be an integer"
+
+
+def test_search_endpoint_answers_non_object_payloads(client):
+    response = client.post("/search", data=json.dumps(["laptop"]), content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.get_json()["message"] == "Invalid request format"
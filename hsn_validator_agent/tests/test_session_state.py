@@ -0,0 +1,59 @@
+"""Session state holds a dataset handle, never the master data."""
+
+import json
+from types import SimpleNamespace
+
+from conftest import CLEAN_MASTER, write_master
+
+
+def _session(state=None):
+    return SimpleNamespace(state={} if state is None else state)
+
+
+def test_loading_stores_only_a_handle(agent_module, clean_master):
+    session = _session()
+
+    result = agent_module.load_hsn_data(clean_master, session)
+
+    assert session.state == {"hsn_dataset": {"dataset": result["dataset"], "version": result["master_version"]}}
+    assert len(json.dumps(session.state)) < 100
+
+
+def test_validation_leaves_the_session_state_small(agent_module, clean_master):
+    session = _session()
+    agent_module.load_hsn_data(clean_master, session)
+    before = dict(session.state)
+
+    agent_module.validate_hsn_codes([code for code, _ in CLEAN_MASTER] * 50, session)
+    agent_module.suggest_hsn_codes(["85172190"], tool_context=session)
+
+    assert session.state == before
+
+
+def test_pinned_session_moves_on_once_its_version_is_dropped(agent_module, clean_master):
+    session = _session()
+    first = agent_module.load_hsn_data(clean_master, session)["master_version"]
+
+    for label in ("Second", "Third", "Fourth"):
+        write_master(clean_master, [(code, f"{label} {text}") for code, text in CLEAN_MASTER])
+        latest = agent_module.load_hsn_data(clean_master)["master_version"]
+
+    assert agent_module.dataset_registry.resolve(None, first) is None
+    assert agent_module.validate_hsn_code("0101", session)["description"].startswith("Fourth")
+    assert session.state["hsn_dataset"]["version"] == latest
+
+
+def test_session_keeps_a_retained_version(agent_module, clean_master):
+    session = _session()
+    first = agent_module.load_hsn_data(clean_master, session)["master_version"]
+    write_master(clean_master, [(code, f"Second {text}") for code, text in CLEAN_MASTER])
+    agent_module.load_hsn_data(clean_master)
+
+    assert agent_module.validate_hsn_code("0101", session)["description"] == "Live horses, asses, mules and hinnies"
+    assert session.state["hsn_dataset"]["version"] == first
+
+
+def test_dataset_name_handle_follows_the_current_version(agent_module):
+    session = _session({"hsn_dataset": agent_module.dataset_registry.get()["name"]})
+
+    assert agent_module.validate_hsn_code("0101", session)["valid"]
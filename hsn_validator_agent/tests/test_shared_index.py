@@ -0,0 +1,62 @@
+"""Worker processes attach to one published, memory-mapped snapshot."""
+
+import json
+import os
+import subprocess
+import sys
+
+import agent
+from conftest import CLEAN_MASTER, PACKAGE_DIR
+from snapshot import default_snapshot_path, publish_snapshot
+
+
+def test_publish_compiles_once(clean_master):
+    snapshot_path = publish_snapshot(clean_master)
+    published_at = os.stat(snapshot_path).st_mtime_ns
+
+    assert snapshot_path == default_snapshot_path(clean_master)
+    assert publish_snapshot(clean_master) == snapshot_path
+    assert os.stat(snapshot_path).st_mtime_ns == published_at
+
+
+def test_attached_index_is_a_read_only_view_of_the_snapshot(clean_master, datasets):
+    snapshot_path = publish_snapshot(clean_master)
+    datasets.append("shared")
+
+    result = agent.attach_hsn_index(snapshot_path, dataset="shared")
+
+    assert result["status"] == "success"
+    assert result["code_count"] == len(CLEAN_MASTER)
+    index = agent.get_hsn_index(dataset="shared")
+    keys = index.packed
+    assert not keys.flags.owndata and not keys.flags.writeable
+    assert index.metadata["snapshot_path"] == snapshot_path
+
+    response = agent.process_hsn_validation_request({"code": "85171290", "dataset": "shared"})
+    assert response["status"] == "success"
+    assert response["results"][0]["valid"]
+
+
+def test_attach_to_a_missing_snapshot_fails(tmp_path, datasets):
+    datasets.append("shared")
+
+    result = agent.attach_hsn_index(str(tmp_path / "missing.hsnidx"), dataset="shared")
+
+    assert result["status"] == "error"
+    assert agent.dataset_registry.get("shared") is None
+
+
+def test_worker_processes_validate_against_the_published_snapshot(clean_master):
+    snapshot_path = publish_snapshot(clean_master)
+    script = (
+        "import json, sys, agent\n"
+        "agent.attach_hsn_index(sys.argv[1])\n"
+        "print(json.dumps([agent.validate_hsn_code(code)['valid'] for code in ('85171290', '9999')]))\n"
+    )
+
+    for _ in range(2):
+        worker = subprocess.run(
+            [sys.executable, "-c", script, snapshot_path],
+            cwd=PACKAGE_DIR, capture_output=True, text=True, check=True
+        )
+        assert json.loads(worker.stdout.strip().splitlines()[-1]) == [True, False]
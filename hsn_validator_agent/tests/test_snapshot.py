@@ -0,0 +1,71 @@
+"""Snapshot compilation, freshness and rebuilds."""
+
+import os
+
+import pytest
+
+from conftest import CLEAN_MASTER, write_master
+from snapshot import (default_snapshot_path, load_snapshot, open_snapshot, read_snapshot_header,
+                      snapshot_is_fresh, write_snapshot)
+
+
+def test_first_load_compiles_a_fresh_snapshot(clean_master):
+    index = load_snapshot(clean_master)
+    snapshot_path = default_snapshot_path(clean_master)
+
+    assert os.path.exists(snapshot_path)
+    assert snapshot_is_fresh(snapshot_path, clean_master)
+    assert len(index) == len(CLEAN_MASTER)
+    assert dict(index) == dict(CLEAN_MASTER)
+
+
+def test_second_load_opens_the_existing_snapshot(clean_master):
+    load_snapshot(clean_master)
+    snapshot_path = default_snapshot_path(clean_master)
+    compiled_at = os.stat(snapshot_path).st_mtime_ns
+
+    index = load_snapshot(clean_master)
+
+    assert os.stat(snapshot_path).st_mtime_ns == compiled_at
+    assert index.metadata["snapshot_path"] == snapshot_path
+
+
+def test_touched_master_with_same_content_stays_fresh(clean_master):
+    load_snapshot(clean_master)
+    snapshot_path = default_snapshot_path(clean_master)
+    stat = os.stat(clean_master)
+    os.utime(clean_master, ns=(stat.st_atime_ns, stat.st_mtime_ns + 60 * 10 ** 9))
+
+    assert snapshot_is_fresh(snapshot_path, clean_master)
+
+
+def test_changed_master_is_rebuilt(clean_master):
+    load_snapshot(clean_master)
+    snapshot_path = default_snapshot_path(clean_master)
+    write_master(clean_master, CLEAN_MASTER + [("85171210", "Satellite telephones")])
+
+    assert not snapshot_is_fresh(snapshot_path, clean_master)
+    index = load_snapshot(clean_master)
+    assert index["85171210"] == "Satellite telephones"
+    assert snapshot_is_fresh(snapshot_path, clean_master)
+
+
+def test_corrupt_snapshot_is_rebuilt(clean_master):
+    snapshot_path = default_snapshot_path(clean_master)
+    with open(snapshot_path, "wb") as f:
+        f.write(b"not a snapshot")
+
+    assert not snapshot_is_fresh(snapshot_path, clean_master)
+    assert len(load_snapshot(clean_master)) == len(CLEAN_MASTER)
+
+
+def test_snapshot_round_trip(tmp_path):
+    codes = {"0101": "Live horses", "8517": "Telephones", "ABCD": "Non-numeric code", "85171290": "Telephones"}
+    snapshot_path = write_snapshot(codes, str(tmp_path / "codes.hsnidx"))
+
+    index = open_snapshot(snapshot_path)
+
+    assert dict(index) == codes
+    assert read_snapshot_header(snapshot_path)["count"] == len(codes)
+    with pytest.raises(KeyError):
+        index["9999"]
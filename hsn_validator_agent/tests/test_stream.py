@@ -0,0 +1,154 @@
+"""Chunked file validation and the /validate_file endpoint."""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import pytest
+from openpyxl import Workbook
+
+import app as web_app
+from stream import RESULT_FIELDS, iter_code_chunks, stream_validation
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Records the temporary files the uploads are spooled to."""
+    paths = []
+    mkstemp = tempfile.mkstemp
+
+    def recording_mkstemp(*args, **kwargs):
+        fd, path = mkstemp(*args, **kwargs)
+        paths.append(path)
+        return fd, path
+
+    monkeypatch.setattr(web_app.tempfile, "mkstemp", recording_mkstemp)
+    return paths
+
+
+def _write_invoice_csv(path, codes):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Item", "HSNCode"])
+        writer.writerows((f"item {row}", code) for row, code in enumerate(codes))
+    return str(path)
+
+
+def _write_invoice_xlsx(path, codes):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Item", "HSNCode"])
+    for row, code in enumerate(codes):
+        sheet.append([f"item {row}", code])
+    workbook.save(path)
+    return str(path)
+
+
+def test_csv_is_read_in_chunks(tmp_path):
+    source = _write_invoice_csv(tmp_path / "invoice.csv", [str(code) for code in range(25)])
+
+    chunks = [list(chunk) for chunk in iter_code_chunks(source, chunk_size=10)]
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[2][-1] == "24"
+
+
+@pytest.mark.parametrize("writer, file_format", [(_write_invoice_csv, "csv"), (_write_invoice_xlsx, "xlsx")])
+def test_streamed_results_match_batch_validation(agent_module, tmp_path, writer, file_format):
+    codes = ["85171290", "8517", "9999", "8517.12.90", "", "0101"] * 5
+    source = writer(tmp_path / f"invoice.{file_format}", codes)
+    summaries = []
+
+    pieces = list(stream_validation(source, agent_module.get_hsn_index(), chunk_size=4,
+                                    file_format=file_format, output_format="ndjson", progress=summaries.append))
+
+    rows = [json.loads(line) for piece in pieces for line in piece.splitlines()]
+    expected = agent_module.validate_hsn_codes(codes)["results"]
+    assert [row.pop("row") for row in rows] == list(range(1, len(codes) + 1))
+    assert rows == expected
+    assert len(pieces) == 8
+    assert summaries[-1] == {"total": 30, "valid": 20, "invalid": 10}
+
+
+def test_csv_output_has_a_header_and_one_line_per_row(agent_module, tmp_path):
+    source = _write_invoice_csv(tmp_path / "invoice.csv", ["85171290", "9999"])
+
+    output = "".join(stream_validation(source, agent_module.get_hsn_index()))
+
+    rows = list(csv.reader(io.StringIO(output)))
+    assert rows[0] == RESULT_FIELDS
+    assert [row[:3] for row in rows[1:]] == [["1", "85171290", "True"], ["2", "9999", "False"]]
+
+
+def test_missing_column_fails_before_any_output(agent_module, tmp_path):
+    source = _write_invoice_csv(tmp_path / "invoice.csv", ["85171290"])
+
+    with pytest.raises(ValueError, match="Column 'Code' not found"):
+        next(stream_validation(source, agent_module.get_hsn_index(), column="Code"))
+
+
+def test_validate_file_streams_results_and_removes_the_upload(client, uploads):
+    response = client.post("/validate_file", data={
+        "file": (io.BytesIO(b"HSNCode\n85171290\n9999\n"), "codes.csv"),
+        "format": "ndjson"
+    })
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    response.close()
+    assert [row["valid"] for row in rows] == [True, False]
+    assert uploads and not any(os.path.exists(path) for path in uploads)
+
+
+def test_validate_file_without_data_rows_streams_empty_ndjson(client, uploads):
+    response = client.post("/validate_file", data={
+        "file": (io.BytesIO(b"HSNCode\n"), "codes.csv"),
+        "format": "ndjson"
+    })
+
+    assert response.status_code == 200
+    assert response.get_data() == b""
+    response.close()
+    assert uploads and not any(os.path.exists(path) for path in uploads)
+
+
+def _zip_without_workbook() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("readme.txt", "not a workbook")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("content, filename, message", [
+    (b"", "codes.csv", "Input file is empty"),
+    (b"", "codes.xlsx", "Input file is not a valid Excel workbook"),
+    (b"Item\nfoo\n", "codes.csv", "Column 'HSNCode' not found in input file"),
+    (b"HSNCode\n\xff\xfe\x00\n", "codes.csv", None),
+    (_zip_without_workbook(), "codes.xlsx", "Failed to read the uploaded file"),
+], ids=["empty-csv", "empty-xlsx", "missing-column", "undecodable-csv", "zip-without-workbook"])
+def test_validate_file_reports_unreadable_uploads(client, uploads, content, filename, message):
+    response = client.post("/validate_file", data={
+        "file": (io.BytesIO(content), filename),
+        "format": "ndjson"
+    })
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "error"
+    if message:
+        assert body["message"].startswith(message)
+    assert uploads and not any(os.path.exists(path) for path in uploads)
+
+
+def test_validate_file_without_master_data_returns_the_load_error(client, uploads, monkeypatch):
+    monkeypatch.setattr(web_app, "get_hsn_index", lambda: None)
+    monkeypatch.setattr(web_app, "ensure_data_loaded",
+                        lambda: {"status": "error", "error_message": "HSN master data file not found"})
+
+    response = client.post("/validate_file", data={"file": (io.BytesIO(b"HSNCode\n85171290\n"), "codes.csv")})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "error", "error_message": "HSN master data file not found"}
+    assert uploads == []
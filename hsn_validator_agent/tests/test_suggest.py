@@ -0,0 +1,98 @@
+"""Did-you-mean suggestions for mistyped HSN codes."""
+
+import random
+
+import pytest
+
+from index import HSNIndex
+from suggest import HSNSuggester, _edit_distance
+
+MASTER = {
+    "85": "Electrical machinery",
+    "8517": "Telephone sets",
+    "851712": "Telephones for cellular networks",
+    "85171210": "Satellite telephones",
+    "85171290": "Other telephones for cellular networks",
+    "851718": "Other telephone sets",
+    "85171800": "Other telephone sets",
+    "8471": "Computers",
+    "847130": "Portable computers",
+    "84713010": "Laptops",
+}
+
+
+@pytest.fixture
+def suggester():
+    return HSNSuggester(HSNIndex.from_dict(MASTER))
+
+
+@pytest.mark.parametrize("code, expected, reason", [
+    ("85172190", "85171290", "transposed_digits"),
+    ("85171291", "85171290", "substituted_digit"),
+    ("851712900", "85171290", "extra_digit"),
+    ("8517120", "85171210", "missing_digit"),
+    ("8517.21.90", "85171290", "transposed_digits"),
+    (" 85172190 ", "85171290", "transposed_digits"),
+])
+def test_best_suggestion_for_a_single_mistake(suggester, code, expected, reason):
+    best = suggester.suggest(code)[0]
+
+    assert best["code"] == expected
+    assert best["reason"] == reason
+    assert best["distance"] == 1
+    assert best["description"] == MASTER[expected]
+
+
+def test_siblings_fill_up_when_there_are_no_near_misses(suggester):
+    suggestions = suggester.suggest("85179999", limit=2)
+
+    # The siblings closest in tariff number are picked, then ranked by edit distance
+    assert [suggestion["reason"] for suggestion in suggestions] == ["sibling"] * 2
+    assert {suggestion["code"] for suggestion in suggestions} == {"85171800", "85171290"}
+    assert suggestions[0]["distance"] <= suggestions[1]["distance"]
+
+
+def test_code_without_existing_ancestor_has_no_siblings(suggester):
+    assert suggester.suggest("99999999") == []
+
+
+def test_a_valid_code_does_not_suggest_itself(suggester):
+    assert "85171290" not in [suggestion["code"] for suggestion in suggester.suggest("85171290", limit=20)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_every_code_one_edit_away_is_suggested(seed):
+    rng = random.Random(seed)
+    master = {"".join(rng.choice("0123") for _ in range(rng.choice([4, 6, 8]))): "x" for _ in range(400)}
+    suggester = HSNSuggester(HSNIndex.from_dict(master))
+
+    for _ in range(100):
+        code = "".join(rng.choice("0123") for _ in range(rng.choice([4, 6, 8])))
+        suggestions = suggester.suggest(code, limit=len(master))
+        suggested = {suggestion["code"]: suggestion["distance"] for suggestion in suggestions}
+
+        near = {other for other in master if other != code and _edit_distance(code, other) == 1}
+        assert near <= set(suggested), code
+        for other, distance in suggested.items():
+            assert distance == _edit_distance(code, other), (code, other)
+        distances = [suggestion["distance"] for suggestion in suggestions]
+        assert distances == sorted(distances), code
+
+
+def test_suggest_many_dedupes_and_keys_by_stripped_input(suggester):
+    suggestions = suggester.suggest_many([" 85172190", "85172190", "8517.21.90", "847130100"])
+
+    assert list(suggestions) == ["85172190", "8517.21.90", "847130100"]
+    assert suggestions["85172190"] == suggestions["8517.21.90"]
+    assert suggestions["847130100"][0]["code"] == "84713010"
+
+
+def test_agent_suggestions(agent_module):
+    result = agent_module.suggest_hsn_codes(["85172190", "8517.12.90"], limit=2)
+
+    assert result["status"] == "success"
+    first, second = result["results"]
+    assert not first["exists_in_database"]
+    assert first["suggestions"][0]["code"] == "85171290"
+    assert second["exists_in_database"]
+    assert len(first["suggestions"]) <= 2